@@ -0,0 +1,186 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 추천 요청을 짧은 시간 창(window) 동안 모아 한 번의 벡터 연산으로 예측합니다.
+
+    - predict_fn: (N, F) 크기의 numpy 배열을 받아 길이 N의 예측값을 반환하는 함수
+    - window_ms: 첫 요청이 도착한 뒤 다른 요청을 기다리는 최대 시간(ms)
+    - max_batch_size: 한 번에 처리할 최대 요청 수 (가득 차면 창을 기다리지 않고 바로 실행)
+
+    submit()이 timeout으로 끝나면 그 요청은 취소되어 배치에서 빠집니다.
+
+    워커 스레드는 첫 submit() 시점에 시작되며, fork 이후 자식 프로세스에서 처음 호출될 때
+    다시 시작됩니다. (gunicorn 워커가 부모의 죽은 스레드를 물려받는 문제 방지)
+    """
+
+    def __init__(self, predict_fn, window_ms=3.0, max_batch_size=32, latency_samples=1000):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._thread = None
+        self._pid = None
+
+        # --- 지표(metrics) ---
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._max_batch = 0
+        self._latencies_ms = deque(maxlen=latency_samples)
+        self._batch_sizes = deque(maxlen=latency_samples)
+        self._inference_ms = deque(maxlen=latency_samples)
+
+    # ------------------------------------------------------------------
+    # 요청 제출
+    # ------------------------------------------------------------------
+    def submit(self, row, timeout=None):
+        """ 한 건의 입력(피처 리스트)을 제출하고 예측값이 나올 때까지 기다립니다. """
+        future = self.submit_async(row)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # 아직 배치에 들어가지 않았으면 취소해 대기열에서 빠지게 합니다. (기다리는 호출자가 없으므로)
+            future.cancel()
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+
+    def submit_async(self, row):
+        future = Future()
+        enqueued_at = time.perf_counter()
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append((row, future, enqueued_at))
+            self._cond.notify()
+        return future
+
+    def _ensure_worker(self):
+        # _cond를 잡은 상태에서 호출됩니다.
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        if self._pid is not None and self._pid != pid:
+            # fork 이전에 쌓인 요청은 부모 프로세스의 것이므로 버립니다.
+            self._pending = []
+        self._pid = pid
+        self._thread = threading.Thread(target=self._run, name='ai-micro-batcher', daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # 워커 루프
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                # 첫 요청 도착 후 window 만큼 추가 요청을 기다림 (배치가 차면 즉시 실행)
+                deadline = time.perf_counter() + self.window
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                # timeout으로 취소된 요청은 예측하지 않음
+                self._pending = [item for item in self._pending if not item[1].cancelled()]
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+
+            # RUNNING으로 바꾼 뒤에는 취소할 수 없으므로, 그 사이 취소된 요청만 마지막으로 걸러냄
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch):
+        rows = np.asarray([item[0] for item in batch], dtype=np.float32)
+        started = time.perf_counter()
+        try:
+            predictions = np.asarray(self.predict_fn(rows)).reshape(-1)
+            if len(predictions) != len(batch):
+                # zip()으로 짝지으면 남은 요청이 결과를 받지 못하고 timeout까지 기다리게 됨
+                raise ValueError(f'predict_fn returned {len(predictions)} values for {len(batch)} inputs')
+        except Exception as e:
+            logger.exception('AI 배치 예측 실패 (batch_size=%d)', len(batch))
+            for _, future, _ in batch:
+                future.set_exception(e)
+            # 실패한 요청도 요청 수에 포함하고, 오류 수는 실패한 요청 수로 셉니다.
+            with self._stats_lock:
+                self._requests += len(batch)
+                self._errors += len(batch)
+            return
+
+        finished = time.perf_counter()
+        for (_, future, _), value in zip(batch, predictions):
+            future.set_result(float(value))
+
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._max_batch = max(self._max_batch, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._inference_ms.append((finished - started) * 1000)
+            for _, _, enqueued_at in batch:
+                self._latencies_ms.append((finished - enqueued_at) * 1000)
+
+    # ------------------------------------------------------------------
+    # 지표 조회
+    # ------------------------------------------------------------------
+    def stats(self):
+        """ 누적 요청/배치 수, 배치 크기, 지연 시간(ms) 분포를 dict로 반환합니다. """
+        with self._stats_lock:
+            latencies = np.asarray(self._latencies_ms, dtype=np.float64)
+            inference = np.asarray(self._inference_ms, dtype=np.float64)
+            sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+            result = {
+                'requests': self._requests,
+                'batches': self._batches,
+                'errors': self._errors,
+                'timeouts': self._timeouts,
+                'max_batch_size': self._max_batch,
+                'avg_batch_size': round(float(sizes.mean()), 2) if sizes.size else 0.0,
+                'window_ms': self.window * 1000,
+                'batch_limit': self.max_batch_size,
+            }
+        result['latency_ms'] = _percentiles(latencies)
+        result['inference_ms'] = _percentiles(inference)
+        return result
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._requests = 0
+            self._batches = 0
+            self._errors = 0
+            self._timeouts = 0
+            self._max_batch = 0
+            self._latencies_ms.clear()
+            self._batch_sizes.clear()
+            self._inference_ms.clear()
+
+
+def _percentiles(values):
+    if not values.size:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(values.max()), 3),
+    }
@@ -0,0 +1,72 @@
+"""
+Django 프로세스 시작 시간을 측정합니다. (지연 로드 vs 시작 시 모델 로드)
+Usage: python manage.py bench_startup [--runs 5] [--engine keras|numpy]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# 자식 프로세스에서 실행할 코드: django.setup()까지의 시간을 재고,
+# eager 모드에서는 예전 settings.py처럼 시작 시 모델을 로드합니다.
+CHILD_SCRIPT = """
+import os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+import django
+django.setup()
+if sys.argv[1] == 'eager':
+    from ai_model.prediction_utils import get_model
+    get_model()
+print(time.perf_counter() - started, int('tensorflow' in sys.modules))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measures Django startup time with lazy AI model loading vs. loading the model at startup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='모드별 반복 횟수 (기본 5)')
+        parser.add_argument('--engine', choices=['keras', 'numpy'], default=None,
+                            help='측정할 추론 엔진 (기본: 현재 AI_INFERENCE_ENGINE 설정)')
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        engine = options['engine'] or settings.AI_INFERENCE_ENGINE
+
+        env = os.environ.copy()
+        env['AI_INFERENCE_ENGINE'] = engine
+        env.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+        self.stdout.write(f'engine={engine}, runs={runs}')
+        results = {}
+        for mode in ('lazy', 'eager'):
+            setup_times = []
+            wall_times = []
+            tf_loaded = False
+            for _ in range(runs):
+                started = time.perf_counter()
+                proc = subprocess.run(
+                    [sys.executable, '-c', CHILD_SCRIPT, mode],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+                )
+                wall_times.append(time.perf_counter() - started)
+                setup_seconds, tf_flag = proc.stdout.strip().splitlines()[-1].split()
+                setup_times.append(float(setup_seconds))
+                tf_loaded = tf_loaded or tf_flag == '1'
+            results[mode] = statistics.median(wall_times)
+            self.stdout.write(
+                f'{mode:>5}: setup median {statistics.median(setup_times):.3f}s '
+                f'(min {min(setup_times):.3f}s), process wall median {results[mode]:.3f}s, '
+                f'tensorflow imported={tf_loaded}'
+            )
+
+        saved = results['eager'] - results['lazy']
+        self.stdout.write(self.style.SUCCESS(
+            f'Lazy loading saves {saved:.3f}s per process start '
+            f'({saved / results["eager"] * 100:.0f}% of eager startup).'
+        ))
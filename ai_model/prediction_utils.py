@@ -1,8 +1,9 @@
-import tensorflow as tf
 import numpy as np
-import pandas as pd
 from django.conf import settings
 import os
+import threading
+
+from .batching import MicroBatcher
 
 # ==========================================================
 # 1. 학습된 AI 모델 로드
@@ -10,21 +11,108 @@ import os
 
 # (3단계에서 생성될) AI 두뇌 파일의 경로를 지정합니다.
 MODEL_PATH = os.path.join(settings.BASE_DIR, 'ai_model', 'saved_models', 'time_recommendation_model.keras')
+# training_script.py가 함께 내보내는 NumPy 추론용 가중치 파일
+NUMPY_WEIGHTS_PATH = os.path.join(settings.BASE_DIR, 'ai_model', 'saved_models', 'time_recommendation_weights.npz')
+
+# 로드된 추론 엔진 (Keras 모델 또는 NumpyTimeRecommender, 로드 전이거나 실패하면 None)
+# 직접 참조하지 말고 get_model()을 사용하세요. (프로세스별 지연 로드)
+model = None
+# model을 로드한 프로세스의 pid (fork 된 자식 프로세스는 다시 로드합니다)
+_model_pid = None
+_model_lock = threading.Lock()
+
+# training_script.py의 컬럼 순서와 정확히 일치해야 합니다.
+FEATURE_COLUMNS = (
+    'age', 'gender', 'height', 'weight', 'goal', 'career',
+    'upper_ratio', 'lower_ratio', 'machine',
+)
+
+
+class NumpyTimeRecommender:
+    """
+    Normalization → Dense(relu) ... → Dense(linear) 구조의 시간 추천 모델을
+    TensorFlow 없이 NumPy 행렬곱만으로 계산하는 추론 엔진입니다.
+    가중치는 training_script.export_time_recommendation_weights()가 만든 .npz에서 읽습니다.
+    """
+
+    # Keras backend.epsilon()과 동일 (분산이 0인 피처의 0 나누기 방지)
+    EPSILON = 1e-7
+
+    ACTIVATIONS = {
+        'relu': lambda x: np.maximum(x, 0.0),
+        'linear': lambda x: x,
+    }
+
+    def __init__(self, mean, variance, layers):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.maximum(np.sqrt(np.asarray(variance, dtype=np.float32)), self.EPSILON)
+        # layers: [(kernel, bias, activation 이름), ...]
+        self.layers = []
+        for kernel, bias, activation in layers:
+            if activation not in self.ACTIVATIONS:
+                raise ValueError(f'지원하지 않는 활성화 함수입니다: {activation}')
+            self.layers.append((
+                np.asarray(kernel, dtype=np.float32),
+                np.asarray(bias, dtype=np.float32),
+                self.ACTIVATIONS[activation],
+            ))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            activations = [str(a) for a in data['activations']]
+            layers = [
+                (data[f'dense_{i}_kernel'], data[f'dense_{i}_bias'], activation)
+                for i, activation in enumerate(activations)
+            ]
+            return cls(data['norm_mean'], data['norm_variance'], layers)
+
+    def predict_on_batch(self, rows):
+        """ (N, 9) 입력에 대한 (N, 1) 예측값을 반환합니다. (Keras 모델과 같은 인터페이스) """
+        x = (np.asarray(rows, dtype=np.float32) - self.mean) / self.scale
+        for kernel, bias, activation in self.layers:
+            x = activation(x @ kernel + bias)
+        return x
+
+
+def _load_keras_model():
+    # TensorFlow는 Keras 엔진을 사용할 때만 import 합니다. (numpy 엔진은 TF 없이 동작)
+    import tensorflow as tf
+    return tf.keras.models.load_model(MODEL_PATH)
+
 
 def load_ai_model():
     """
-    서버가 시작될 때 'settings.py'에 의해 호출될 함수입니다.
-    AI 두뇌(.keras 파일)를 미리 메모리에 로드합니다.
+    AI 두뇌를 현재 프로세스의 메모리에 로드합니다.
+    보통은 직접 호출하지 않고 get_model()이 처음 필요할 때 한 번 호출합니다.
+
+    settings.AI_INFERENCE_ENGINE 값에 따라 엔진을 선택합니다.
+    - 'keras' (기본): .keras 파일을 TensorFlow로 로드
+    - 'numpy': .npz 가중치를 NumPy 엔진으로 로드 (TensorFlow를 import 하지 않음)
     """
-    global model # 전역 변수인 model을 수정할 수 있도록 함
+    global model, _model_pid # 전역 변수인 model을 수정할 수 있도록 함
+
+    # 로드 실패도 이 프로세스에서는 기억해 두어 요청마다 재시도하지 않습니다.
+    _model_pid = os.getpid()
+    model = None
+
+    if not getattr(settings, 'AI_MODEL_ENABLED', True):
+        print("AI 모델이 비활성화되어 있습니다. (AI_MODEL_ENABLED=False)")
+        return None
+
+    engine = getattr(settings, 'AI_INFERENCE_ENGINE', 'keras')
+    path = NUMPY_WEIGHTS_PATH if engine == 'numpy' else MODEL_PATH
     
-    if os.path.exists(MODEL_PATH):
+    if os.path.exists(path):
         try:
             # 학습된 AI 모델 파일을 불러옵니다.
-            model = tf.keras.models.load_model(MODEL_PATH) 
+            if engine == 'numpy':
+                model = NumpyTimeRecommender.load(path)
+            else:
+                model = _load_keras_model()
             print("="*40)
-            print(f"======= AI 추천 모델 로드 성공 =======")
-            print(f"경로: {MODEL_PATH}")
+            print(f"======= AI 추천 모델 로드 성공 ({engine}) =======")
+            print(f"경로: {path}")
             print("="*40)
         except Exception as e:
             print(f"!!! AI 모델 로드 실패: {e}")
@@ -32,8 +120,29 @@ def load_ai_model():
             model = None
     else:
         # 3단계(학습)를 아직 실행하지 않은 경우
-        print(f"!!! AI 모델 파일이 없습니다. (경로: {MODEL_PATH})")
+        print(f"!!! AI 모델 파일이 없습니다. (경로: {path})")
         print("!!! 'ai_model/training_script.py'를 실행하여 모델을 생성하세요.")
+    return model
+
+
+def get_model():
+    """
+    현재 프로세스의 AI 모델을 반환합니다. (없으면 처음 호출될 때 로드)
+
+    - settings import 시점이 아니라 실제로 추천이 필요할 때 로드되므로
+      manage.py 명령, 마이그레이션, Celery beat 등은 TensorFlow를 불러오지 않습니다.
+    - pid가 바뀌면(gunicorn/celery fork) 부모의 모델을 재사용하지 않고 다시 로드합니다.
+    """
+    if _model_pid != os.getpid():
+        with _model_lock:
+            if _model_pid != os.getpid():
+                load_ai_model()
+    return model
+
+
+def is_model_loaded():
+    """ 로드를 유발하지 않고 현재 프로세스에 모델이 올라와 있는지 확인합니다. """
+    return model is not None and _model_pid == os.getpid()
 
 
 # ==========================================================
@@ -59,8 +168,70 @@ def _map_career(career_str):
     else: # 'BEGINNER' 또는 None
         return 0 # 0: 초급
 
+def build_feature_row(user_profile, machine_id, ratios):
+    """
+    Django 데이터를 FEATURE_COLUMNS 순서의 숫자 리스트(모델 입력 1행)로 변환합니다.
+    """
+    return [
+        user_profile.age or 30, # 정보가 없으면 기본값 30세
+        _map_gender(user_profile.gender),
+        user_profile.height_cm or 170, # 기본값 170cm
+        user_profile.weight_kg or 70, # 기본값 70kg
+        _map_goal(user_profile.fitness_goal),
+        _map_career(user_profile.experience_level),
+        ratios['upper_ratio'],
+        ratios['lower_ratio'],
+        machine_id or 0, # 정보가 없으면 기본값 0 (벤치프레스)
+    ]
+
+
+def predict_minutes_batch(rows):
+    """
+    (N, 9) 입력을 한 번의 forward pass로 예측해 길이 N의 배열(분)을 반환합니다.
+    model.predict()는 호출마다 데이터셋을 새로 만들기 때문에 predict_on_batch를 사용합니다.
+    (Keras 모델과 NumpyTimeRecommender 모두 predict_on_batch를 제공합니다)
+    """
+    current = get_model()
+    if current is None:
+        raise RuntimeError('AI 모델이 로드되지 않았습니다.')
+    batch = np.asarray(rows, dtype=np.float32).reshape(-1, len(FEATURE_COLUMNS))
+    return np.asarray(current.predict_on_batch(batch)).reshape(-1)
+
+
+# ==========================================================
+# 3. 마이크로 배칭 (동시 요청을 모아서 한 번에 예측)
+# ==========================================================
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """ 프로세스 전역 MicroBatcher를 반환합니다. (설정값은 최초 생성 시 반영) """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    predict_minutes_batch,
+                    window_ms=getattr(settings, 'AI_BATCH_WINDOW_MS', 3.0),
+                    max_batch_size=getattr(settings, 'AI_BATCH_MAX_SIZE', 32),
+                )
+    return _batcher
+
+
+def get_inference_stats():
+    """ 배칭 엔진의 지연 시간/배치 크기 지표를 반환합니다. """
+    return {
+        'model_loaded': is_model_loaded(),
+        'engine': getattr(settings, 'AI_INFERENCE_ENGINE', 'keras'),
+        'batching_enabled': getattr(settings, 'AI_BATCHING_ENABLED', False),
+        'batcher': get_batcher().stats(),
+    }
+
+
 # ==========================================================
-# 3. 백엔드(views.py)에서 호출할 메인 예측 함수
+# 4. 백엔드(views.py)에서 호출할 메인 예측 함수
 # ==========================================================
 
 def get_ai_recommendation(user_profile, machine_id, ratios):
@@ -69,38 +240,28 @@ def get_ai_recommendation(user_profile, machine_id, ratios):
     - user_profile: Django의 UserProfile 모델 인스턴스
     - machine_id: Equipment 모델의 ai_model_id (숫자)
     - ratios: {'upper_ratio': 0.x, 'lower_ratio': 0.y}
+
+    AI_BATCHING_ENABLED가 켜져 있으면 동시에 들어온 요청들과 묶여 한 번에 예측됩니다.
     """
-    global model
-    if model is None:
+    # 첫 호출이면 요청 스레드에서 로드합니다. (배치 대기 시간 안에 로드가 끝나지 않을 수 있으므로)
+    if get_model() is None:
         # 모델 로드에 실패한 경우, AI 추천 대신 기본 시간(15분)을 반환
         print("AI 모델이 로드되지 않아 기본 시간을 반환합니다.")
         return 15  
 
     try:
-        # 1. Django 데이터를 AI 모델 입력 형태(DataFrame)로 변환
-        # training_script.py의 컬럼 순서와 정확히 일치해야 함:
-        # 'age', 'gender', 'height', 'weight', 'goal', 'career', 
-        # 'upper_ratio', 'lower_ratio', 'machine'
-        
-        input_data = {
-            'age': user_profile.age or 30, # 정보가 없으면 기본값 30세
-            'gender': _map_gender(user_profile.gender),
-            'height': user_profile.height_cm or 170, # 기본값 170cm
-            'weight': user_profile.weight_kg or 70, # 기본값 70kg
-            'goal': _map_goal(user_profile.fitness_goal),
-            'career': _map_career(user_profile.experience_level),
-            'upper_ratio': ratios['upper_ratio'],
-            'lower_ratio': ratios['lower_ratio'],
-            'machine': machine_id or 0 # 정보가 없으면 기본값 0 (벤치프레스)
-        }
-        
-        # 2. DataFrame 생성 및 예측
-        # AI 모델은 2D 배열 형태의 입력을 기대하므로 [input_data] 리스트로 감쌉니다.
-        model_input_df = pd.DataFrame([input_data])
-        predicted_time = model.predict(model_input_df)
-        
-        # 3. 예측 결과(2D 배열)를 숫자 값으로 추출 및 범위 제한
-        predicted_minutes = float(predicted_time[0][0])
+        # 1. Django 데이터를 AI 모델 입력 형태(1행)로 변환
+        row = build_feature_row(user_profile, machine_id, ratios)
+
+        # 2. 예측 (배칭 엔진 또는 단건 예측)
+        if getattr(settings, 'AI_BATCHING_ENABLED', False):
+            predicted_minutes = get_batcher().submit(
+                row, timeout=getattr(settings, 'AI_BATCH_TIMEOUT_SECONDS', 2.0)
+            )
+        else:
+            predicted_minutes = float(predict_minutes_batch([row])[0])
+
+        # 3. 예측 결과를 범위 제한
         final_time = np.clip(predicted_minutes, 5, 60) # 5분~60분 사이로 보정
         
         print(f"AI 추천 시간: {final_time:.1f} 분")
@@ -108,4 +269,4 @@ def get_ai_recommendation(user_profile, machine_id, ratios):
 
     except Exception as e:
         print(f"!!! AI 예측 중 오류 발생: {e}")
-        return 15 # 예측 중 오류 발생 시 기본값 15분 반환
\ No newline at end of file
+        return 15 # 예측 중 오류 발생 시 기본값 15분 반환
@@ -0,0 +1,171 @@
+import importlib.util
+import os
+import threading
+import unittest
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from . import prediction_utils
+from .batching import MicroBatcher
+from .prediction_utils import MODEL_PATH, NUMPY_WEIGHTS_PATH, NumpyTimeRecommender
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_requests_are_coalesced_into_one_batch(self):
+        calls = []
+
+        def predict(rows):
+            calls.append(rows.shape[0])
+            return rows.sum(axis=1)
+
+        batcher = MicroBatcher(predict, window_ms=200, max_batch_size=8)
+        results = [None] * 8
+        barrier = threading.Barrier(8)
+
+        def worker(i):
+            barrier.wait()
+            results[i] = batcher.submit([i, 1.0], timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 각 요청은 자기 입력에 대한 결과를 돌려받아야 함
+        self.assertEqual(results, [i + 1.0 for i in range(8)])
+        self.assertLess(len(calls), 8)
+        stats = batcher.stats()
+        self.assertEqual(stats['requests'], 8)
+        self.assertEqual(stats['batches'], len(calls))
+        self.assertLessEqual(stats['max_batch_size'], 8)
+
+    def test_prediction_error_is_propagated_to_callers(self):
+        def predict(rows):
+            raise ValueError('boom')
+
+        batcher = MicroBatcher(predict, window_ms=1, max_batch_size=4)
+        with self.assertRaises(ValueError):
+            batcher.submit([1.0], timeout=5)
+        self.assertEqual(batcher.stats()['errors'], 1)
+
+    def test_short_prediction_fails_every_caller(self):
+        batcher = MicroBatcher(lambda rows: np.zeros(rows.shape[0] - 1), window_ms=50, max_batch_size=2)
+        errors = []
+
+        def call(value):
+            try:
+                batcher.submit([value], timeout=5)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call, args=(float(i),)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 2)
+        stats = batcher.stats()
+        self.assertEqual((stats['requests'], stats['errors']), (2, 2))
+
+    def test_timed_out_request_is_cancelled_and_skipped(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def predict(rows):
+            calls.append(rows[:, 0].tolist())
+            started.set()
+            release.wait(5)
+            return rows[:, 0]
+
+        batcher = MicroBatcher(predict, window_ms=1, max_batch_size=1)
+        first = batcher.submit_async([1.0])
+        started.wait(5)
+        # 워커가 첫 배치를 처리하는 동안 기다리다 timeout
+        with self.assertRaises(FutureTimeoutError):
+            batcher.submit([2.0], timeout=0.05)
+        release.set()
+
+        self.assertEqual(first.result(timeout=5), 1.0)
+        self.assertEqual(batcher.submit([3.0], timeout=5), 3.0)
+        # 취소된 요청은 예측하지 않음
+        self.assertEqual(calls, [[1.0], [3.0]])
+        self.assertEqual(batcher.stats()['timeouts'], 1)
+
+    def test_single_request_returns_float(self):
+        batcher = MicroBatcher(lambda rows: np.full(rows.shape[0], 12.5), window_ms=1)
+        self.assertEqual(batcher.submit([0.0, 0.0], timeout=5), 12.5)
+
+
+class NumpyEngineTests(SimpleTestCase):
+    def _sample_inputs(self, n=256):
+        # training_script.generate_mock_recommendation_data와 같은 범위의 입력
+        rng = np.random.default_rng(0)
+        return np.column_stack([
+            rng.integers(18, 65, n),
+            rng.integers(0, 2, n),
+            rng.integers(150, 190, n),
+            rng.integers(50, 100, n),
+            rng.integers(0, 2, n),
+            rng.integers(0, 3, n),
+            rng.random(n),
+            rng.random(n),
+            rng.integers(0, 5, n),
+        ]).astype(np.float32)
+
+    def test_forward_pass_matches_manual_computation(self):
+        engine = NumpyTimeRecommender(
+            mean=[1.0, 2.0],
+            variance=[4.0, 0.0],
+            layers=[
+                (np.array([[1.0], [1.0]]), np.array([0.5]), 'relu'),
+                (np.array([[2.0]]), np.array([-1.0]), 'linear'),
+            ],
+        )
+        # 정규화: (3-1)/2 = 1, (2-2)/eps = 0 → relu(1 + 0 + 0.5) = 1.5 → 1.5*2 - 1 = 2
+        np.testing.assert_allclose(engine.predict_on_batch([[3.0, 2.0]]), [[2.0]])
+
+    @unittest.skipUnless(os.path.exists(NUMPY_WEIGHTS_PATH), 'NumPy 가중치 파일이 없습니다.')
+    @unittest.skipUnless(importlib.util.find_spec('tensorflow'), 'TensorFlow가 설치되어 있지 않습니다.')
+    def test_parity_with_keras_model(self):
+        import tensorflow as tf
+
+        keras_model = tf.keras.models.load_model(MODEL_PATH)
+        engine = NumpyTimeRecommender.load(NUMPY_WEIGHTS_PATH)
+        x = self._sample_inputs()
+
+        expected = keras_model.predict_on_batch(x)
+        actual = engine.predict_on_batch(x)
+        self.assertEqual(actual.shape, expected.shape)
+        np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-3)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self._saved = (prediction_utils.model, prediction_utils._model_pid)
+        prediction_utils.model = None
+        prediction_utils._model_pid = None
+
+    def tearDown(self):
+        prediction_utils.model, prediction_utils._model_pid = self._saved
+
+    @override_settings(AI_MODEL_ENABLED=False)
+    def test_disabled_model_falls_back_to_default_time(self):
+        self.assertIsNone(prediction_utils.get_model())
+        self.assertFalse(prediction_utils.is_model_loaded())
+
+    @unittest.skipUnless(os.path.exists(NUMPY_WEIGHTS_PATH), 'NumPy 가중치 파일이 없습니다.')
+    @override_settings(AI_INFERENCE_ENGINE='numpy')
+    def test_model_is_loaded_once_per_process(self):
+        self.assertFalse(prediction_utils.is_model_loaded())
+        first = prediction_utils.get_model()
+        self.assertIsInstance(first, NumpyTimeRecommender)
+        self.assertIs(prediction_utils.get_model(), first)
+
+        # fork 된 자식 프로세스처럼 pid가 다르면 부모의 모델을 재사용하지 않고 다시 로드
+        prediction_utils._model_pid = os.getpid() + 1
+        self.assertIsNot(prediction_utils.get_model(), first)
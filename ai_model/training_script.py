@@ -141,6 +141,29 @@ def build_time_recommendation_model(normalizer):
     model.summary()
     return model
 
+def export_time_recommendation_weights(model, save_path):
+    """
+    시간 추천 모델의 정규화 통계(mean/variance)와 Dense 가중치를 .npz 파일로 내보냅니다.
+    prediction_utils의 NumPy 추론 엔진이 TensorFlow 없이 이 파일만으로 예측합니다.
+    - model: 학습된 시간 추천 Keras 모델 (Normalization → Dense... 구조)
+    - save_path: 저장할 .npz 경로
+    """
+    normalizer = next(layer for layer in model.layers if isinstance(layer, Normalization))
+    dense_layers = [layer for layer in model.layers if isinstance(layer, Dense)]
+
+    arrays = {
+        'norm_mean': np.asarray(normalizer.mean, dtype=np.float32).reshape(-1),
+        'norm_variance': np.asarray(normalizer.variance, dtype=np.float32).reshape(-1),
+        'activations': np.array([layer.get_config()['activation'] for layer in dense_layers]),
+    }
+    for i, layer in enumerate(dense_layers):
+        kernel, bias = layer.get_weights()
+        arrays[f'dense_{i}_kernel'] = kernel.astype(np.float32)
+        arrays[f'dense_{i}_bias'] = bias.astype(np.float32)
+
+    np.savez_compressed(save_path, **arrays)
+    print(f"NumPy 추론용 가중치가 '{save_path}' 파일로 저장되었습니다.")
+
 # ==============================================================================
 # PART 4: 메인 실행 흐름 (Main Workflow)
 # ==============================================================================
@@ -224,6 +247,9 @@ def main():
     model2.save(model2_save_path)
     print(f"모델 2가 '{model2_save_path}' 파일로 저장되었습니다.")
 
+    # TensorFlow 없이 서빙할 수 있도록 가중치를 .npz로도 내보냅니다.
+    export_time_recommendation_weights(model2, os.path.join(SAVE_DIR, "time_recommendation_weights.npz"))
+
 
     # --- 통합 예측 시뮬레이션 ---
     print("\n\n" + "="*60)
@@ -273,5 +299,17 @@ def main():
     print("-"*30)
 
 
+def export_saved_model():
+    """ 이미 저장된 .keras 모델에서 .npz 가중치만 다시 내보냅니다. (재학습 없음) """
+    SAVE_DIR = os.path.join('ai_model', 'saved_models')
+    model2 = tf.keras.models.load_model(os.path.join(SAVE_DIR, "time_recommendation_model.keras"))
+    export_time_recommendation_weights(model2, os.path.join(SAVE_DIR, "time_recommendation_weights.npz"))
+
+
 if __name__ == '__main__':
-    main()
+    import sys
+    # 사용법: python ai_model/training_script.py --export-npz (학습 없이 가중치만 내보내기)
+    if '--export-npz' in sys.argv:
+        export_saved_model()
+    else:
+        main()
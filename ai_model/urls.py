@@ -0,0 +1,8 @@
+# ai_model/urls.py
+
+from django.urls import path
+from .views import InferenceMetricsView
+
+urlpatterns = [
+    path('metrics/', InferenceMetricsView.as_view(), name='ai-metrics'),
+]
@@ -0,0 +1,23 @@
+# ai_model/views.py
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+
+from backend.clients import get_client_stats
+from backend.query_budget import query_budget
+
+from .prediction_utils import get_inference_stats
+
+
+@query_budget(get=1)
+class InferenceMetricsView(APIView):
+    """
+    운영자(staff) 전용: AI 추천 배칭 엔진의 요청 수, 배치 크기, 지연 시간(ms) 지표와
+    외부 API 클라이언트(OpenAI, AWS)의 연결 재사용률/지연 시간(outbound)을 반환합니다.
+    지표는 프로세스(gunicorn 워커) 단위로 집계됩니다.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({**get_inference_stats(), 'outbound': get_client_stats()})
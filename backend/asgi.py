@@ -3,6 +3,14 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The real-time event stream (/api/realtime/events/, Server-Sent Events) is an
+async view and must be served by an ASGI server, e.g.:
+
+    uvicorn backend.asgi:application --workers 2
+
+Route /api/realtime/ to this server and keep the REST API on gunicorn (WSGI).
+With more than one process set REALTIME_BROKER=realtime.broker.RedisBroker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,251 @@
+# backend/clients.py
+"""
+외부 API 클라이언트 레지스트리 (프로세스별 재사용)
+
+요청/태스크마다 boto3.client(...)나 OpenAI(...)를 새로 만들면 자격 증명 조회, 엔드포인트 설정,
+TLS 연결을 매번 다시 하게 됩니다. 여기서는 프로세스마다 클라이언트를 한 번만 만들어
+gunicorn 워커의 요청들과 Celery 태스크가 같은 연결 풀을 함께 사용합니다.
+
+- 풀 크기 / 연결·읽기 타임아웃 / 재시도 횟수: OUTBOUND_POOL_SIZE, OUTBOUND_CONNECT_TIMEOUT_SECONDS,
+  OUTBOUND_READ_TIMEOUT_SECONDS, OUTBOUND_MAX_RETRIES
+  (재시도 간격은 각 SDK의 지수 백오프: botocore 'standard' 모드, openai 클라이언트 기본 백오프)
+- 엔드포인트 변경(로컬 스텁 서버/프록시): OPENAI_BASE_URL, AWS_ENDPOINT_URL
+- 지표: 클라이언트별 HTTP 요청 수, 오류 수, 새 연결 수(→ 연결 재사용률), 외부 호출 지연 시간(ms).
+  AWS의 새 연결 수는 urllib3 풀 내부 값을 읽으므로 읽을 수 없으면 None(알 수 없음)으로 표시됩니다.
+  get_client_stats()로 조회하며 프로세스 단위로 집계됩니다. (GET /api/ai/metrics/ 의 outbound)
+
+fork 이후(gunicorn/Celery prefork)에는 부모 프로세스의 소켓을 공유하지 않도록 자식 프로세스에서 새로 만듭니다.
+"""
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_stats = {}
+_owner_pid = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class ClientStats:
+    """ 한 클라이언트의 외부 호출 지표. 지연 시간 분위수는 최근 window건 기준입니다. """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=window)
+        # urllib3 풀처럼 새 연결 수를 요청별로 알 수 없는 클라이언트는 조회 시점에 세는 함수를 둡니다.
+        self.count_connections = None
+
+    def record(self, elapsed_ms, new_connection=False, error=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += error
+            self.new_connections += new_connection
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.recent.append(elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self.recent)
+            requests, errors, new_connections = self.requests, self.errors, self.new_connections
+            total_ms, max_ms = self.total_ms, self.max_ms
+        if self.count_connections is not None:
+            try:
+                new_connections = self.count_connections()
+            except Exception:
+                new_connections = None
+        return {
+            'requests': requests,
+            'errors': errors,
+            'new_connections': new_connections,
+            'connection_reuse_rate': (
+                round(1 - new_connections / requests, 4) if requests and new_connections is not None else None
+            ),
+            'latency_ms': {
+                'mean': round(total_ms / requests, 1) if requests else None,
+                'p50': round(statistics.median(recent), 1) if recent else None,
+                'p95': round(recent[min(int(len(recent) * 0.95), len(recent) - 1)], 1) if recent else None,
+                'max': round(max_ms, 1),
+            },
+        }
+
+
+def _get(key, build):
+    """ key의 클라이언트를 반환합니다. 없거나 fork 이후 처음 호출이면 build(stats)로 만듭니다. """
+    global _owner_pid
+    if _owner_pid != os.getpid() or key not in _clients:
+        with _lock:
+            if _owner_pid != os.getpid():
+                # fork 전에 만든 클라이언트는 소켓을 공유하므로 닫지 않고 버립니다.
+                _clients.clear()
+                _stats.clear()
+                _owner_pid = os.getpid()
+            if key not in _clients:
+                stats = _stats.setdefault(key, ClientStats())
+                _clients[key] = build(stats)
+    return _clients[key]
+
+
+def _timeouts():
+    return (
+        getattr(settings, 'OUTBOUND_CONNECT_TIMEOUT_SECONDS', 3.0),
+        getattr(settings, 'OUTBOUND_READ_TIMEOUT_SECONDS', 60.0),
+    )
+
+
+# ==========================================================
+# OpenAI (httpx)
+# ==========================================================
+
+def _build_openai(stats):
+    import httpx
+    from openai import OpenAI
+
+    class InstrumentedTransport(httpx.HTTPTransport):
+        """ 요청마다 지연 시간과, 새 TCP 연결을 맺었는지(httpcore trace) 기록합니다. """
+
+        def handle_request(self, request):
+            connected = []
+            request.extensions['trace'] = lambda event, info: (
+                connected.append(True) if event == 'connection.connect_tcp.complete' else None
+            )
+            started = time.perf_counter()
+            try:
+                response = super().handle_request(request)
+            except Exception:
+                stats.record((time.perf_counter() - started) * 1000, bool(connected), error=True)
+                raise
+            stats.record((time.perf_counter() - started) * 1000, bool(connected), error=response.status_code >= 500)
+            return response
+
+    pool_size = getattr(settings, 'OUTBOUND_POOL_SIZE', 10)
+    connect, read = _timeouts()
+    timeout = httpx.Timeout(read, connect=connect)
+    http_client = httpx.Client(
+        transport=InstrumentedTransport(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        ),
+        timeout=timeout,
+    )
+    return OpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=getattr(settings, 'OPENAI_BASE_URL', None) or None,
+        timeout=timeout,
+        max_retries=getattr(settings, 'OUTBOUND_MAX_RETRIES', 2),
+        http_client=http_client,
+    )
+
+
+def get_openai_client():
+    """ 프로세스 공용 OpenAI 클라이언트 """
+    return _get('openai', _build_openai)
+
+
+# ==========================================================
+# AWS (boto3 / urllib3)
+# ==========================================================
+
+def _urllib3_connection_counter(client):
+    """
+    클라이언트의 urllib3 풀들이 지금까지 만든 연결 수를 세는 함수.
+    botocore/urllib3의 공개되지 않은 속성을 읽으므로, 라이브러리가 바뀌어 읽을 수 없으면
+    예외 없이 None(알 수 없음)을 돌려줍니다. (connection_reuse_rate도 None)
+    """
+    def count():
+        try:
+            session = getattr(getattr(client, '_endpoint', None), 'http_session', None)
+            managers = [getattr(session, '_manager', None), *getattr(session, '_proxy_managers', {}).values()]
+            total = 0
+            for manager in managers:
+                pools = getattr(manager, 'pools', None)
+                if pools is None:
+                    return None
+                for key in list(pools.keys()):
+                    connections = getattr(pools[key], 'num_connections', None)
+                    if not isinstance(connections, int):
+                        return None
+                    total += connections
+            return total
+        except Exception:
+            logger.debug('urllib3 connection count is unavailable', exc_info=True)
+            return None
+    return count
+
+
+def _build_aws(service_name, region_name):
+    def build(stats):
+        import boto3
+        from botocore.config import Config
+
+        connect, read = _timeouts()
+        client = boto3.client(
+            service_name,
+            region_name=region_name,
+            endpoint_url=getattr(settings, 'AWS_ENDPOINT_URL', None) or None,
+            config=Config(
+                max_pool_connections=getattr(settings, 'OUTBOUND_POOL_SIZE', 10),
+                connect_timeout=connect,
+                read_timeout=read,
+                # 'standard' 모드: 지수 백오프(+지터)로 재시도. total_max_attempts는 첫 시도를 포함합니다.
+                retries={'total_max_attempts': getattr(settings, 'OUTBOUND_MAX_RETRIES', 2) + 1, 'mode': 'standard'},
+            ),
+        )
+
+        def before_send(**kwargs):
+            _local.aws_started = time.perf_counter()
+
+        def response_received(exception=None, response_dict=None, **kwargs):
+            started = getattr(_local, 'aws_started', None)
+            if started is None:
+                return
+            _local.aws_started = None
+            status_code = (response_dict or {}).get('status_code', 0)
+            stats.record((time.perf_counter() - started) * 1000, error=exception is not None or status_code >= 500)
+
+        client.meta.events.register('before-send', before_send)
+        client.meta.events.register('response-received', response_received)
+        stats.count_connections = _urllib3_connection_counter(client)
+        return client
+    return build
+
+
+def get_aws_client(service_name, region_name=None):
+    """ 프로세스 공용 boto3 클라이언트 (서비스/리전별) """
+    region_name = region_name or getattr(settings, 'AWS_REGION', None)
+    return _get(f'aws:{service_name}:{region_name or ""}', _build_aws(service_name, region_name))
+
+
+# ==========================================================
+# 지표 / 초기화
+# ==========================================================
+
+def get_client_stats():
+    """ 현재 프로세스에서 만든 클라이언트별 외부 호출 지표 """
+    with _lock:
+        items = list(_stats.items()) if _owner_pid == os.getpid() else []
+    return {key: stats.snapshot() for key, stats in items}
+
+
+def reset_clients():
+    """ 모든 클라이언트를 닫고 지표를 지웁니다. (설정을 바꾼 테스트 등) """
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _clients.clear()
+        _stats.clear()
@@ -0,0 +1,63 @@
+# backend/middleware.py
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .query_budget import QueryBudgetExceeded, get_query_budget
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCountMiddleware:
+    """
+    요청마다 실행된 SQL 수와 총 실행 시간을 기록하는 개발/테스트용 미들웨어
+
+    - 응답 헤더: X-Query-Count, X-Query-Time-Ms (예산이 있으면 X-Query-Budget)
+    - 예산(backend.query_budget)을 넘으면 경고 로그를 남기고,
+      QUERY_BUDGET_STRICT=True이면 QueryBudgetExceeded를 발생시킵니다. (테스트에서 실패 처리)
+
+    QUERY_BUDGET_ENABLED=False(운영 기본값)이면 로드되지 않습니다.
+    스트리밍 응답은 뷰가 반환될 때까지의 쿼리만 셉니다.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = {'count': 0, 'seconds': 0.0}
+
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['count'] += 1
+                stats['seconds'] += time.perf_counter() - started
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record))
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(stats['count'])
+        response['X-Query-Time-Ms'] = f"{stats['seconds'] * 1000:.2f}"
+
+        budget = get_query_budget(request)
+        if budget is not None:
+            response['X-Query-Budget'] = str(budget)
+            if stats['count'] > budget:
+                message = (
+                    f"{request.method} {request.path} ran {stats['count']} queries "
+                    f"({stats['seconds'] * 1000:.1f}ms), budget is {budget}"
+                )
+                if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning('query budget exceeded: %s', message)
+        return response
@@ -0,0 +1,31 @@
+# backend/pagination.py
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class StandardCursorPagination(CursorPagination):
+    """
+    ?cursor=...&page_size=100 형태의 커서 페이지네이션 (REST_FRAMEWORK['DEFAULT_PAGINATION_CLASS'])
+
+    OFFSET 없이 정렬 키 기준으로 다음 페이지를 찾으므로 테이블이 커져도 페이지 조회 비용이 일정하고,
+    COUNT 쿼리도 실행하지 않습니다. 정렬은 뷰의 cursor_ordering (예: ('-start_time', '-id'))을 사용합니다.
+
+    기본 page_size는 settings.REST_FRAMEWORK['PAGE_SIZE'], 최대값은 API_MAX_PAGE_SIZE이며
+    뷰에 page_size / max_page_size 속성을 두면 그 뷰만 다르게 제한할 수 있습니다.
+    """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 50
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = getattr(view, 'page_size', self.page_size)
+        self.max_page_size = getattr(view, 'max_page_size', self.max_page_size)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,64 @@
+# backend/query_budget.py
+"""
+엔드포인트별 쿼리 수 예산(query budget) 선언
+
+1. 뷰에 데코레이터로 선언
+    @query_budget(list=4, retrieve=3)        # ViewSet: 액션별
+    class ReservationViewSet(...): ...
+
+    @query_budget(post=12)                   # APIView: HTTP 메서드별
+    class StartSessionView(APIView): ...
+
+    @query_budget(3)                         # 모든 액션/메서드 공통
+    @api_view(['GET'])
+    def get_current_user(request): ...
+
+2. 직접 만들지 않은 뷰(로그인 등)는 settings.QUERY_BUDGETS 에 URL 이름으로 등록
+    QUERY_BUDGETS = {'token_obtain_pair': 5}
+
+예산에는 인증(JWT 사용자 조회)과 savepoint 쿼리도 포함됩니다.
+backend.middleware.QueryCountMiddleware가 요청마다 쿼리 수를 세어 예산과 비교합니다.
+"""
+from django.conf import settings
+
+
+class QueryBudgetExceeded(AssertionError):
+    """ QUERY_BUDGET_STRICT=True일 때 예산을 넘은 요청에서 발생합니다. (테스트/개발용) """
+
+
+def query_budget(default=None, **per_action):
+    """ 뷰 클래스/함수에 쿼리 예산을 붙입니다. 키는 ViewSet 액션 이름 또는 소문자 HTTP 메서드 """
+    def decorator(view):
+        view.query_budget = {'*': default, **per_action}
+        return view
+    return decorator
+
+
+def _lookup(budgets, key):
+    if not budgets:
+        return None
+    budget = budgets.get(key)
+    return budget if budget is not None else budgets.get('*')
+
+
+def get_query_budget(request):
+    """ 요청이 매칭된 뷰의 쿼리 예산을 반환합니다. (없으면 settings.QUERY_BUDGET_DEFAULT) """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+
+    func = match.func
+    cls = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    # ViewSet은 HTTP 메서드 → 액션 이름(list/retrieve/...) 매핑을 가지고 있음
+    actions = getattr(func, 'actions', None) or {}
+    key = actions.get(request.method.lower(), request.method.lower())
+
+    for budgets in (getattr(func, 'query_budget', None), getattr(cls, 'query_budget', None)):
+        budget = _lookup(budgets, key)
+        if budget is not None:
+            return budget
+
+    registry = getattr(settings, 'QUERY_BUDGETS', {})
+    if match.url_name in registry:
+        return registry[match.url_name]
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
@@ -54,9 +54,12 @@ INSTALLED_APPS = [
     'reports.apps.ReportsConfig',
     'routines.apps.RoutinesConfig',
     'ai_model', # ai_model 폴더
+    'realtime.apps.RealtimeConfig',
 ]
 
 MIDDLEWARE = [
+    # 요청별 SQL 수/시간 기록 및 쿼리 예산 검사 (QUERY_BUDGET_ENABLED일 때만 동작)
+    'backend.middleware.QueryCountMiddleware',
     'corsheaders.middleware.CorsMiddleware', # 수정 FE
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -67,6 +70,18 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# 쿼리 예산(backend.query_budget): 개발 환경(DEBUG)에서는 기본으로 켜집니다.
+QUERY_BUDGET_ENABLED = env.bool('QUERY_BUDGET_ENABLED', default=DEBUG)
+# True면 예산을 넘은 요청에서 예외를 발생시킵니다. (테스트용, 기본은 경고 로그만)
+QUERY_BUDGET_STRICT = env.bool('QUERY_BUDGET_STRICT', default=False)
+# 예산을 선언하지 않은 엔드포인트에 적용할 기본 예산 (None이면 검사 안 함)
+QUERY_BUDGET_DEFAULT = env.int('QUERY_BUDGET_DEFAULT', default=None)
+# 직접 데코레이터를 붙일 수 없는 뷰의 예산 (URL 이름 → 쿼리 수)
+QUERY_BUDGETS = {
+    'api-root': 1,
+    'token_refresh': 1,
+}
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -103,6 +118,13 @@ DATABASES = {
     'default': env.db(),
 }
 
+# 캐시 (헬스장 실시간 현황 스냅샷 등). 여러 프로세스가 공유하려면 CACHE_URL=redis://host:6379/1
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+# 헬스장 현황 스냅샷 보관 시간(초). 스냅샷은 버전별로 저장되므로 변경 시 따로 지울 필요가 없습니다.
+GYM_LIVE_SNAPSHOT_TTL_SECONDS = env.int('GYM_LIVE_SNAPSHOT_TTL_SECONDS', default=300)
+
 
 # Password validation
 # (기존 내용 그대로)
@@ -144,18 +166,38 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    # 모든 목록 API는 커서 페이지네이션 (?cursor=...&page_size=...)
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.StandardCursorPagination',
+    'PAGE_SIZE': env.int('API_PAGE_SIZE', default=50),
 }
+# ?page_size= 로 요청할 수 있는 최대값 (뷰의 max_page_size가 있으면 그 값)
+API_MAX_PAGE_SIZE = env.int('API_MAX_PAGE_SIZE', default=200)
+# 운영자 CSV/NDJSON 내보내기: DB에서 한 번에 읽고 응답으로 흘려보내는 행 수
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
 
 # ==========================================================
 # 6. AI 모델 로드 설정 (파일 맨 아래)
 # (이전에 추가했던 AI 모델 로더도 여기에 포함되어야 합니다)
 # ==========================================================
-try:
-    from ai_model.prediction_utils import load_ai_model
-    load_ai_model()
-except ImportError:
-    print("AI 모델 유틸리티를 로드하는 중 오류 발생 (무시하고 진행)")
+# 모델은 settings import 시점이 아니라 처음 추천이 필요할 때 프로세스별로 로드됩니다.
+# (ai_model.prediction_utils.get_model 참고) manage.py/마이그레이션/Celery beat는 로드하지 않습니다.
+
+# AI 추론 엔진 선택: 'keras'(TensorFlow) 또는 'numpy'(.npz 가중치, TensorFlow 불필요)
+AI_INFERENCE_ENGINE = env('AI_INFERENCE_ENGINE', default='keras')
+# False면 모델을 전혀 로드하지 않고 기본 시간(15분)을 사용합니다.
+AI_MODEL_ENABLED = env.bool('AI_MODEL_ENABLED', default=True)
+# True면 WSGI 워커가 (fork 이후) 시작될 때 미리 로드해 첫 요청의 지연을 없앱니다.
+AI_MODEL_WARMUP = env.bool('AI_MODEL_WARMUP', default=True)
+
+# AI 추천 마이크로 배칭: 동시에 들어온 추천 요청을 짧은 창(ms) 동안 모아 한 번에 예측합니다.
+# 한 프로세스 안에 동시 요청이 있어야 묶이므로 스레드 워커(gunicorn --worker-class gthread --threads N)에서만 켜세요.
+# Procfile의 기본 sync 워커는 요청을 하나씩 처리하므로 배치 창만큼 지연만 늘어납니다.
+AI_BATCHING_ENABLED = env.bool('AI_BATCHING_ENABLED', default=False)
+AI_BATCH_WINDOW_MS = env.float('AI_BATCH_WINDOW_MS', default=3.0)
+AI_BATCH_MAX_SIZE = env.int('AI_BATCH_MAX_SIZE', default=32)
+# 배치 결과를 기다리는 최대 시간(초). 초과 시 기본 시간(15분)으로 대체됩니다.
+AI_BATCH_TIMEOUT_SECONDS = env.float('AI_BATCH_TIMEOUT_SECONDS', default=2.0)
 
 # ==========================================================
 # Celery 설정
@@ -164,15 +206,120 @@ except ImportError:
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default=CELERY_BROKER_URL)
 
-# Beat 스케줄: expire task를 1분마다 실행하여 NOTIFIED 예약 만료 처리를 수행합니다.
+# NOTIFIED 예약의 유효 시간(분). 데모를 위해 기본 0.25분(15초)
+RESERVATION_NOTIFY_TIMEOUT_MINUTES = env.float('RESERVATION_NOTIFY_TIMEOUT_MINUTES', default=0.25)
+# True면 예약이 NOTIFIED가 될 때 notified_at + 유효 시간에 정확히 만료 태스크를 예약합니다. (Celery ETA)
+RESERVATION_EXPIRY_SCHEDULING = env.bool('RESERVATION_EXPIRY_SCHEDULING', default=True)
+
+# Beat 스케줄: 예약별 만료 태스크가 유실된 경우를 대비한 안전망으로 5분마다 만료 처리를 수행합니다.
 from datetime import timedelta
 
 CELERY_BEAT_SCHEDULE = {
-    'expire-reservations-every-minute': {
+    'expire-reservations-sweep-every-5-minutes': {
         'task': 'workouts.tasks.expire_notified_reservations',
-        'schedule': 60.0,  # seconds
+        'schedule': 300.0,  # seconds
+        'args': (),
+    },
+    # 대기열 엔진(Redis)과 Reservation 테이블의 어긋남을 주기적으로 바로잡습니다.
+    'reconcile-queue-engine-every-5-minutes': {
+        'task': 'workouts.tasks.reconcile_queue_engine',
+        'schedule': 300.0,  # seconds
+        'args': (),
+    },
+    # 운영자 분석용 기구 이용률 롤업 (최근 버킷을 다시 계산)
+    'rollup-equipment-utilization-every-15-minutes': {
+        'task': 'workouts.tasks.rollup_equipment_utilization',
+        'schedule': 900.0,  # seconds
+        'args': (),
+    },
+    # 워커가 죽어 PROCESSING/PENDING에 멈춘 인바디 분석 작업을 다시 등록합니다.
+    'recover-inbody-jobs-every-5-minutes': {
+        'task': 'users.tasks.recover_inbody_jobs',
+        'schedule': 300.0,  # seconds
+        'args': (),
+    },
+    # 인바디 OCR 결과 캐시 정리 (만료 항목, 최대 개수를 넘는 오래 사용되지 않은 항목)
+    'prune-inbody-ocr-cache-every-hour': {
+        'task': 'users.tasks.prune_inbody_ocr_cache',
+        'schedule': 3600.0,  # seconds
         'args': (),
     },
 }
+# 롤업 태스크가 매번 다시 계산하는 최근 시간 범위 (알림 후 늦게 시작한 세션 등을 반영)
+UTILIZATION_ROLLUP_LOOKBACK_HOURS = env.float('UTILIZATION_ROLLUP_LOOKBACK_HOURS', default=3)
+# 이용률 분석 API에서 한 번에 조회할 수 있는 최대 기간(일)
+UTILIZATION_MAX_DAYS = env.int('UTILIZATION_MAX_DAYS', default=90)
+# 대기열 예상 대기 시간(workouts.eta): 기구별 평균 세션 길이를 구하는 기간(일), 캐시 시간(초),
+# 기록이 적은 기구를 기본 세션 시간 쪽으로 보정하는 가중치(세션 수)
+ETA_HISTORY_DAYS = env.int('ETA_HISTORY_DAYS', default=30)
+ETA_STATS_TTL_SECONDS = env.int('ETA_STATS_TTL_SECONDS', default=900)
+ETA_PRIOR_SESSIONS = env.int('ETA_PRIOR_SESSIONS', default=5)
+
+# ==========================================================
+# 인바디 분석(OCR) 설정
+# ==========================================================
+# 업로드한 결과지 이미지는 MEDIA_ROOT에 잠시 저장되고, Celery 태스크(users.tasks.analyze_inbody)가
+# 분석 후 삭제합니다. API 서버와 Celery 워커가 같은 MEDIA_ROOT를 볼 수 있어야 합니다.
+MEDIA_ROOT = env('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
+# 기본은 AWS Rekognition. 외부 호출 없는 로컬 백엔드(테스트/벤치마크용): users.ocr.StubOCR
+INBODY_OCR_BACKEND = env('INBODY_OCR_BACKEND', default='users.ocr.RekognitionOCR')
+AWS_REGION = env('AWS_REGION', default=None)
+# 분석 작업이 이 시간(초) 안에 끝나지 않으면 워커가 죽은 것으로 보고 다시 처리합니다. (users.tasks.recover_inbody_jobs)
+INBODY_JOB_TIMEOUT_SECONDS = env.int('INBODY_JOB_TIMEOUT_SECONDS', default=600)
+# 업로드 최대 크기. 휴대폰 원본 사진은 OCR 전에 전처리(users.preprocess)로 줄어들어
+# Rekognition detect_text의 이미지 바이트 한도(5MB) 안에 들어갑니다.
+INBODY_MAX_UPLOAD_BYTES = env.int('INBODY_MAX_UPLOAD_BYTES', default=15 * 1024 * 1024)
+# OCR 전처리: EXIF 회전, 흑백 변환, 긴 변을 INBODY_OCR_MAX_SIDE(px) 이하로 축소 후 JPEG 재인코딩
+INBODY_PREPROCESS_ENABLED = env.bool('INBODY_PREPROCESS_ENABLED', default=True)
+INBODY_OCR_MAX_SIDE = env.int('INBODY_OCR_MAX_SIDE', default=2048)
+INBODY_OCR_JPEG_QUALITY = env.int('INBODY_OCR_JPEG_QUALITY', default=85)
+# OCR 결과 캐시: 같은 사용자가 같은 사진을 다시 올리면 저장된 결과를 사용합니다. (users.ocr_cache)
+INBODY_OCR_CACHE_ENABLED = env.bool('INBODY_OCR_CACHE_ENABLED', default=True)
+INBODY_OCR_CACHE_TTL_SECONDS = env.int('INBODY_OCR_CACHE_TTL_SECONDS', default=30 * 24 * 3600)
+INBODY_OCR_CACHE_MAX_ENTRIES = env.int('INBODY_OCR_CACHE_MAX_ENTRIES', default=10000)
+# True면 다시 인코딩/리사이즈된 같은 사진도 찾도록 지각 해시(dHash, Pillow 필요)를 함께 비교합니다.
+# 배치가 같고 숫자만 다른 결과지는 dHash가 같게 나올 수 있어 기본은 꺼 둡니다.
+# (켜더라도 지각 해시로 찾은 결과는 프로필에 자동 반영하지 않음)
+INBODY_OCR_CACHE_PERCEPTUAL = env.bool('INBODY_OCR_CACHE_PERCEPTUAL', default=False)
+# 같은 사진으로 볼 지각 해시의 최대 해밍 거리 (256비트 중)
+INBODY_OCR_CACHE_PERCEPTUAL_DISTANCE = env.int('INBODY_OCR_CACHE_PERCEPTUAL_DISTANCE', default=12)
+# StubOCR이 호출마다 기다리는 시간(ms). 벤치마크에서 외부 OCR 지연을 흉내 낼 때 사용합니다.
+INBODY_STUB_LATENCY_MS = env.float('INBODY_STUB_LATENCY_MS', default=0)
+
+# ==========================================================
+# 외부 API 클라이언트 설정 (backend.clients)
+# ==========================================================
+# OpenAI / AWS 클라이언트는 프로세스마다 하나씩 만들어 요청과 Celery 태스크가 연결 풀을 함께 씁니다.
+OUTBOUND_POOL_SIZE = env.int('OUTBOUND_POOL_SIZE', default=10)
+OUTBOUND_CONNECT_TIMEOUT_SECONDS = env.float('OUTBOUND_CONNECT_TIMEOUT_SECONDS', default=3.0)
+OUTBOUND_READ_TIMEOUT_SECONDS = env.float('OUTBOUND_READ_TIMEOUT_SECONDS', default=60.0)
+# 첫 시도 이후 재시도 횟수 (간격은 각 SDK의 지수 백오프)
+OUTBOUND_MAX_RETRIES = env.int('OUTBOUND_MAX_RETRIES', default=2)
+# 비워 두면 각 SDK의 기본 엔드포인트. 로컬 스텁 서버나 프록시를 쓸 때 지정합니다.
+OPENAI_BASE_URL = env('OPENAI_BASE_URL', default=None)
+AWS_ENDPOINT_URL = env('AWS_ENDPOINT_URL', default=None)
+
+# ==========================================================
+# 대기열 엔진 설정
+# ==========================================================
+# 기본은 Reservation 테이블을 직접 조회합니다.
+# Redis sorted set 엔진: QUEUE_ENGINE=workouts.queue_engine.RedisQueueEngine
+QUEUE_ENGINE = env('QUEUE_ENGINE', default='workouts.queue_engine.DatabaseQueueEngine')
+QUEUE_REDIS_URL = env('QUEUE_REDIS_URL', default=CELERY_BROKER_URL)
+QUEUE_REDIS_PREFIX = env('QUEUE_REDIS_PREFIX', default='healthqueue')
+
+# ==========================================================
+# 실시간 이벤트(SSE) 설정
+# ==========================================================
+# /api/realtime/events/ 스트림은 ASGI 서버(uvicorn backend.asgi:application)에서 제공합니다.
+REALTIME_ENABLED = env.bool('REALTIME_ENABLED', default=True)
+# 기본은 같은 프로세스 안에서만 전달합니다. (개발/테스트용)
+# 여러 프로세스(WSGI API + ASGI 스트림, Celery)를 쓰는 운영 환경: REALTIME_BROKER=realtime.broker.RedisBroker
+REALTIME_BROKER = env('REALTIME_BROKER', default='realtime.broker.InProcessBroker')
+REALTIME_REDIS_URL = env('REALTIME_REDIS_URL', default=CELERY_BROKER_URL)
+REALTIME_REDIS_PREFIX = env('REALTIME_REDIS_PREFIX', default='healthqueue:events')
+# 연결별로 쌓아 둘 최대 메시지 수 (초과하면 느린 클라이언트의 메시지는 버림)
+REALTIME_QUEUE_SIZE = env.int('REALTIME_QUEUE_SIZE', default=100)
+REALTIME_HEARTBEAT_SECONDS = env.float('REALTIME_HEARTBEAT_SECONDS', default=15.0)
 
 
@@ -0,0 +1,422 @@
+"""
+API 전체 라우트 쿼리 예산 테스트
+
+모든 /api/ 라우트를 실제 JWT 인증과 현실적인 데이터 양(행 수십 개)으로 호출하고,
+QueryCountMiddleware(strict 모드)가 선언된 예산(backend.query_budget)을 넘으면 실패합니다.
+새 라우트를 추가하면 예산을 선언하고 여기에 케이스를 추가해야 test_every_api_route_is_covered가 통과합니다.
+"""
+import datetime
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from equipment.models import Equipment
+from gyms.models import Gym, GymMembership
+from reports.models import Report
+from users.models import UserProfile
+from workouts.models import Reservation, UsageSession
+from . import clients
+from .pagination import StandardCursorPagination
+from .query_budget import QueryBudgetExceeded, query_budget
+
+# 테스트 데이터 양 (목록 엔드포인트의 N+1을 드러낼 만큼)
+VOLUME = 25
+
+COVERED_ROUTES = {
+    'api-root', 'register', 'token_obtain_pair', 'token_refresh', 'current_user', 'current_user_profile',
+    'user-list', 'user-detail', 'inbody_analyze', 'inbody_job', 'inbody_ocr_cache_stats',
+    'gym-list', 'gym-detail', 'gym-my-gym', 'gym-live', 'gymmembership-list', 'gymmembership-detail',
+    'equipment-list', 'equipment-detail', 'equipment-managed-equipments', 'equipment-set-operational-state',
+    'equipment-utilization',
+    'start-session', 'end-session', 'join-queue', 'leave-queue', 'queue-position', 'history-export',
+    'usagesession-list', 'usagesession-detail', 'reservation-list', 'reservation-detail',
+    'report-list', 'report-detail',
+    'ai-metrics',
+}
+
+# 외부 서비스 호출/스트리밍이라 이 스위트에서 제외하는 라우트
+EXCLUDED_ROUTES = {
+    'generate-routine': 'OpenAI 호출',
+    'realtime-events': 'SSE 스트리밍 (realtime/tests.py)',
+}
+
+
+def _api_route_names(resolver=None, prefix=''):
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from _api_route_names(pattern, route)
+        elif route.startswith('api/'):
+            yield pattern.name
+
+
+@override_settings(
+    QUERY_BUDGET_ENABLED=True,
+    QUERY_BUDGET_STRICT=True,
+    QUERY_BUDGET_DEFAULT=None,
+    AI_MODEL_ENABLED=False,
+    RESERVATION_EXPIRY_SCHEDULING=False,
+)
+class ApiQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.operator = User.objects.create_user(username='operator', password='pw', is_staff=True)
+        UserProfile.objects.create(user=cls.operator, role='OPERATOR')
+        cls.member = User.objects.create_user(username='member', password='pw')
+        UserProfile.objects.create(user=cls.member, age=30, experience_level='BEGINNER')
+        cls.gym = Gym.objects.create(owner=cls.operator, name='gym', address='addr')
+        GymMembership.objects.create(user=cls.member, gym=cls.gym, status='APPROVED')
+
+        cls.others = User.objects.bulk_create([User(username=f'user{i}') for i in range(VOLUME)])
+        UserProfile.objects.bulk_create([UserProfile(user=u) for u in cls.others])
+        GymMembership.objects.bulk_create([GymMembership(user=u, gym=cls.gym, status='APPROVED') for u in cls.others])
+
+        cls.equipments = Equipment.objects.bulk_create([
+            Equipment(gym=cls.gym, name=f'machine{i}', type='STRENGTH', nfc_tag_id=f'nfc-{i}', arduino_id=f'ard-{i}')
+            for i in range(VOLUME)
+        ])
+        cls.busy = cls.equipments[0]
+        cls.free = cls.equipments[1]
+
+        now = timezone.now()
+        sessions = UsageSession.objects.bulk_create([
+            UsageSession(user=cls.member, equipment=cls.equipments[i % VOLUME], allocated_duration_minutes=15)
+            for i in range(VOLUME)
+        ])
+        UsageSession.objects.filter(id__in=[s.id for s in sessions]).update(
+            start_time=now - datetime.timedelta(hours=2), end_time=now - datetime.timedelta(hours=1, minutes=45)
+        )
+        cls.session = sessions[0]
+        Reservation.objects.bulk_create([
+            Reservation(user=u, equipment=cls.busy, status='WAITING') for u in cls.others
+        ])
+        cls.reservation = Reservation.objects.create(user=cls.member, equipment=cls.busy, status='WAITING')
+        Report.objects.bulk_create([
+            Report(reporter=cls.member, equipment=cls.equipments[i], reason='broken') for i in range(VOLUME)
+        ])
+        cls.report = Report.objects.filter(reporter=cls.member).first()
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, method, path, data=None, user=None, format='json'):
+        """ JWT로 인증해 호출하고, 예산이 선언되어 있고 넘지 않았는지 확인합니다. """
+        self.assertIn(resolve(path.split('?')[0]).url_name, COVERED_ROUTES)
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        response = getattr(client, method)(path, data, format=format)
+        self.assertIn('X-Query-Budget', response, f'{method.upper()} {path}: 쿼리 예산이 선언되지 않았습니다.')
+        self.assertLess(response.status_code, 500)
+        return response
+
+    def test_every_api_route_is_covered(self):
+        names = set(_api_route_names())
+        self.assertEqual(names - COVERED_ROUTES - set(EXCLUDED_ROUTES), set())
+
+    # --- 인증 / 사용자 ---
+
+    def test_api_root(self):
+        self.request('get', '/api/', user=self.member)
+
+    def test_register(self):
+        response = self.request('post', '/api/register/', {'username': 'newbie', 'password': 'pw12345!', 'email': 'n@example.com'})
+        self.assertEqual(response.status_code, 201)
+
+    def test_login_and_refresh(self):
+        response = self.request('post', '/api/login/', {'username': 'member', 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+        response = self.request('post', '/api/token/refresh/', {'refresh': response.data['refresh']})
+        self.assertEqual(response.status_code, 200)
+
+    def test_current_user_and_profile(self):
+        self.assertEqual(self.request('get', '/api/user/me/', user=self.member).status_code, 200)
+        self.assertEqual(self.request('get', '/api/users/profile/', user=self.member).status_code, 200)
+
+    def test_user_list(self):
+        self.request('get', '/api/users/', user=self.member)
+
+    def test_user_detail(self):
+        self.assertEqual(self.request('get', f'/api/users/{self.member.id}/', user=self.member).status_code, 200)
+
+    def test_inbody_upload_and_job(self):
+        image = SimpleUploadedFile('inbody.jpg', '체중 70.1 kg'.encode(), content_type='image/jpeg')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            response = self.request('post', '/api/inbody/analyze/', {'image': image}, user=self.member, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.request('get', f"/api/inbody/jobs/{response.data['job_id']}/", user=self.member).status_code, 200)
+        self.assertEqual(self.request('get', '/api/inbody/ocr-cache/stats/', user=self.operator).status_code, 200)
+
+    # --- 헬스장 ---
+
+    def test_gyms(self):
+        self.assertEqual(self.request('get', '/api/gyms/', user=self.member).status_code, 200)
+        self.assertEqual(self.request('get', f'/api/gyms/{self.gym.id}/', user=self.member).status_code, 200)
+        self.assertEqual(self.request('get', '/api/gyms/my-gym/', user=self.member).status_code, 200)
+        self.assertEqual(self.request('get', f'/api/gyms/{self.gym.id}/live/', user=self.member).status_code, 200)
+
+    def test_membership_list(self):
+        self.request('get', '/api/memberships/', user=self.operator)
+
+    def test_membership_detail(self):
+        membership = GymMembership.objects.get(user=self.member)
+        self.assertEqual(self.request('get', f'/api/memberships/{membership.id}/', user=self.member).status_code, 200)
+
+    # --- 기구 ---
+
+    def test_equipment_list(self):
+        self.request('get', '/api/equipment/', user=self.member)
+
+    def test_equipment_detail(self):
+        self.assertEqual(self.request('get', f'/api/equipment/{self.free.id}/', user=self.member).status_code, 200)
+
+    def test_equipment_operator_endpoints(self):
+        self.assertEqual(self.request('get', '/api/equipment/managed/', user=self.operator).status_code, 200)
+        response = self.request(
+            'patch', f'/api/equipment/{self.free.id}/operational-state/',
+            {'gym_id': self.gym.id, 'operational_state': 'MAINTENANCE'}, user=self.operator,
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.request('get', '/api/equipment/utilization/?interval=day', user=self.operator)
+        self.assertEqual(len(response.data['equipments']), VOLUME)
+
+    # --- 운동 세션 / 대기열 ---
+
+    def test_start_and_end_session(self):
+        response = self.request('post', '/api/workouts/start/', {'equipment_id': self.free.id}, user=self.member)
+        self.assertEqual(response.status_code, 201)
+        response = self.request('post', '/api/workouts/end/', user=self.member)
+        self.assertEqual(response.status_code, 200)
+
+    def test_queue_endpoints(self):
+        response = self.request('post', '/api/workouts/join-queue/', {'equipment_id': self.busy.id}, user=self.operator)
+        self.assertEqual(response.status_code, 201)
+        response = self.request('get', f'/api/workouts/queue-position/?reservation_id={self.reservation.id}', user=self.member)
+        self.assertEqual(response.data['position'], VOLUME + 1)
+        response = self.request('post', '/api/workouts/leave-queue/', {'reservation_id': self.reservation.id}, user=self.member)
+        self.assertEqual(response.status_code, 200)
+
+    def test_history_export(self):
+        response = self.request('get', f'/api/workouts/export/sessions/?gym_id={self.gym.id}', user=self.operator)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), VOLUME + 1)
+
+    def test_session_list(self):
+        self.request('get', '/api/sessions/', user=self.member)
+
+    def test_session_detail(self):
+        self.assertEqual(self.request('get', f'/api/sessions/{self.session.id}/', user=self.member).status_code, 200)
+
+    def test_reservation_list(self):
+        self.request('get', '/api/reservations/', user=self.member)
+
+    def test_reservation_detail(self):
+        self.assertEqual(self.request('get', f'/api/reservations/{self.reservation.id}/', user=self.member).status_code, 200)
+
+    # --- 신고 ---
+
+    def test_report_list(self):
+        self.request('get', '/api/reports/', user=self.member)
+
+    def test_report_detail_and_create(self):
+        self.assertEqual(self.request('get', f'/api/reports/{self.report.id}/', user=self.member).status_code, 200)
+        response = self.request('post', '/api/reports/', {'equipment': self.free.id, 'reason': 'noisy'}, user=self.member)
+        self.assertEqual(response.status_code, 201)
+
+    # --- 기타 ---
+
+    def test_ai_metrics(self):
+        self.assertEqual(self.request('get', '/api/ai/metrics/', user=self.operator).status_code, 200)
+
+
+class QueryCountMiddlewareTests(TestCase):
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_headers_report_query_count_and_time(self):
+        user = User.objects.create_user(username='member', password='pw')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get('/api/user/me/')
+
+        # JWT 사용자 조회 + 프로필 조회
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertGreaterEqual(float(response['X-Query-Time-Ms']), 0)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=True, QUERY_BUDGETS={'token_refresh': 0})
+    def test_strict_mode_raises_when_budget_is_exceeded(self):
+        user = User.objects.create_user(username='member', password='pw')
+        refresh = str(RefreshToken.for_user(user))
+
+        with self.assertRaises(QueryBudgetExceeded):
+            APIClient().post('/api/token/refresh/', {'refresh': refresh})
+
+    def test_disabled_by_default_in_production(self):
+        response = APIClient().post('/api/token/refresh/', {'refresh': 'invalid'})
+        self.assertNotIn('X-Query-Count', response)
+
+    def test_decorator_budgets_are_resolved_per_action(self):
+        @query_budget(3, list=5)
+        class View:
+            pass
+
+        self.assertEqual(View.query_budget, {'*': 3, 'list': 5})
+
+
+class StandardCursorPaginationTests(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([User(username=f'user{i}') for i in range(5)])
+
+    def paginate(self, view, **params):
+        request = Request(APIRequestFactory().get('/api/users/', params))
+        return StandardCursorPagination().paginate_queryset(User.objects.all(), request, view=view)
+
+    def test_view_caps_requested_page_size(self):
+        class View:
+            max_page_size = 2
+
+        self.assertEqual(len(self.paginate(View(), page_size=100)), 2)
+
+    def test_view_page_size_and_ordering(self):
+        class View:
+            page_size = 3
+            cursor_ordering = 'id'
+
+        page = self.paginate(View())
+        self.assertEqual([u.username for u in page], ['user0', 'user1', 'user2'])
+
+
+class _StubApiHandler(BaseHTTPRequestHandler):
+    """ OpenAI chat.completions / Rekognition DetectText 응답을 흉내 내는 keep-alive 스텁 서버 """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    fail_next = 0  # 다음 N번의 요청에 429를 돌려줌 (재시도 확인용)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        server = self.server
+        server.calls += 1
+        if server.fail_next:
+            server.fail_next -= 1
+            self._reply(429, {'error': {'message': 'slow down'}}, {'retry-after-ms': '10'})
+        elif self.path.endswith('/chat/completions'):
+            self._reply(200, {
+                'id': 'chatcmpl-1', 'object': 'chat.completion', 'created': 0, 'model': 'gpt-4',
+                'choices': [{
+                    'index': 0, 'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': '{"routine": []}'},
+                }],
+            })
+        else:
+            self._reply(200, {'TextDetections': [{'DetectedText': '체중 70.8', 'Type': 'LINE', 'Confidence': 99.0}]},
+                        {'Content-Type': 'application/x-amz-json-1.1'})
+
+    def _reply(self, status_code, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        for name, value in {'Content-Type': 'application/json', **(headers or {})}.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class OutboundClientTests(TestCase):
+    """ backend.clients: 프로세스 공용 클라이언트의 재사용, 연결 재사용률, 지연 시간 지표, 재시도 """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubApiHandler)
+        cls.server.calls = 0
+        cls.server.fail_next = 0
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.calls = 0
+        self.server.fail_next = 0
+        overrides = override_settings(
+            OPENAI_API_KEY='test', OPENAI_BASE_URL=f'{self.base_url}/v1', AWS_ENDPOINT_URL=self.base_url,
+            AWS_REGION='ap-northeast-2', OUTBOUND_MAX_RETRIES=2,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        credentials = mock.patch.dict(os.environ, {'AWS_ACCESS_KEY_ID': 'test', 'AWS_SECRET_ACCESS_KEY': 'test'})
+        credentials.start()
+        self.addCleanup(credentials.stop)
+        clients.reset_clients()
+        self.addCleanup(clients.reset_clients)
+
+    def chat(self):
+        response = clients.get_openai_client().chat.completions.create(
+            model='gpt-4', messages=[{'role': 'user', 'content': 'hi'}],
+        )
+        return response.choices[0].message.content
+
+    def test_openai_client_is_shared_and_reuses_connections(self):
+        self.assertIs(clients.get_openai_client(), clients.get_openai_client())
+        for _ in range(5):
+            self.assertEqual(self.chat(), '{"routine": []}')
+
+        stats = clients.get_client_stats()['openai']
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['new_connections'], 1)
+        self.assertEqual(stats['connection_reuse_rate'], 0.8)
+        self.assertIsNotNone(stats['latency_ms']['p95'])
+
+    def test_openai_retries_with_backoff(self):
+        self.server.fail_next = 2
+        self.assertEqual(self.chat(), '{"routine": []}')
+        self.assertEqual(self.server.calls, 3)
+        self.assertEqual(clients.get_client_stats()['openai']['requests'], 3)
+
+    def test_aws_client_is_shared_and_reuses_connections(self):
+        from users.ocr import RekognitionOCR
+
+        self.assertIs(RekognitionOCR().client, clients.get_aws_client('rekognition'))
+        for _ in range(4):
+            detections = RekognitionOCR().detect_text(b'image')
+        self.assertEqual(detections[0]['text'], '체중 70.8')
+
+        stats = clients.get_client_stats()['aws:rekognition:ap-northeast-2']
+        self.assertEqual(stats['requests'], 4)
+        self.assertEqual(stats['new_connections'], 1)
+        self.assertEqual(stats['connection_reuse_rate'], 0.75)
+        self.assertGreater(stats['latency_ms']['max'], 0)
+
+    def test_unreadable_connection_pool_reports_unknown_reuse(self):
+        client = clients.get_aws_client('rekognition')
+        client.detect_text(Image={'Bytes': b'image'})
+        with mock.patch.object(client._endpoint, 'http_session', object()):
+            stats = clients.get_client_stats()['aws:rekognition:ap-northeast-2']
+        self.assertEqual(stats['requests'], 1)
+        self.assertIsNone(stats['new_connections'])
+        self.assertIsNone(stats['connection_reuse_rate'])
+
+    def test_clients_are_rebuilt_after_fork(self):
+        client = clients.get_openai_client()
+        with mock.patch('backend.clients.os.getpid', return_value=os.getpid() + 1):
+            self.assertIsNot(clients.get_openai_client(), client)
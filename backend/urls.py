@@ -37,4 +37,6 @@ urlpatterns = [
     path('api/', include('workouts.urls')),
     path('api/', include('reports.urls')),
     path('api/routines/', include('routines.urls')),
+    path('api/ai/', include('ai_model.urls')),
+    path('api/realtime/', include('realtime.urls')),
 ]
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# AI 모델 미리 로드 (gunicorn은 기본적으로 fork 이후 워커에서 이 모듈을 import 하므로
+# 워커 프로세스마다 한 번씩 로드됩니다. --preload 사용 시에도 get_model()이 pid를 확인해
+# 자식 프로세스에서 다시 로드합니다.)
+from django.conf import settings
+
+if settings.AI_MODEL_WARMUP:
+    from ai_model.prediction_utils import get_model
+    get_model()
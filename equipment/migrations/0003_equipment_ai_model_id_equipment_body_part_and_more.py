@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0002_add_operational_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='ai_model_id',
+            field=models.IntegerField(default=0, help_text='AI 모델이 인식하는 기구 ID (training_script.py와 일치해야 함, 예: 0=벤치)'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='body_part',
+            field=models.CharField(choices=[('UPPER', '상체'), ('LOWER', '하체'), ('CORE', '코어'), ('CARDIO', '유산소'), ('ETC', '기타')], default='ETC', help_text='이 기구의 주요 운동 부위 (AI 비율 계산에 사용)', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='image_url',
+            field=models.URLField(blank=True, help_text='운동기구 이미지 URL', max_length=500, null=True),
+        ),
+    ]
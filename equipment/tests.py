@@ -1,3 +1,98 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from gyms.models import Gym, GymMembership
+from reports.models import Report
+from users.models import UserProfile
+from .models import Equipment
+
+
+class ManagedEquipmentsTests(TestCase):
+    url = '/api/equipment/managed/'
+
+    def setUp(self):
+        self.operator = User.objects.create_user(username='operator', password='pw')
+        UserProfile.objects.create(user=self.operator, role='OPERATOR')
+        self.reporter = User.objects.create_user(username='reporter', password='pw')
+        self.owned = Gym.objects.create(owner=self.operator, name='owned', address='addr')
+        other_owner = User.objects.create_user(username='other', password='pw')
+        self.joined = Gym.objects.create(owner=other_owner, name='joined', address='addr')
+        GymMembership.objects.create(user=self.operator, gym=self.joined, status='APPROVED')
+        self.unrelated = Gym.objects.create(owner=other_owner, name='unrelated', address='addr')
+        self.client = APIClient()
+        self.client.force_authenticate(self.operator)
+        self._count = 0
+
+    def _add_equipment(self, gym, n, pending_reports=0, **kwargs):
+        created = []
+        for _ in range(n):
+            self._count += 1
+            equipment = Equipment.objects.create(
+                gym=gym, name=f'machine{self._count}', type='STRENGTH',
+                nfc_tag_id=f'nfc-{self._count}', arduino_id=f'ard-{self._count}', **kwargs
+            )
+            for _ in range(pending_reports):
+                Report.objects.create(reporter=self.reporter, equipment=equipment, reason='broken')
+            Report.objects.create(reporter=self.reporter, equipment=equipment, reason='fixed', status='RESOLVED')
+            created.append(equipment)
+        return created
+
+    def _query_count(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_query_count_does_not_grow_with_equipment(self):
+        self._add_equipment(self.owned, 2, pending_reports=1)
+        small, _ = self._query_count()
+
+        self._add_equipment(self.owned, 20, pending_reports=2)
+        self._add_equipment(self.joined, 20)
+        large, response = self._query_count(page_size=100)
+
+        self.assertEqual(small, large)
+        # (프로필) + 페이지 (커서 페이지네이션은 COUNT를 실행하지 않음)
+        self.assertLessEqual(large, 2)
+        self.assertEqual(len(response.data['results']), 42)
+
+    def test_report_counts_and_managed_scope(self):
+        [owned] = self._add_equipment(self.owned, 1, pending_reports=3)
+        [joined] = self._add_equipment(self.joined, 1)
+        self._add_equipment(self.unrelated, 1, pending_reports=1)
+
+        response = self.client.get(self.url)
+
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(set(rows), {owned.id, joined.id})
+        self.assertEqual(rows[owned.id]['report_count'], 3)
+        self.assertEqual(rows[joined.id]['report_count'], 0)
+        self.assertEqual(rows[joined.id]['gym_name'], 'joined')
+
+    def test_filters_and_pagination(self):
+        self._add_equipment(self.owned, 3)
+        [maintenance] = self._add_equipment(self.joined, 1, operational_state='MAINTENANCE')
+        self._add_equipment(self.joined, 2)
+
+        response = self.client.get(self.url, {'gym_id': self.joined.id, 'operational_state': 'MAINTENANCE'})
+        self.assertEqual([row['id'] for row in response.data['results']], [maintenance.id])
+
+        first = self.client.get(self.url, {'page_size': 4})
+        self.assertEqual(len(first.data['results']), 4)
+        self.assertNotIn('count', first.data)
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 2)
+        self.assertIsNone(second.data['next'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, sorted(ids))
+
+        self.assertEqual(self.client.get(self.url, {'operational_state': 'BROKEN'}).status_code, 400)
+
+    def test_members_are_forbidden(self):
+        member = User.objects.create_user(username='member', password='pw')
+        UserProfile.objects.create(user=member)
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
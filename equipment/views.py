@@ -1,23 +1,35 @@
 from django.shortcuts import render
 # equipment/views.py
 
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import viewsets, status
 # IsAuthenticated를 import 합니다.
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count, Q
 
 from .models import Equipment
 from .serializers import EquipmentSerializer
 from users.models import UserProfile
-from reports.models import Report
-from gyms.models import GymMembership, Gym
+from gyms.services import get_managed_gym_ids
+from backend.query_budget import query_budget
+from backend.pagination import StandardCursorPagination
+from realtime import events
+from workouts.services import parse_date_bound
+from workouts.utilization import get_utilization
 
 
+@query_budget(6, list=3, retrieve=3, managed_equipments=3, set_operational_state=5, utilization=5)
 class EquipmentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
-    queryset = Equipment.objects.all()
+    # EquipmentSerializer가 gym.name을 보여주므로 함께 조회
+    queryset = Equipment.objects.select_related('gym')
     serializer_class = EquipmentSerializer
+    cursor_ordering = 'id'
 
     @action(detail=True, methods=['patch'], url_path='operational-state')
     def set_operational_state(self, request, pk=None):
@@ -58,6 +70,7 @@ class EquipmentViewSet(viewsets.ModelViewSet):
 
         equipment.operational_state = new_state
         equipment.save()
+        events.equipment_status_changed(equipment)
 
         serializer = self.get_serializer(equipment)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -72,6 +85,10 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         - 운영자가 관리하는 헬스장 = user가 `Gym.owner`인 헬스장 OR
           `GymMembership` 테이블에서 status='APPROVED'로 등록된 헬스장
         - report_count는 현재 상태가 PENDING인 신고 건수로 집계합니다.
+
+        기구 수와 관계없이 쿼리 수가 일정합니다. (신고 건수는 annotate, 헬스장은 select_related)
+        다른 목록 API와 같이 기구 id 순 커서 페이지네이션을 사용하므로 COUNT/OFFSET 쿼리가 없습니다.
+        쿼리 파라미터: gym_id, operational_state, cursor, page_size (기본 50, 최대 200)
         """
         user = request.user
         try:
@@ -82,25 +99,95 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         if profile.role != 'OPERATOR':
             return Response({"detail": "운영자 권한이 필요합니다."}, status=status.HTTP_403_FORBIDDEN)
 
-        # gyms where user is owner
-        owner_gyms = Gym.objects.filter(owner=user).values_list('id', flat=True)
-        # gyms where user is an approved member (관리자 성격으로 가입한 경우)
-        member_gyms = GymMembership.objects.filter(user=user, status='APPROVED').values_list('gym_id', flat=True)
-
-        gym_ids = set(list(owner_gyms) + list(member_gyms))
-
-        equipments = Equipment.objects.filter(gym_id__in=gym_ids)
+        equipments = (
+            Equipment.objects.filter(gym_id__in=get_managed_gym_ids(user))
+            .select_related('gym')
+            .annotate(report_count=Count('report', filter=Q(report__status='PENDING')))
+        )
+
+        # 필터: ?gym_id=1 / ?operational_state=MAINTENANCE
+        gym_id = request.query_params.get('gym_id')
+        if gym_id:
+            if not gym_id.isdigit():
+                return Response({"detail": "gym_id는 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+            equipments = equipments.filter(gym_id=gym_id)
+        operational_state = request.query_params.get('operational_state')
+        if operational_state:
+            if operational_state not in dict(Equipment.OPERATIONAL_STATE_CHOICES):
+                return Response({"detail": f"허용되지 않은 상태입니다. 허용값: {list(dict(Equipment.OPERATIONAL_STATE_CHOICES).keys())}"}, status=status.HTTP_400_BAD_REQUEST)
+            equipments = equipments.filter(operational_state=operational_state)
+
+        paginator = StandardCursorPagination()  # 정렬: cursor_ordering ('id')
+        page = paginator.paginate_queryset(equipments, request, view=self)
 
         results = []
-        for eq in equipments:
-            pending_reports = Report.objects.filter(equipment=eq, status='PENDING').count()
+        for eq in page:
             results.append({
                 'id': eq.id,
                 'name': eq.name,
-                'gym_id': eq.gym.id,
+                'gym_id': eq.gym_id,
                 'gym_name': eq.gym.name,
                 'operational_state': eq.operational_state,
-                'report_count': pending_reports,
+                'report_count': eq.report_count,
             })
 
-        return Response(results, status=status.HTTP_200_OK)
\ No newline at end of file
+        return paginator.get_paginated_response(results)
+
+    @action(detail=False, methods=['get'], url_path='utilization')
+    def utilization(self, request):
+        """
+        운영자 전용: 관리하는 헬스장 기구들의 기간별 이용 현황을 반환합니다.
+        원본 세션이 아니라 시간 단위 롤업(EquipmentUtilization)에서 읽으므로 90일 범위도 빠릅니다.
+
+        쿼리 파라미터:
+        - gym_id, equipment_id: 대상 제한 (선택)
+        - from / to: 날짜(to 포함) 또는 ISO datetime. 기본은 최근 7일
+        - interval: hour / day 를 주면 기구별 시계열(series) 포함 (hour는 최대 7일)
+
+        응답 예시:
+        {
+            "from": "...", "to": "...",
+            "equipments": [{"equipment_id": 1, "name": "벤치", "gym_id": 1, "busy_minutes": 320.5,
+                            "session_count": 21, "utilization": 0.0318, "avg_queue_length": 0.42,
+                            "notified_count": 9, "avg_wait_seconds": 311.0, "avg_start_delay_seconds": 48.2}]
+        }
+        """
+        user = request.user
+        try:
+            profile = user.userprofile
+        except UserProfile.DoesNotExist:
+            return Response({"detail": "유효한 운영자 프로필이 필요합니다."}, status=status.HTTP_403_FORBIDDEN)
+
+        if profile.role != 'OPERATOR':
+            return Response({"detail": "운영자 권한이 필요합니다."}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            end = parse_date_bound(request.query_params.get('to'), end=True) or timezone.now()
+            start = parse_date_bound(request.query_params.get('from')) or end - datetime.timedelta(days=7)
+        except ValueError:
+            return Response({"detail": "from/to는 YYYY-MM-DD 또는 ISO 8601 형식이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if start >= end:
+            return Response({"detail": "from은 to보다 이전이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        max_days = getattr(settings, 'UTILIZATION_MAX_DAYS', 90)
+        if end - start > datetime.timedelta(days=max_days):
+            return Response({"detail": f"조회 기간은 최대 {max_days}일입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        interval = request.query_params.get('interval')
+        if interval not in (None, 'hour', 'day'):
+            return Response({"detail": "interval은 hour 또는 day입니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if interval == 'hour' and end - start > datetime.timedelta(days=7):
+            return Response({"detail": "interval=hour는 최대 7일까지 조회할 수 있습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        equipments = Equipment.objects.filter(gym_id__in=get_managed_gym_ids(user))
+        for param in ('gym_id', 'equipment_id'):
+            value = request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    return Response({"detail": f"{param}는 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+                equipments = equipments.filter(**{'id' if param == 'equipment_id' else param: value})
+
+        return Response({
+            'from': start,
+            'to': end,
+            'equipments': get_utilization(equipments, start, end, interval=interval),
+        })
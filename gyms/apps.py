@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GymsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gyms'
+
+    def ready(self):
+        # 헬스장 현황 스냅샷 버전 갱신 (gyms.signals), 공유 캐시 설정 체크 (gyms.checks)
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,22 @@
+# gyms/checks.py
+"""
+헬스장 실시간 현황(gyms.live) 설정 시스템 체크
+"""
+from django.conf import settings
+from django.core import checks
+
+from .live import live_cache_is_shared
+
+
+@checks.register(checks.Tags.caches)
+def check_live_cache(app_configs, **kwargs):
+    # 개발 환경(DEBUG)의 기본 LocMemCache는 허용하고, 운영 설정에서만 경고합니다.
+    if settings.DEBUG or live_cache_is_shared():
+        return []
+    return [
+        checks.Warning(
+            '기본 캐시가 프로세스별 캐시(LocMemCache/DummyCache)라 헬스장 현황 버전을 프로세스끼리 공유할 수 없습니다.',
+            hint='CACHE_URL=redis://host:6379/1 처럼 공유 캐시를 설정하세요. 그 전까지 현황 API는 ETag/304와 스냅샷 캐시를 쓰지 않습니다.',
+            id='gyms.W001',
+        )
+    ]
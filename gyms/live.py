@@ -0,0 +1,128 @@
+# gyms/live.py
+"""
+헬스장 실시간 현황(GET /api/gyms/{id}/live/) 스냅샷과 버전 캐시
+
+- 스냅샷: 헬스장의 모든 기구 상태/운영 상태/대기 인원/진행 중 세션을 쿼리 한 번으로 계산합니다.
+- 버전: 헬스장별 정수 카운터. 세션/대기열/기구 상태가 바뀌면(커밋 후) realtime.events가 올리고,
+  ModelViewSet/admin에서 모델을 저장·삭제한 경우는 gyms.signals가 올립니다.
+  스냅샷은 `버전`을 키에 포함해 캐시하므로 무효화할 필요가 없고, 버전은 곧 ETag가 됩니다.
+- 버전은 모든 gunicorn/Celery 프로세스가 같이 봐야 하므로 공유 캐시(CACHE_URL=redis://...)가 필요합니다.
+  프로세스별 캐시(LocMemCache 등)에서는 다른 프로세스의 변경을 알 수 없으므로 스냅샷 캐시와 ETag를 쓰지 않습니다.
+  (운영 설정에서는 시스템 체크 gyms.W001 경고)
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from equipment.models import Equipment
+from workouts.models import Reservation, UsageSession
+
+
+def _version_key(gym_id):
+    return f'gym-live:{gym_id}:version'
+
+
+def _snapshot_key(gym_id, version):
+    return f'gym-live:{gym_id}:snapshot:{version}'
+
+
+def _initial_version():
+    # 캐시가 비워진 뒤 예전 버전 번호(와 그 스냅샷)를 다시 쓰지 않도록 현재 시각(ms)에서 시작
+    return int(time.time() * 1000)
+
+
+def live_cache_is_shared():
+    """ 기본 캐시를 여러 프로세스가 공유하는지 (LocMemCache/DummyCache는 프로세스마다 따로) """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_live_version(gym_id):
+    version = cache.get(_version_key(gym_id))
+    if version is None:
+        cache.add(_version_key(gym_id), _initial_version(), timeout=None)
+        version = cache.get(_version_key(gym_id))
+    return version
+
+
+def bump_live_version(gym_id):
+    """ 헬스장 스냅샷을 무효화합니다. (세션/대기열/기구 상태 변경이 커밋된 후 호출) """
+    try:
+        return cache.incr(_version_key(gym_id))
+    except ValueError:
+        # 키가 없으면 새 시작 버전을 만듭니다. (동시에 만들어졌다면 add는 무시됨)
+        cache.add(_version_key(gym_id), _initial_version(), timeout=None)
+        return get_live_version(gym_id)
+
+
+def build_live_snapshot(gym_id, version):
+    """ 기구 수와 관계없이 쿼리 한 번으로 헬스장 현황을 만듭니다. """
+    waiting = (
+        Reservation.objects.filter(equipment=OuterRef('pk'), status='WAITING')
+        .order_by()
+        .values('equipment')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    current = (
+        UsageSession.objects.filter(equipment=OuterRef('pk'), end_time__isnull=True)
+        .order_by('-start_time')
+    )
+    rows = (
+        Equipment.objects.filter(gym_id=gym_id)
+        .annotate(
+            waiting_count=Coalesce(Subquery(waiting, output_field=IntegerField()), Value(0)),
+            session_started_at=Subquery(current.values('start_time')[:1]),
+            session_minutes=Subquery(current.values('allocated_duration_minutes')[:1]),
+        )
+        .order_by('id')
+        .values(
+            'id', 'name', 'type', 'body_part', 'image_url', 'status', 'operational_state',
+            'waiting_count', 'session_started_at', 'session_minutes',
+        )
+    )
+
+    equipments = []
+    for row in rows:
+        started_at = row.pop('session_started_at')
+        minutes = row.pop('session_minutes')
+        row['current_session'] = None
+        if started_at is not None:
+            row['current_session'] = {
+                'started_at': started_at,
+                'ends_at': started_at + datetime.timedelta(minutes=minutes or 0),
+            }
+        equipments.append(row)
+
+    return {'gym_id': gym_id, 'version': version, 'generated_at': timezone.now(), 'equipments': equipments}
+
+
+def get_live_snapshot(gym_id, version):
+    """ 캐시된 스냅샷을 반환하고, 없으면 만들어 저장합니다. (공유 캐시가 아니면 매번 새로 만듦) """
+    if not live_cache_is_shared():
+        return build_live_snapshot(gym_id, version)
+    key = _snapshot_key(gym_id, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_live_snapshot(gym_id, version)
+        cache.set(key, snapshot, timeout=getattr(settings, 'GYM_LIVE_SNAPSHOT_TTL_SECONDS', 300))
+    return snapshot
+
+
+def with_remaining_time(snapshot, now=None):
+    """ 응답 시점 기준 남은 시간(초)을 채워 넣습니다. (캐시된 스냅샷은 수정하지 않음) """
+    now = now or timezone.now()
+    equipments = []
+    for equipment in snapshot['equipments']:
+        session = equipment['current_session']
+        if session is not None:
+            remaining = max(int((session['ends_at'] - now).total_seconds()), 0)
+            equipment = {**equipment, 'current_session': {**session, 'remaining_seconds': remaining}}
+        equipments.append(equipment)
+    return {**snapshot, 'equipments': equipments}
@@ -0,0 +1,34 @@
+# gyms/services.py
+
+from django.db.models import Q
+
+from .models import Gym
+
+
+def get_managed_gym_ids(user):
+    """
+    운영자가 관리하는(소속된) 헬스장 id 쿼리셋을 반환합니다. (서브쿼리로 사용, 별도 조회 없음)
+
+    규칙(가정):
+    - user가 `Gym.owner`인 헬스장 OR
+    - `GymMembership` 테이블에서 status='APPROVED'로 등록된 헬스장
+    """
+    return Gym.objects.filter(
+        Q(owner=user) | Q(gymmembership__user=user, gymmembership__status='APPROVED')
+    ).values('id')
+
+
+def scope_to_user(queryset, user, user_field, gym_field):
+    """
+    목록/상세 API용으로 queryset을 요청한 사용자가 볼 수 있는 행으로 제한합니다.
+
+    - 일반 회원: 본인 행(user_field == user)만
+    - 운영자(is_staff): 본인 행 + 관리하는 헬스장(gym_field)의 행
+    - superuser: 전체
+    """
+    if user.is_superuser:
+        return queryset
+    scope = Q(**{user_field: user})
+    if user.is_staff:
+        scope |= Q(**{f'{gym_field}__in': get_managed_gym_ids(user)})
+    return queryset.filter(scope)
@@ -0,0 +1,43 @@
+# gyms/signals.py
+"""
+헬스장 현황 스냅샷 버전(gyms.live) 갱신 시그널
+
+대기열/세션 API는 realtime.events를 통해 버전을 올리지만, ModelViewSet(생성/수정/삭제)과
+Django admin으로 바뀐 기구/세션/예약은 그 경로를 거치지 않습니다.
+post_save/post_delete에서 커밋 후 해당 헬스장의 버전을 올려 ETag(If-None-Match)가 낡은 스냅샷을 돌려주지 않게 합니다.
+(queryset.update()는 시그널이 없으므로 그 경로는 계속 realtime.events가 담당합니다)
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from equipment.models import Equipment
+from workouts.models import Reservation, UsageSession
+
+from .live import bump_live_version
+
+
+def _bump_on_commit(gym_id=None, equipment_id=None):
+    def bump():
+        target = gym_id
+        if target is None:
+            target = Equipment.objects.filter(pk=equipment_id).values_list('gym_id', flat=True).first()
+        if target is not None:
+            bump_live_version(target)
+
+    transaction.on_commit(bump)
+
+
+@receiver([post_save, post_delete], sender=Equipment, dispatch_uid='gyms.live.equipment')
+def equipment_changed(sender, instance, **kwargs):
+    _bump_on_commit(gym_id=instance.gym_id)
+
+
+@receiver([post_save, post_delete], sender=UsageSession, dispatch_uid='gyms.live.session')
+@receiver([post_save, post_delete], sender=Reservation, dispatch_uid='gyms.live.reservation')
+def equipment_activity_changed(sender, instance, **kwargs):
+    # 기구가 이미 로드되어 있으면 추가 조회 없이 헬스장을 알 수 있음
+    if sender._meta.get_field('equipment').is_cached(instance):
+        _bump_on_commit(gym_id=instance.equipment.gym_id)
+    else:
+        _bump_on_commit(equipment_id=instance.equipment_id)
@@ -1,3 +1,131 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from equipment.models import Equipment
+from workouts.models import Reservation, UsageSession
+from .checks import check_live_cache
+from .live import _version_key
+from .models import Gym
+
+
+class GymLiveSnapshotTests(TestCase):
+    def setUp(self):
+        # 버전은 프로세스끼리 공유하는 캐시가 필요하므로 파일 캐시(여러 프로세스가 같은 디렉터리를 봄)로 테스트
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        shared_cache = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': self.cache_dir},
+        })
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+        cache.clear()
+        owner = User.objects.create_user(username='owner', password='pw')
+        self.gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipments = [
+            Equipment.objects.create(
+                gym=self.gym, name=f'machine{i}', type='STRENGTH', nfc_tag_id=f'nfc-{i}', arduino_id=f'ard-{i}'
+            )
+            for i in range(5)
+        ]
+        self.members = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.members[0])
+        self.url = f'/api/gyms/{self.gym.id}/live/'
+
+    def test_snapshot_uses_one_query_regardless_of_equipment_count(self):
+        busy = self.equipments[0]
+        busy.status = 'IN_USE'
+        busy.save()
+        session = UsageSession.objects.create(user=self.members[0], equipment=busy, allocated_duration_minutes=20)
+        UsageSession.objects.filter(pk=session.pk).update(start_time=timezone.now() - datetime.timedelta(minutes=5))
+        for member in self.members[1:]:
+            Reservation.objects.create(user=member, equipment=busy, status='WAITING')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        equipments = {e['id']: e for e in response.data['equipments']}
+        self.assertEqual(len(equipments), 5)
+        self.assertEqual(equipments[busy.id]['status'], 'IN_USE')
+        self.assertEqual(equipments[busy.id]['waiting_count'], 2)
+        self.assertAlmostEqual(equipments[busy.id]['current_session']['remaining_seconds'], 15 * 60, delta=5)
+        self.assertIsNone(equipments[self.equipments[1].id]['current_session'])
+
+        # 캐시된 스냅샷은 DB를 조회하지 않음
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_etag_returns_304_until_the_queue_changes(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/workouts/join-queue/', {'equipment_id': self.equipments[2].id}, format='json')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        waiting = {e['id']: e['waiting_count'] for e in response.data['equipments']}
+        self.assertEqual(waiting[self.equipments[2].id], 1)
+
+    def test_viewset_and_admin_writes_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/equipment/{self.equipments[1].id}/', {'status': 'IN_USE'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        statuses = {e['id']: e['status'] for e in response.data['equipments']}
+        self.assertEqual(statuses[self.equipments[1].id], 'IN_USE')
+
+        # 기구를 불러오지 않은 모델 저장(admin 등)도 버전을 올림
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(user=self.members[1], equipment_id=self.equipments[3].id, status='WAITING')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_version_bump_from_another_process_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # 다른 프로세스(워커)의 캐시 인스턴스에서 버전을 올림
+        other_process_cache = FileBasedCache(self.cache_dir, {})
+        other_process_cache.incr(_version_key(self.gym.id))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_disables_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+        # 다른 프로세스의 변경을 알 수 없으므로 If-None-Match를 무시하고 매번 새로 조회
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'W/"gym-{self.gym.id}-None"')
+        self.assertEqual(response.status_code, 200)
+
+        with override_settings(DEBUG=False):
+            self.assertEqual([warning.id for warning in check_live_cache(None)], ['gyms.W001'])
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_live_cache(None), [])
+
+    def test_unknown_gym_returns_404(self):
+        self.assertEqual(self.client.get('/api/gyms/999999/live/').status_code, 404)
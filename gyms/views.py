@@ -6,13 +6,20 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.http import Http404
+from django.utils.cache import patch_cache_control
+from backend.query_budget import query_budget
+from .live import get_live_snapshot, get_live_version, live_cache_is_shared, with_remaining_time
 from .models import Gym, GymMembership
 from .serializers import GymSerializer, GymMembershipSerializer, MyGymSerializer
+from .services import scope_to_user
 
+@query_budget(6, list=2, retrieve=2, my_gym=5, live=2)
 class GymViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated] # <- 이 줄 추가
     queryset = Gym.objects.all()
     serializer_class = GymSerializer
+    cursor_ordering = 'id'
     
     @action(detail=False, methods=['get', 'post'], url_path='my-gym')
     def my_gym(self, request):
@@ -77,7 +84,45 @@ class GymViewSet(viewsets.ModelViewSet):
             serializer = MyGymSerializer(membership)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'], url_path='live')
+    def live(self, request, pk=None):
+        """
+        헬스장의 모든 기구 현황을 한 번에 조회합니다. (기구별 폴링 대체)
+        기구 상태/운영 상태/대기 인원/진행 중 세션(종료 예정 시각, 남은 초)을 반환합니다.
+
+        응답의 ETag를 If-None-Match로 보내면 변경이 없을 때 DB 조회 없이 304를 돌려줍니다.
+        (공유 캐시가 아니면 다른 프로세스의 변경을 알 수 없으므로 ETag 없이 항상 새로 조회)
+        """
+        try:
+            gym_id = int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+
+        shared = live_cache_is_shared()
+        version = get_live_version(gym_id) if shared else None
+        etag = f'W/"gym-{gym_id}-{version}"'
+        if shared and etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            snapshot = get_live_snapshot(gym_id, version)
+            # 기구가 하나도 없을 때만 헬스장 존재 여부를 확인
+            if not snapshot['equipments'] and not Gym.objects.filter(pk=gym_id).exists():
+                raise Http404
+            response = Response(with_remaining_time(snapshot))
+        if shared:
+            response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+@query_budget(6, list=3, retrieve=4)
 class GymMembershipViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated] # <- 이 줄 추가
     queryset = GymMembership.objects.all()
-    serializer_class = GymMembershipSerializer
\ No newline at end of file
+    serializer_class = GymMembershipSerializer
+    cursor_ordering = '-id'
+    max_page_size = 100
+
+    def get_queryset(self):
+        # 본인 가입 정보 (운영자는 관리 헬스장의 가입 신청 포함)
+        queryset = scope_to_user(GymMembership.objects.all(), self.request.user, 'user', 'gym_id')
+        return queryset.select_related('user', 'gym')
@@ -0,0 +1,172 @@
+# realtime/broker.py
+"""
+실시간 이벤트 팬아웃(fan-out) 브로커
+
+- InProcessBroker: 같은 프로세스 안의 구독자에게만 전달 (테스트/단일 프로세스 개발용)
+- RedisBroker: Redis pub/sub으로 모든 프로세스에 전달. 프로세스마다 Redis 구독은 하나만 두고
+  받은 메시지를 그 프로세스의 구독자(SSE 연결)들에게 나눠 줍니다.
+
+연결이 수천 개여도 DB는 조회하지 않으며, 메시지는 발행 시 한 번만 JSON으로 직렬화됩니다.
+settings.REALTIME_BROKER 에 사용할 클래스 경로를 지정합니다.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    하나의 SSE 연결이 구독하는 채널 묶음.
+    이벤트 루프 스레드에서 만들고, 메시지는 loop.call_soon_threadsafe로 그 루프의 큐에 넣습니다.
+    큐가 가득 차면(느린 클라이언트) 오래 기다리지 않고 메시지를 버립니다.
+    """
+
+    def __init__(self, broker, channels, loop, max_queue_size):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+
+    def _deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def get(self):
+        """ 다음 메시지(JSON 문자열)를 기다립니다. """
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """ 현재 프로세스의 구독자에게만 이벤트를 전달하는 브로커. publish는 어느 스레드에서 호출해도 됩니다. """
+
+    def __init__(self, max_queue_size=None):
+        self.max_queue_size = max_queue_size or getattr(settings, 'REALTIME_QUEUE_SIZE', 100)
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode(event):
+        return json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+    def subscribe(self, channels):
+        """ 실행 중인 이벤트 루프 안에서 호출해야 합니다. (async view) """
+        subscription = Subscription(self, channels, asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel, event):
+        self.dispatch(channel, self.encode(event))
+
+    def dispatch(self, channel, message):
+        """ 직렬화된 메시지를 채널 구독자들에게 전달하고, 전달한 구독자 수를 반환합니다. """
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, message)
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힌 연결
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+
+class RedisBroker(InProcessBroker):
+    """
+    발행은 Redis PUBLISH, 수신은 프로세스당 하나의 PSUBSCRIBE 스레드가 맡습니다.
+    수신 스레드는 첫 구독 때 시작하며, fork 된 프로세스에서는 새로 시작합니다.
+    """
+
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, url=None, prefix=None, client=None, max_queue_size=None):
+        super().__init__(max_queue_size=max_queue_size)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or settings.REALTIME_REDIS_URL)
+        self.client = client
+        self.prefix = prefix or getattr(settings, 'REALTIME_REDIS_PREFIX', 'healthqueue:events')
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, channel, event):
+        self.client.publish(f'{self.prefix}:{channel}', self.encode(event))
+
+    def subscribe(self, channels):
+        self._ensure_listener()
+        return super().subscribe(channels)
+
+    def _ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            thread = threading.Thread(target=self._listen, name='realtime-redis-listener', daemon=True)
+            thread.start()
+            self._listener_pid = os.getpid()
+
+    def _listen(self):
+        pattern = f'{self.prefix}:*'
+        offset = len(self.prefix) + 1
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(pattern)
+                for item in pubsub.listen():
+                    if item.get('type') != 'pmessage':
+                        continue
+                    channel, data = item['channel'], item['data']
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    self.dispatch(channel[offset:], data)
+            except Exception:
+                logger.exception('realtime Redis listener disconnected; reconnecting')
+                time.sleep(self.RECONNECT_DELAY_SECONDS)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """ settings.REALTIME_BROKER 로 지정된 프로세스 전역 브로커를 반환합니다. """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'REALTIME_BROKER', 'realtime.broker.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
@@ -0,0 +1,111 @@
+# realtime/events.py
+"""
+뷰/대기열 서비스에서 호출하는 이벤트 발행 함수
+
+- gym:<id> 채널: 기구 상태 변경(equipment_status), 대기 인원 변경(queue)
+- user:<id> 채널: 내 예약 상태 변경(reservation: joined/notified/expired/cancelled/completed)
+
+이벤트는 transaction.on_commit으로 커밋 이후에만 발행되므로 롤백된 변경은 전송되지 않습니다.
+발행 실패는 요청 처리에 영향을 주지 않고 로그만 남깁니다.
+
+기구/대기열 변경 시에는 REALTIME_ENABLED와 관계없이 헬스장 현황 스냅샷 버전도 올립니다. (gyms.live)
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .broker import get_broker
+
+logger = logging.getLogger(__name__)
+
+
+def gym_channel(gym_id):
+    return f'gym:{gym_id}'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def _enabled():
+    return getattr(settings, 'REALTIME_ENABLED', True)
+
+
+def _publish_on_commit(build, gym_ids=()):
+    """
+    커밋 후 gym_ids 헬스장의 현황 버전을 올리고, build()가 돌려준 (channel, event) 목록을 발행합니다.
+    build()가 (gym_ids, messages) 튜플을 돌려주면 그 gym_ids를 사용합니다.
+    """
+    def send():
+        try:
+            from gyms.live import bump_live_version
+
+            messages = build()
+            changed_gyms = gym_ids
+            if isinstance(messages, tuple):
+                changed_gyms, messages = messages
+            for gym_id in changed_gyms:
+                bump_live_version(gym_id)
+            if _enabled():
+                for channel, event in messages:
+                    get_broker().publish(channel, event)
+        except Exception:
+            logger.exception('realtime event publish failed')
+
+    transaction.on_commit(send)
+
+
+def equipment_status_changed(equipment):
+    """ 기구 상태(AVAILABLE/IN_USE, 운영 상태 등)가 바뀌었음을 체육관 채널에 알립니다. """
+    event = {
+        'type': 'equipment_status',
+        'equipment_id': equipment.id,
+        'status': equipment.status,
+        'operational_state': equipment.operational_state,
+    }
+    channel = gym_channel(equipment.gym_id)
+    _publish_on_commit(lambda: [(channel, event)], gym_ids=[equipment.gym_id])
+
+
+def queue_changed(equipment_ids):
+    """ 기구들의 대기 인원이 바뀌었음을 체육관 채널에 알립니다. (인원은 커밋 후 대기열 엔진에서 조회) """
+    equipment_ids = sorted(set(equipment_ids))
+    if not equipment_ids:
+        return
+
+    def build():
+        from equipment.models import Equipment
+        from workouts.queue_engine import get_queue_engine
+
+        gym_ids = dict(Equipment.objects.filter(id__in=equipment_ids).values_list('id', 'gym_id'))
+        if not _enabled():
+            return set(gym_ids.values()), []
+        engine = get_queue_engine()
+        return set(gym_ids.values()), [
+            (gym_channel(gym_ids[eq_id]), {
+                'type': 'queue',
+                'equipment_id': eq_id,
+                'waiting_count': engine.length(eq_id),
+            })
+            for eq_id in equipment_ids if eq_id in gym_ids
+        ]
+
+    _publish_on_commit(build)
+
+
+def reservation_changed(reservation, event_name, **extra):
+    """ 예약 당사자에게 예약 상태 변경을 알립니다. (예: notified → 기구로 이동하라는 신호) """
+    if not _enabled():
+        return
+    event = {
+        'type': 'reservation',
+        'event': event_name,
+        'reservation_id': reservation.id,
+        'equipment_id': reservation.equipment_id,
+        'status': reservation.status,
+        'notified_at': reservation.notified_at,
+        **extra,
+    }
+    channel = user_channel(reservation.user_id)
+    _publish_on_commit(lambda: [(channel, event)])
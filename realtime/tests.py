@@ -0,0 +1,138 @@
+import asyncio
+import datetime
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from equipment.models import Equipment
+from gyms.models import Gym, GymMembership
+from workouts.models import Reservation, UsageSession
+from .broker import InProcessBroker
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    def test_events_published_from_other_threads_reach_every_subscriber(self):
+        broker = InProcessBroker(max_queue_size=10)
+
+        async def scenario():
+            first = broker.subscribe(['gym:1'])
+            second = broker.subscribe(['gym:1', 'user:7'])
+            other = broker.subscribe(['gym:2'])
+
+            publisher = threading.Thread(target=broker.publish, args=('gym:1', {'type': 'queue', 'waiting_count': 3}))
+            publisher.start()
+            publisher.join()
+
+            received = [json.loads(await asyncio.wait_for(sub.get(), 1)) for sub in (first, second)]
+            self.assertTrue(other.queue.empty())
+            for sub in (first, second, other):
+                sub.close()
+            return received
+
+        received = asyncio.run(scenario())
+        self.assertEqual(received, [{'type': 'queue', 'waiting_count': 3}] * 2)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_slow_subscriber_drops_messages_instead_of_blocking(self):
+        broker = InProcessBroker(max_queue_size=2)
+
+        async def scenario():
+            sub = broker.subscribe(['gym:1'])
+            for i in range(5):
+                broker.publish('gym:1', {'i': i})
+            await asyncio.sleep(0)
+            sub.close()
+            return sub
+
+        sub = asyncio.run(scenario())
+        self.assertEqual(sub.queue.qsize(), 2)
+        self.assertEqual(sub.dropped, 3)
+
+
+@override_settings(REALTIME_HEARTBEAT_SECONDS=5)
+class EventStreamViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='member', password='pw')
+        owner = User.objects.create_user(username='owner', password='pw')
+        cls.gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        cls.other_gym = Gym.objects.create(owner=owner, name='other gym', address='addr')
+        GymMembership.objects.create(user=cls.user, gym=cls.gym, status='APPROVED')
+
+    async def test_stream_requires_a_valid_token(self):
+        response = await self.async_client.get('/api/realtime/events/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get('/api/realtime/events/', {'token': 'invalid'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_delivers_user_and_gym_events(self):
+        broker = InProcessBroker()
+        token = str(AccessToken.for_user(self.user))
+
+        with mock.patch('realtime.views.get_broker', return_value=broker):
+            response = await self.async_client.get('/api/realtime/events/', {'token': token, 'gym_id': self.gym.id})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+            stream = response.streaming_content
+            self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+            broker.publish(f'user:{self.user.id}', {'type': 'reservation', 'event': 'notified'})
+            broker.publish(f'gym:{self.other_gym.id}', {'type': 'queue'}) # 구독하지 않은 체육관
+            broker.publish(f'gym:{self.gym.id}', {'type': 'equipment_status', 'status': 'AVAILABLE'})
+
+            chunks = [await asyncio.wait_for(anext(stream), 1) for _ in range(2)]
+            await stream.aclose()
+
+        self.assertEqual(chunks[0], b'event: message\ndata: {"type": "reservation", "event": "notified"}\n\n')
+        self.assertIn(b'"status": "AVAILABLE"', chunks[1])
+
+    async def test_stream_rejects_gyms_the_user_does_not_belong_to(self):
+        token = str(AccessToken.for_user(self.user))
+        broker = InProcessBroker()
+
+        with mock.patch('realtime.views.get_broker', return_value=broker):
+            response = await self.async_client.get(
+                '/api/realtime/events/', {'token': token, 'gym_id': [self.gym.id, self.other_gym.id]}
+            )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(json.loads(response.content)['gym_ids'], [self.other_gym.id])
+        self.assertEqual(broker.subscriber_count(), 0)
+
+
+class QueueEventEmissionTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='pw')
+        self.gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipment = Equipment.objects.create(
+            gym=self.gym, name='rack', type='STRENGTH', nfc_tag_id='nfc-rack', arduino_id='ard-rack', status='IN_USE'
+        )
+        self.member = User.objects.create_user(username='member', password='pw')
+        self.waiter = User.objects.create_user(username='waiter', password='pw')
+
+    def test_ending_a_session_pushes_status_and_notification_after_commit(self):
+        session = UsageSession.objects.create(user=self.member, equipment=self.equipment, allocated_duration_minutes=15)
+        UsageSession.objects.filter(pk=session.pk).update(start_time=timezone.now() - datetime.timedelta(minutes=10))
+        reservation = Reservation.objects.create(user=self.waiter, equipment=self.equipment, status='WAITING')
+        client = APIClient()
+        client.force_authenticate(self.member)
+        broker = mock.Mock()
+
+        with mock.patch('realtime.events.get_broker', return_value=broker), \
+                override_settings(RESERVATION_EXPIRY_SCHEDULING=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post('/api/workouts/end/')
+
+        published = {(channel, event['type']): event for (channel, event), _ in broker.publish.call_args_list}
+        gym, user = f'gym:{self.gym.id}', f'user:{self.waiter.id}'
+        self.assertEqual(published[(gym, 'equipment_status')]['status'], 'AVAILABLE')
+        self.assertEqual(published[(gym, 'queue')]['waiting_count'], 0)
+        notified = published[(user, 'reservation')]
+        self.assertEqual((notified['event'], notified['reservation_id']), ('notified', reservation.id))
+        self.assertIn('expires_at', notified)
@@ -0,0 +1,8 @@
+# realtime/urls.py
+
+from django.urls import path
+from .views import event_stream
+
+urlpatterns = [
+    path('events/', event_stream, name='realtime-events'),
+]
@@ -0,0 +1,94 @@
+# realtime/views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from gyms.services import get_managed_gym_ids
+
+from .broker import get_broker
+from .events import gym_channel, user_channel
+
+
+def _authenticate(request):
+    """
+    Authorization: Bearer <access> 헤더 또는 ?token=<access> 로 사용자를 확인합니다.
+    (브라우저 EventSource는 헤더를 지정할 수 없어 쿼리 파라미터도 허용)
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _forbidden_gym_ids(user, gym_ids):
+    """ 구독할 수 없는 체육관 id (소유하거나 가입 승인된 체육관만 허용, superuser는 전체) """
+    if not gym_ids or user.is_superuser:
+        return []
+    allowed = set(
+        get_managed_gym_ids(user).filter(id__in=gym_ids).values_list('id', flat=True)
+    )
+    return [gym_id for gym_id in gym_ids if gym_id not in allowed]
+
+
+def format_sse(message, event='message'):
+    return f'event: {event}\ndata: {message}\n\n'
+
+
+async def _stream(subscription):
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 15)
+    try:
+        # 연결이 끊기면 클라이언트(EventSource)가 3초 후 재연결
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # 프록시/로드밸런서가 유휴 연결을 끊지 않도록 주석 라인 전송
+                yield ': keep-alive\n\n'
+                continue
+            yield format_sse(message)
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def event_stream(request):
+    """
+    Server-Sent Events 스트림 (ASGI 서버에서만 동작: uvicorn backend.asgi:application)
+
+    GET /api/realtime/events/?gym_id=1[&gym_id=2][&token=<access>]
+    - 항상 내 예약 이벤트(user:<id>)를 받고, gym_id로 지정한 체육관의 기구/대기열 이벤트를 함께 받습니다.
+      gym_id는 소유하거나 가입 승인된 체육관만 지정할 수 있습니다. (그 외는 403)
+    - 연결당 DB 조회는 인증과 체육관 권한 확인뿐이며 이후 이벤트는 브로커에서만 받습니다.
+    """
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': '인증 정보가 유효하지 않습니다.'}, status=401)
+
+    try:
+        gym_ids = sorted({int(value) for value in request.GET.getlist('gym_id')})
+    except ValueError:
+        return JsonResponse({'error': 'gym_id는 숫자여야 합니다.'}, status=400)
+
+    forbidden = await sync_to_async(_forbidden_gym_ids)(user, gym_ids)
+    if forbidden:
+        return JsonResponse({'error': '구독 권한이 없는 체육관입니다.', 'gym_ids': forbidden}, status=403)
+
+    channels = [user_channel(user.id)] + [gym_channel(gym_id) for gym_id in gym_ids]
+    subscription = get_broker().subscribe(channels)
+
+    response = StreamingHttpResponse(_stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx가 스트림을 버퍼링하지 않도록
+    response['X-Accel-Buffering'] = 'no'
+    return response
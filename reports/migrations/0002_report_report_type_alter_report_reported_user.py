@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='report_type',
+            field=models.CharField(choices=[('malfunction', 'Malfunction'), ('violation', 'User Violation'), ('other', 'Other')], default='other', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='reported_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='received_reports', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -4,14 +4,24 @@ from django.shortcuts import render
 from rest_framework import viewsets
 # IsAuthenticated를 import 합니다.
 from rest_framework.permissions import IsAuthenticated
+from backend.query_budget import query_budget
+from gyms.services import scope_to_user
 from .models import Report
 from .serializers import ReportSerializer
 
+@query_budget(6, list=3, retrieve=4, create=4)
 class ReportViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated] # <- 이 줄 추가
     queryset = Report.objects.all()
     serializer_class = ReportSerializer
-    
+    cursor_ordering = ('-created_at', '-id')
+    max_page_size = 100
+
+    def get_queryset(self):
+        # 본인이 작성한 신고 (운영자는 관리 헬스장 기구에 대한 신고 포함)
+        queryset = scope_to_user(Report.objects.all(), self.request.user, 'reporter', 'equipment__gym_id')
+        return queryset.select_related('reporter', 'reported_user', 'equipment')
+
     def perform_create(self, serializer):
         # 신고를 생성할 때 자동으로 reporter를 현재 로그인한 사용자로 설정
         serializer.save(reporter=self.request.user)
\ No newline at end of file
@@ -5,7 +5,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from openai import OpenAI
+from openai import APIError
+
+from backend.clients import get_openai_client
 from equipment.models import Equipment
 from gyms.models import GymMembership
 
@@ -50,12 +52,16 @@ class GenerateRoutineView(APIView):
         """
 
         # 4. OpenAI API 호출 (실제 구현)
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
+        # 클라이언트는 프로세스마다 하나를 재사용합니다. (연결 풀, 타임아웃, 재시도: backend.clients)
+        client = get_openai_client()
+        try:
+            response = client.chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"}
+            )
+        except APIError:
+            return Response({'error': '루틴 생성 서비스에 연결할 수 없습니다. 잠시 후 다시 시도해주세요.'}, status=status.HTTP_502_BAD_GATEWAY)
         routine_data = response.choices[0].message.content
 
         
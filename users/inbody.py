@@ -0,0 +1,145 @@
+# users/inbody.py
+"""
+인바디 결과지 분석
+
+업로드(InbodyAnalyzeView)는 이미지를 저장하고 InbodyJob만 만든 뒤 바로 응답하며,
+Celery 태스크(users.tasks.analyze_inbody)가 run_job()으로
+결과 캐시 조회(users.ocr_cache) → 전처리(users.preprocess) → OCR(users.ocr) → 파싱(users.inbody_parser)
+→ (선택) 프로필 반영을 수행합니다.
+결과는 GET /api/inbody/jobs/<id>/ 로 조회합니다.
+
+작업을 선점한 워커가 중간에 죽으면 작업이 PROCESSING에 남으므로, INBODY_JOB_TIMEOUT_SECONDS가 지난
+PROCESSING 작업은 다시 선점할 수 있고 주기적 태스크(users.tasks.recover_inbody_jobs)가 다시 등록합니다.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ocr_cache, preprocess
+from .inbody_parser import FIELDS, parse_detections
+from .models import InbodyJob, UserProfile
+from .ocr import get_ocr_backend
+
+logger = logging.getLogger(__name__)
+
+# auto_apply 시 반영하는 UserProfile 필드 (파서 필드 이름과 같음, 값이 있는 항목만 덮어씀)
+PROFILE_FIELDS = FIELDS
+# 멈춘 작업을 다시 시도하는 최대 횟수 (등록 후 타임아웃 x 이 값이 지나면 실패 처리)
+MAX_JOB_ATTEMPTS = 3
+
+
+def get_job_timeout():
+    return datetime.timedelta(seconds=getattr(settings, 'INBODY_JOB_TIMEOUT_SECONDS', 600))
+
+
+def _claimable(now):
+    """ 선점할 수 있는 작업: PENDING, 또는 타임아웃이 지나도록 끝나지 않은 PROCESSING (워커가 죽은 경우) """
+    return Q(status=InbodyJob.PENDING) | Q(status=InbodyJob.PROCESSING, started_at__lt=now - get_job_timeout())
+
+
+def apply_to_profile(user, parsed):
+    """ 파싱된 값 중 None이 아닌 항목을 사용자 프로필에 저장합니다. 반환값: 갱신한 필드 목록 """
+    values = {field: parsed[field] for field in PROFILE_FIELDS if parsed.get(field) is not None}
+    if not values:
+        return []
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    for field, value in values.items():
+        setattr(profile, field, value)
+    profile.save(update_fields=list(values))
+    return list(values)
+
+
+def detect_text(image_bytes):
+    """ 전처리(users.preprocess: 회전/흑백/축소)한 이미지로 OCR 백엔드를 호출합니다. """
+    if preprocess.is_enabled():
+        image_bytes = preprocess.prepare_for_ocr(image_bytes)
+    return get_ocr_backend().detect_text(image_bytes)
+
+
+def analyze_image(user_id, image_bytes):
+    """
+    이미지 → 파싱 결과. 같은 사용자가 올린 같은(비슷한) 이미지의 결과가 캐시에 있으면 OCR을 호출하지 않습니다.
+    반환값: (result, InbodyJob.ocr_source)
+    """
+    if not ocr_cache.is_enabled():
+        return parse_detections(detect_text(image_bytes)), InbodyJob.SOURCE_OCR
+
+    content_key, perceptual_key = ocr_cache.fingerprint(image_bytes)
+    entry, source = ocr_cache.lookup(user_id, content_key, perceptual_key)
+    if entry is not None:
+        return entry.result, source
+
+    detections = detect_text(image_bytes)
+    result = parse_detections(detections)
+    ocr_cache.store(user_id, content_key, perceptual_key, detections, result)
+    return result, InbodyJob.SOURCE_OCR
+
+
+def run_job(job_id):
+    """
+    PENDING 작업 하나를 처리합니다. 같은 작업이 두 번 전달되어도 한 번만 처리됩니다. (PENDING → PROCESSING 선점)
+    INBODY_JOB_TIMEOUT_SECONDS 동안 끝나지 않은 PROCESSING 작업은 다시 선점해 처리합니다.
+    처리 후 업로드 이미지는 삭제합니다. 반환값: 최종 상태 (선점하지 못했으면 None)
+    """
+    now = timezone.now()
+    claimed = InbodyJob.objects.filter(_claimable(now), pk=job_id).update(
+        status=InbodyJob.PROCESSING, started_at=now
+    )
+    if not claimed:
+        return None
+
+    job = InbodyJob.objects.get(pk=job_id)
+    try:
+        with job.image.open('rb') as image:
+            image_bytes = image.read()
+        result, job.ocr_source = analyze_image(job.user_id, image_bytes)
+        with transaction.atomic():
+            # 지각 해시로 찾은 결과는 숫자만 다른 다른 결과지일 수 있으므로 프로필에 반영하지 않습니다.
+            if job.auto_apply and job.ocr_source != InbodyJob.SOURCE_CACHE_SIMILAR:
+                job.applied_fields = apply_to_profile(job.user, result['parsed'])
+            job.result = result
+            job.status = InbodyJob.SUCCEEDED
+            job.finished_at = timezone.now()
+            job.save(update_fields=['result', 'ocr_source', 'applied_fields', 'status', 'finished_at'])
+    except Exception as exc:
+        logger.exception('Inbody analyze failed (job %s)', job_id)
+        job.status = InbodyJob.FAILED
+        job.error = str(exc)[:500]
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+    finally:
+        job.image.delete(save=False)
+        InbodyJob.objects.filter(pk=job_id).update(image='')
+    return job.status
+
+
+def fail_job(job_id, error):
+    """ 분석 태스크를 등록하지 못한 작업을 실패로 기록합니다. """
+    InbodyJob.objects.filter(pk=job_id, status=InbodyJob.PENDING).update(
+        status=InbodyJob.FAILED, error=error[:500], finished_at=timezone.now()
+    )
+
+
+def recover_stale_jobs(now=None):
+    """
+    타임아웃이 지나도록 끝나지 않은 작업(워커 종료, 태스크 유실)을 찾습니다.
+    등록 후 타임아웃 x MAX_JOB_ATTEMPTS가 지난 작업은 실패로 기록하고 이미지를 지웁니다.
+    반환값: 다시 등록해야 할 작업 id 목록
+    """
+    now = now or timezone.now()
+    timeout = get_job_timeout()
+    stale = InbodyJob.objects.filter(
+        Q(status=InbodyJob.PENDING, created_at__lt=now - timeout)
+        | Q(status=InbodyJob.PROCESSING, started_at__lt=now - timeout)
+    )
+    for job in stale.filter(created_at__lt=now - timeout * MAX_JOB_ATTEMPTS).only('id', 'image'):
+        failed = InbodyJob.objects.filter(pk=job.pk, status__in=[InbodyJob.PENDING, InbodyJob.PROCESSING]).update(
+            status=InbodyJob.FAILED, error='Inbody analysis timed out', finished_at=now, image=''
+        )
+        if failed and job.image:
+            job.image.delete(save=False)
+    return list(stale.filter(created_at__gte=now - timeout * MAX_JOB_ATTEMPTS).values_list('id', flat=True))
@@ -0,0 +1,123 @@
+# users/inbody_parser.py
+"""
+인바디 결과지 OCR 텍스트 파서
+
+OCR 결과의 LINE 텍스트를 한 번씩만 훑으면서, 미리 컴파일한 토큰 정규식 하나로
+항목 이름(라벨)과 숫자를 등장 순서대로 읽어 모든 필드를 채웁니다.
+
+- 라벨 바로 뒤(같은 줄, 다음 라벨 전)에서 나오는 첫 번째 그럴듯한 숫자가 그 항목의 값입니다.
+- 같은 줄에서 값을 못 찾은 라벨은 다음 두 줄까지 기다리며, 라벨이 앞서지 않은 숫자를 라벨 순서대로 받습니다.
+  ("체중 골격근량 체지방률" / "70.8 31.2 22.5" 처럼 이름과 값이 다른 줄로 인식된 표 형태)
+- 항목마다 처음 찾은 값만 사용합니다. (부위별 근육분석 뒤의 부위별 체지방분석 값은 무시)
+- 라벨을 못 찾은 체중/체지방률/BMI는 라벨과 짝지어지지 않은 'N kg' / 'N %' / 'N BMI' 숫자로 대신합니다.
+- 항목별 범위를 벗어난 숫자(정상 범위 표기, 단위의 2 등)는 값으로 쓰지 않습니다.
+- 전각 문자는 NFKC로 정규화하고 소문자로 바꾼 뒤 읽으며, 숫자 안의 쉼표는 소수점으로 읽습니다.
+  (OCR이 '.'을 ','로 자주 읽음)
+
+Django에 의존하지 않으므로 벤치마크(bench_inbody_parser 명령)와 테스트에서 그대로 사용할 수 있습니다.
+"""
+import re
+import unicodedata
+
+# (필드, 라벨 정규식(소문자), 허용 범위). 같은 위치에서 겹치는 라벨은 더 긴 것이 먼저 오도록 정렬되어 있습니다.
+# (체지방량 → 체지방률 → 체지방, Body Fat Mass → Body Fat)
+LABELS = (
+    ('body_fat_mass_kg', r'체지방량|body\s*fat\s*mass|bfm', (0.5, 200)),
+    ('body_fat_percentage', r'체지방률|체지방율|체지방|percent\s*body\s*fat|pbf|body\s*fat|bodyfat', (2, 75)),
+    ('skeletal_muscle_mass_kg', r'골격근량|골격근|skeletal\s*muscle(?:\s*mass)?|smm', (5, 80)),
+    ('weight_kg', r'체중|몸무게|weight', (20, 300)),
+    ('bmi', r'체질량\s*지수|bmi', (10, 70)),
+    ('inbody_score', r'인바디\s*점수|inbody\s*score', (0, 100)),
+    ('segment_right_arm_kg', r'(?:오른|우)\s*팔|right\s*arm', (0.3, 20)),
+    ('segment_left_arm_kg', r'(?:왼|좌)\s*팔|left\s*arm', (0.3, 20)),
+    ('segment_trunk_kg', r'몸통|trunk', (3, 70)),
+    ('segment_right_leg_kg', r'(?:오른|우)\s*(?:다리|하지)|right\s*leg', (1, 40)),
+    ('segment_left_leg_kg', r'(?:왼|좌)\s*(?:다리|하지)|left\s*leg', (1, 40)),
+)
+FIELDS = tuple(field for field, _, _ in LABELS)
+RANGES = {field: bounds for field, _, bounds in LABELS}
+
+# 라벨과 짝지어지지 않은 숫자의 단위로 대신 채우는 항목
+UNIT_FALLBACKS = {'kg': 'weight_kg', '%': 'body_fat_percentage', 'bmi': 'bmi'}
+
+# 라벨 | 괄호 단위 표기(건너뜀) | 숫자(+단위). 입력은 소문자로 바꾼 줄이므로 IGNORECASE를 쓰지 않습니다.
+TOKEN_RE = re.compile(
+    '|'.join(f'(?P<{field}>{pattern})' for field, pattern, _ in LABELS)
+    + r'|(?P<unit_note>\((?:kg|l|%|cm|kg/m2|점)\))'
+    + r'|(?P<number>(?P<digits>[0-9]+(?:[.,][0-9]+)?)\s*(?P<unit>kg|%|퍼센트|bmi)?)'
+)
+UNIT_ALIASES = {'퍼센트': '%'}
+LOOKAHEAD_LINES = 2
+
+
+def _plausible(field, value):
+    low, high = RANGES[field]
+    return low <= value <= high
+
+
+def parse_lines(lines):
+    """ 텍스트 줄 목록에서 FIELDS 값을 추출합니다. 반환값: {필드: float 또는 None} """
+    parsed = dict.fromkeys(FIELDS)
+    pending = []  # [필드, 마지막으로 기다릴 줄 번호] (같은 줄에서 값을 못 찾은 라벨)
+    fallbacks = {}
+
+    for index, text in enumerate(lines):
+        text = unicodedata.normalize('NFKC', text).lower()
+        pending = [entry for entry in pending if entry[1] >= index and parsed[entry[0]] is None]
+        current = None  # 이 줄에서 값을 기다리는 라벨
+
+        for token in TOKEN_RE.finditer(text):
+            kind = token.lastgroup
+            if kind == 'unit_note':
+                continue
+            if kind != 'number':
+                if current is not None and parsed[current] is None:
+                    pending.append([current, index + LOOKAHEAD_LINES])
+                current = kind
+                continue
+
+            value = float(token.group('digits').replace(',', '.'))
+            if current is not None:
+                if parsed[current] is None:
+                    if not _plausible(current, value):
+                        continue
+                    parsed[current] = value
+                current = None
+                continue
+
+            for entry in pending:
+                field = entry[0]
+                if parsed[field] is None and _plausible(field, value):
+                    parsed[field] = value
+                    pending.remove(entry)
+                    break
+            else:
+                unit = token.group('unit')
+                if unit:
+                    field = UNIT_FALLBACKS[UNIT_ALIASES.get(unit, unit)]
+                    if field not in fallbacks and _plausible(field, value):
+                        fallbacks[field] = value
+
+        if current is not None and parsed[current] is None:
+            pending.append([current, index + LOOKAHEAD_LINES])
+
+    for field, value in fallbacks.items():
+        if parsed[field] is None:
+            parsed[field] = value
+    return parsed
+
+
+def parse_detections(items):
+    """
+    OCR 결과(users.ocr 백엔드의 detect_text 반환값)에서 인바디 수치를 추출합니다.
+    LINE이 있으면 LINE만 사용합니다. (Rekognition은 같은 글자를 WORD로도 한 번 더 돌려줌)
+    반환값: {'parsed': {필드: 값}, 'raw_lines': [{'text', 'type', 'confidence'}, ...]}
+    """
+    lines = [it for it in items if it.get('type') == 'LINE'] or items
+    return {
+        'parsed': parse_lines([it['text'] for it in lines]),
+        'raw_lines': [
+            {'text': it['text'], 'type': it['type'], 'confidence': it.get('confidence')}
+            for it in items if it.get('type') == 'LINE'
+        ],
+    }
@@ -0,0 +1,64 @@
+"""
+기록해 둔 Rekognition detect_text 응답 모음(users/testdata/inbody/*.json)으로 인바디 파서의
+항목별 정확도와 처리량을 측정합니다.
+
+각 파일: {'description': 설명, 'expected': {필드: 값 또는 null}, 'response': detect_text 응답}
+Usage: python manage.py bench_inbody_parser [--iterations 500] [--corpus DIR] [--min-accuracy 1.0]
+"""
+import glob
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.inbody_parser import FIELDS, parse_detections
+from users.ocr import detections_from_response
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'testdata', 'inbody')
+
+
+class Command(BaseCommand):
+    help = 'Measures Inbody parser accuracy and throughput on recorded OCR responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500, help='처리량 측정 반복 횟수 (전체 모음 기준)')
+        parser.add_argument('--corpus', default=CORPUS_DIR, help='기록된 응답(JSON) 디렉터리')
+        parser.add_argument('--min-accuracy', type=float, default=None, help='항목 정확도 하한 (0~1, 미달이면 실패)')
+
+    def handle(self, *args, **options):
+        paths = sorted(glob.glob(os.path.join(options['corpus'], '*.json')))
+        if not paths:
+            raise CommandError(f"no *.json files in {options['corpus']}")
+        cases = []
+        for path in paths:
+            with open(path, encoding='utf-8') as fh:
+                document = json.load(fh)
+            cases.append((os.path.basename(path), document['expected'], detections_from_response(document['response'])))
+
+        correct = dict.fromkeys(FIELDS, 0)
+        for name, expected, detections in cases:
+            parsed = parse_detections(detections)['parsed']
+            misses = [f'{field}={parsed[field]} (expected {expected.get(field)})'
+                      for field in FIELDS if parsed[field] != expected.get(field)]
+            for field in FIELDS:
+                correct[field] += parsed[field] == expected.get(field)
+            self.stdout.write(f"{name:<34} {'ok' if not misses else 'MISS ' + ', '.join(misses)}")
+
+        started = time.perf_counter()
+        for _ in range(options['iterations']):
+            for _, _, detections in cases:
+                parse_detections(detections)
+        elapsed = time.perf_counter() - started
+        sheets = options['iterations'] * len(cases)
+
+        self.stdout.write('')
+        for field in FIELDS:
+            self.stdout.write(f'{field:<26} {correct[field]}/{len(cases)}')
+        accuracy = sum(correct.values()) / (len(FIELDS) * len(cases))
+        self.stdout.write(
+            f'accuracy {accuracy:.3f} over {len(cases)} sheets | '
+            f'{sheets / elapsed:.0f} sheets/s, {elapsed / sheets * 1e6:.1f} us/sheet'
+        )
+        if options['min_accuracy'] is not None and accuracy < options['min_accuracy']:
+            raise CommandError(f"accuracy {accuracy:.3f} is below {options['min_accuracy']}")
@@ -0,0 +1,104 @@
+"""
+OCR 전처리(users.preprocess) 전/후의 전송 바이트와 처리 시간을 비교합니다.
+
+이미지마다 원본과 전처리 결과를 각각 OCR 백엔드로 보내고,
+  end-to-end = 전처리 시간 + 업로드 시간 추정(바이트 / --uplink-mbps) + OCR 호출 시간
+을 출력합니다. 기본 백엔드는 settings.INBODY_OCR_BACKEND 이므로 Rekognition 자격 증명이 있으면 실제 호출 시간이,
+--backend users.ocr.StubOCR 이면 전처리/전송 추정만 비교됩니다. (Rekognition은 5MB를 넘는 원본을 거부함)
+
+--images 를 주지 않으면 휴대폰 사진과 비슷한 4032x3024 JPEG(EXIF 회전, 품질 92)을 --count 장 만들어 사용합니다.
+Usage: python manage.py bench_inbody_preprocess [--images DIR] [--count 5] [--backend users.ocr.StubOCR] [--uplink-mbps 20]
+"""
+import glob
+import io
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from users.ocr import OCRError
+from users.preprocess import prepare_for_ocr
+
+
+def _synthetic_photo(index, size=(4032, 3024)):
+    """ 종이 질감(노이즈) 위에 결과지 글자 줄이 있는, 세로로 찍혀 EXIF로 회전해야 하는 사진 """
+    from PIL import Image, ImageDraw
+    paper = Image.effect_noise(size, 18).point(lambda v: min(255, v + 95))
+    image = Image.merge('RGB', (paper, paper, paper.point(lambda v: max(0, v - 12))))
+    draw = ImageDraw.Draw(image)
+    for row in range(36):
+        draw.text((240, 160 + row * 76), f'Weight {60 + index + row * 0.3:.1f} kg   Body Fat {12 + row % 20}.4 %', fill=(20, 20, 20))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: 시계 방향 90도 회전 필요
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=92, exif=exif)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Compares bytes sent and end-to-end OCR latency with and without image preprocessing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', default=None, help='*.jpg / *.jpeg / *.png 이미지 디렉터리')
+        parser.add_argument('--count', type=int, default=5, help='--images 가 없을 때 만들 합성 사진 수')
+        parser.add_argument('--backend', default=None, help='OCR 백엔드 클래스 경로 (기본 settings.INBODY_OCR_BACKEND)')
+        parser.add_argument('--uplink-mbps', type=float, default=20.0, help='OCR 서비스로의 업로드 대역폭 추정치')
+
+    def handle(self, *args, **options):
+        images = self._load(options)
+        backend = import_string(options['backend'] or getattr(settings, 'INBODY_OCR_BACKEND', 'users.ocr.RekognitionOCR'))()
+        bytes_per_ms = options['uplink_mbps'] * 1_000_000 / 8 / 1000
+
+        totals = {'raw': [], 'prepared': []}
+        self.stdout.write(f"{'image':<24} {'raw KB':>9} {'prep KB':>9} {'prep ms':>8} {'e2e raw ms':>11} {'e2e prep ms':>12}")
+        for name, raw in images:
+            started = time.perf_counter()
+            prepared = prepare_for_ocr(raw)
+            prep_ms = (time.perf_counter() - started) * 1000
+
+            row = {}
+            for kind, payload, extra_ms in (('raw', raw, 0.0), ('prepared', prepared, prep_ms)):
+                ocr_ms = self._ocr_ms(backend, payload)
+                e2e = None if ocr_ms is None else extra_ms + len(payload) / bytes_per_ms + ocr_ms
+                totals[kind].append((len(payload), e2e))
+                row[kind] = '     error' if e2e is None else f'{e2e:>10.0f}'
+            self.stdout.write(
+                f'{name[:24]:<24} {len(raw) / 1024:>9.0f} {len(prepared) / 1024:>9.0f} {prep_ms:>8.0f} '
+                f"{row['raw']:>11} {row['prepared']:>12}"
+            )
+
+        self.stdout.write('')
+        for kind, rows in totals.items():
+            sizes = [size for size, _ in rows]
+            latencies = [e2e for _, e2e in rows if e2e is not None]
+            self.stdout.write(
+                f'{kind:<9} bytes sent: total {sum(sizes) / 1024 / 1024:.1f} MB, mean {statistics.mean(sizes) / 1024:.0f} KB | '
+                + (f'end-to-end median {statistics.median(latencies):.0f} ms' if latencies else 'end-to-end: all OCR calls failed')
+            )
+
+    def _load(self, options):
+        if options['images'] is None:
+            return [(f'synthetic-{index}.jpg', _synthetic_photo(index)) for index in range(options['count'])]
+        paths = sorted(
+            path for pattern in ('*.jpg', '*.jpeg', '*.png')
+            for path in glob.glob(os.path.join(options['images'], pattern))
+        )
+        if not paths:
+            raise CommandError(f"no images in {options['images']}")
+        images = []
+        for path in paths:
+            with open(path, 'rb') as fh:
+                images.append((os.path.basename(path), fh.read()))
+        return images
+
+    def _ocr_ms(self, backend, payload):
+        started = time.perf_counter()
+        try:
+            backend.detect_text(payload)
+        except OCRError as exc:
+            self.stderr.write(f'OCR failed ({len(payload)} bytes): {exc}')
+            return None
+        return (time.perf_counter() - started) * 1000
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_inbodyjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inbodyjob',
+            name='ocr_source',
+            field=models.CharField(blank=True, choices=[('OCR', 'OCR backend'), ('CACHE', 'Cache (same image)'), ('CACHE_SIMILAR', 'Cache (similar image)')], max_length=16),
+        ),
+        migrations.CreateModel(
+            name='InbodyOCRCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('perceptual_hash', models.CharField(blank=True, max_length=64)),
+                ('detections', models.JSONField()),
+                ('result', models.JSONField()),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'created_at'], name='inbody_ocr_user_created_idx'), models.Index(fields=['last_used_at'], name='inbody_ocr_last_used_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'content_hash'), name='unique_inbody_ocr_content')],
+            },
+        ),
+    ]
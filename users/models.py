@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class UserProfile(models.Model):
     # Django의 기본 User 모델과 1:1로 연결합니다.
@@ -53,4 +54,69 @@ class UserProfile(models.Model):
     experience_level = models.CharField(max_length=20, choices=EXPERIENCE_CHOICES, blank=True, null=True)
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return self.user.username
+
+class InbodyJob(models.Model):
+    """
+    인바디 결과지 분석 작업. 업로드 시 PENDING으로 만들고 Celery 태스크가 처리합니다. (users.inbody.run_job)
+    업로드 이미지는 처리 후 삭제하고 결과(parsed/raw_lines)만 남깁니다.
+    """
+    PENDING = 'PENDING'
+    PROCESSING = 'PROCESSING'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    # OCR 결과를 어디서 얻었는지 (users.ocr_cache)
+    SOURCE_OCR = 'OCR'
+    SOURCE_CACHE = 'CACHE'
+    SOURCE_CACHE_SIMILAR = 'CACHE_SIMILAR'
+    SOURCE_CHOICES = [
+        (SOURCE_OCR, 'OCR backend'),
+        (SOURCE_CACHE, 'Cache (same image)'),
+        (SOURCE_CACHE_SIMILAR, 'Cache (similar image)'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inbody_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    image = models.FileField(upload_to='inbody/%Y/%m/%d/', blank=True)
+    # True면 분석이 끝났을 때 파싱된 값을 UserProfile에 바로 저장합니다.
+    auto_apply = models.BooleanField(default=False)
+    applied_fields = models.JSONField(default=list, blank=True)
+    result = models.JSONField(blank=True, null=True)
+    ocr_source = models.CharField(max_length=16, choices=SOURCE_CHOICES, blank=True)
+    error = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"InbodyJob {self.id} ({self.status})"
+
+
+class InbodyOCRCacheEntry(models.Model):
+    """ 사용자가 올린 결과지 이미지의 OCR/파싱 결과 캐시 (users.ocr_cache) """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    content_hash = models.CharField(max_length=64)
+    perceptual_hash = models.CharField(max_length=64, blank=True)
+    detections = models.JSONField()
+    result = models.JSONField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content_hash'], name='unique_inbody_ocr_content'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='inbody_ocr_user_created_idx'),
+            models.Index(fields=['last_used_at'], name='inbody_ocr_last_used_idx'),
+        ]
+
+    def __str__(self):
+        return f"InbodyOCRCacheEntry {self.content_hash[:12]} (user {self.user_id})"
@@ -0,0 +1,90 @@
+# users/ocr.py
+"""
+인바디 결과지 OCR 백엔드
+
+- RekognitionOCR: AWS Rekognition detect_text (운영 기본값)
+- StubOCR: 외부 호출 없이 이미지 바이트를 UTF-8 텍스트로 보고 줄마다 LINE 하나를 돌려줍니다.
+  바이트가 기록해 둔 Rekognition 응답(JSON, users/testdata/inbody/)이면 그 응답을 그대로 재생합니다.
+  테스트/벤치마크에서 Rekognition 대신 사용합니다. (INBODY_STUB_LATENCY_MS로 호출 지연을 흉내 낼 수 있음)
+
+백엔드는 detect_text(image_bytes) → [{'text', 'type', 'confidence', 'geometry'}, ...] 만 구현하면 되고,
+settings.INBODY_OCR_BACKEND 에 클래스 경로를 지정합니다. 인스턴스는 프로세스마다 하나씩 재사용됩니다.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from backend.clients import get_aws_client
+
+
+class OCRError(Exception):
+    """ OCR 백엔드 호출이 실패했을 때 발생합니다. (메시지는 작업의 error 필드에 기록됨) """
+
+
+def detections_from_response(response):
+    """ Rekognition detect_text 응답(dict) → detect_text 반환 형식 """
+    return [
+        {
+            'text': (d.get('DetectedText') or '').strip(),
+            'type': d.get('Type'),
+            'confidence': d.get('Confidence'),
+            'geometry': d.get('Geometry'),
+        }
+        for d in response.get('TextDetections', []) or []
+    ]
+
+
+class RekognitionOCR:
+    """ AWS Rekognition detect_text. boto3 클라이언트는 프로세스 공용(backend.clients)을 사용합니다. """
+
+    def __init__(self, region_name=None):
+        self.region_name = region_name or getattr(settings, 'AWS_REGION', None)
+
+    @property
+    def client(self):
+        return get_aws_client('rekognition', self.region_name)
+
+    def detect_text(self, image_bytes):
+        try:
+            response = self.client.detect_text(Image={'Bytes': image_bytes})
+        except Exception as exc:
+            raise OCRError(f'Rekognition detect_text failed: {exc}') from exc
+        return detections_from_response(response)
+
+
+class StubOCR:
+    """ 이미지 바이트를 텍스트로 디코딩해 비어 있지 않은 줄을 LINE으로 돌려주는 로컬 백엔드 """
+
+    def __init__(self, latency_ms=None):
+        self.latency_ms = latency_ms if latency_ms is not None else getattr(settings, 'INBODY_STUB_LATENCY_MS', 0)
+
+    def detect_text(self, image_bytes):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        text = image_bytes.decode('utf-8', errors='ignore')
+        if text.lstrip().startswith('{'):
+            document = json.loads(text)
+            return detections_from_response(document.get('response', document))
+        return [
+            {'text': line.strip(), 'type': 'LINE', 'confidence': 99.0, 'geometry': None}
+            for line in text.splitlines() if line.strip()
+        ]
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_ocr_backend():
+    """ settings.INBODY_OCR_BACKEND 로 지정된 프로세스 전역 OCR 백엔드를 반환합니다. """
+    path = getattr(settings, 'INBODY_OCR_BACKEND', 'users.ocr.RekognitionOCR')
+    backend = _backends.get(path)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(path)
+            if backend is None:
+                backend = _backends[path] = import_string(path)()
+    return backend
@@ -0,0 +1,164 @@
+# users/ocr_cache.py
+"""
+인바디 OCR 결과 캐시 (내용 해시 기반)
+
+같은 결과지 사진을 다시 올리면(재시도, 앱 재시작 등) Rekognition을 다시 호출하지 않고
+저장해 둔 OCR 결과(detections)와 파싱 결과를 돌려줍니다.
+
+- 키: 이미지 바이트의 SHA-256. INBODY_OCR_CACHE_PERCEPTUAL이 켜져 있고 Pillow로 열 수 있는 이미지면
+  축소한 흑백 이미지의 dHash(256비트)도 함께 저장해, 다시 인코딩/리사이즈된 같은 사진
+  (해밍 거리가 INBODY_OCR_CACHE_PERCEPTUAL_DISTANCE 이하)도 찾습니다.
+  dHash는 배치가 같고 숫자만 다른 결과지를 구분하지 못하므로 기본은 꺼져 있고,
+  이렇게 찾은 결과(SOURCE_CACHE_SIMILAR)는 프로필에 자동 반영하지 않습니다. (users.inbody.run_job)
+- 결과지는 서로 비슷하게 생겼으므로 캐시는 사용자별로만 찾습니다. (다른 회원의 결과를 돌려주지 않음)
+- INBODY_OCR_CACHE_TTL_SECONDS가 지난 항목은 사용하지 않고, 항목 수가 INBODY_OCR_CACHE_MAX_ENTRIES를
+  넘으면 가장 오래 사용되지 않은 항목부터 지웁니다. 정리는 업로드 경로가 아니라 주기적 태스크
+  (users.tasks.prune_inbody_ocr_cache)에서 PRUNE_BATCH_SIZE개씩 나눠 하므로, 실행 사이에는 잠시 최대 개수를 넘을 수 있습니다.
+- 적중/실패 횟수는 작업(InbodyJob.ocr_source)에 남기고 get_stats()로 집계합니다.
+"""
+import datetime
+import hashlib
+import io
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import InbodyJob, InbodyOCRCacheEntry
+
+# dHash 한 변의 크기 (hash_size x hash_size 비트)
+PERCEPTUAL_HASH_SIZE = 16
+# 지각 해시로 비교할 사용자의 최근 캐시 항목 수
+PERCEPTUAL_CANDIDATES = 50
+# prune()이 한 번의 DELETE로 지우는 최대 항목 수
+PRUNE_BATCH_SIZE = 1000
+
+
+def is_enabled():
+    return getattr(settings, 'INBODY_OCR_CACHE_ENABLED', True)
+
+
+def get_ttl():
+    return datetime.timedelta(seconds=getattr(settings, 'INBODY_OCR_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+
+
+def content_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image_bytes, hash_size=PERCEPTUAL_HASH_SIZE):
+    """ 흑백 (hash_size+1) x hash_size 축소 이미지의 가로 밝기 차이(dHash). Pillow가 없거나 이미지가 아니면 '' """
+    try:
+        from PIL import Image
+    except ImportError:
+        return ''
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image.draft('L', (hash_size * 8, hash_size * 8))  # JPEG은 디코딩 단계에서 미리 축소
+            pixels = list(image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR).getdata())
+    except Exception:
+        return ''
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f'{bits:0{hash_size * hash_size // 4}x}'
+
+
+def fingerprint(image_bytes):
+    """ (content_hash, perceptual_hash) """
+    use_perceptual = getattr(settings, 'INBODY_OCR_CACHE_PERCEPTUAL', False)
+    return content_hash(image_bytes), perceptual_hash(image_bytes) if use_perceptual else ''
+
+
+def hamming_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def lookup(user_id, content_key, perceptual_key='', now=None):
+    """
+    사용자의 유효한 캐시 항목을 찾습니다. 내용 해시가 같은 항목이 없으면 최근 항목들 중
+    지각 해시의 해밍 거리가 INBODY_OCR_CACHE_PERCEPTUAL_DISTANCE 이하인 가장 가까운 항목을 사용합니다.
+    반환값: (항목, InbodyJob.SOURCE_CACHE 또는 SOURCE_CACHE_SIMILAR) 또는 (None, None)
+    """
+    now = now or timezone.now()
+    valid = InbodyOCRCacheEntry.objects.filter(user_id=user_id, created_at__gte=now - get_ttl())
+    entry, source = valid.filter(content_hash=content_key).first(), InbodyJob.SOURCE_CACHE
+
+    if entry is None and perceptual_key:
+        max_distance = getattr(settings, 'INBODY_OCR_CACHE_PERCEPTUAL_DISTANCE', 12)
+        candidates = valid.exclude(perceptual_hash='').order_by('-created_at').values_list('id', 'perceptual_hash')
+        scored = [
+            (distance, pk) for pk, key in candidates[:PERCEPTUAL_CANDIDATES]
+            if (distance := hamming_distance(perceptual_key, key)) <= max_distance
+        ]
+        if scored:
+            entry, source = valid.filter(pk=min(scored)[1]).first(), InbodyJob.SOURCE_CACHE_SIMILAR
+
+    if entry is None:
+        return None, None
+    InbodyOCRCacheEntry.objects.filter(pk=entry.pk).update(hit_count=F('hit_count') + 1, last_used_at=now)
+    return entry, source
+
+
+def store(user_id, content_key, perceptual_key, detections, result, now=None):
+    """ OCR 결과를 저장합니다. (오래된 항목 정리는 prune()을 주기적으로 실행) """
+    now = now or timezone.now()
+    InbodyOCRCacheEntry.objects.update_or_create(
+        user_id=user_id, content_hash=content_key,
+        defaults={
+            'perceptual_hash': perceptual_key, 'detections': detections, 'result': result,
+            'created_at': now, 'last_used_at': now,
+        },
+    )
+
+
+def _delete_batch(queryset, limit):
+    ids = list(queryset.values_list('id', flat=True)[:limit])
+    return InbodyOCRCacheEntry.objects.filter(id__in=ids).delete()[0] if ids else 0
+
+
+def prune(now=None, batch_size=PRUNE_BATCH_SIZE):
+    """
+    만료된 항목과 최대 개수를 넘는 오래 사용되지 않은 항목을 batch_size개씩 지웁니다.
+    넘는 개수는 COUNT 한 번으로 구하고 last_used_at 오름차순(인덱스)으로 앞에서부터 지우므로
+    OFFSET 스캔이나 전체 id 목록 로드가 없습니다. 반환값: 지운 항목 수
+    """
+    now = now or timezone.now()
+    deleted = 0
+    expired = InbodyOCRCacheEntry.objects.filter(created_at__lt=now - get_ttl()).order_by('created_at')
+    while True:
+        count = _delete_batch(expired, batch_size)
+        deleted += count
+        if count < batch_size:
+            break
+
+    max_entries = getattr(settings, 'INBODY_OCR_CACHE_MAX_ENTRIES', 10000)
+    excess = InbodyOCRCacheEntry.objects.count() - max_entries
+    oldest = InbodyOCRCacheEntry.objects.order_by('last_used_at', 'id')
+    while excess > 0:
+        count = _delete_batch(oldest, min(batch_size, excess))
+        if not count:
+            break
+        deleted += count
+        excess -= count
+    return deleted
+
+
+def get_stats(since):
+    """ since 이후 끝난 작업의 OCR 호출/캐시 적중 횟수와 현재 캐시 항목 수 """
+    counts = InbodyJob.objects.filter(finished_at__gte=since).aggregate(
+        misses=Count('id', filter=Q(ocr_source=InbodyJob.SOURCE_OCR)),
+        hits=Count('id', filter=Q(ocr_source=InbodyJob.SOURCE_CACHE)),
+        similar_hits=Count('id', filter=Q(ocr_source=InbodyJob.SOURCE_CACHE_SIMILAR)),
+    )
+    lookups = counts['misses'] + counts['hits'] + counts['similar_hits']
+    return {
+        'enabled': is_enabled(),
+        **counts,
+        'hit_ratio': round((counts['hits'] + counts['similar_hits']) / lookups, 4) if lookups else None,
+        'entries': InbodyOCRCacheEntry.objects.count(),
+        'max_entries': getattr(settings, 'INBODY_OCR_CACHE_MAX_ENTRIES', 10000),
+        'ttl_seconds': int(get_ttl().total_seconds()),
+    }
@@ -0,0 +1,50 @@
+# users/preprocess.py
+"""
+OCR 전 이미지 전처리 (Pillow)
+
+휴대폰 원본 사진(4~12MB)을 그대로 Rekognition에 보내지 않고, 글자 인식에 필요한 만큼만 줄여서 보냅니다.
+
+1. JPEG은 draft()로 디코딩 단계에서 1/2, 1/4, 1/8 크기로 바로 읽습니다. (원본 해상도 전체를 메모리에 풀지 않음)
+2. EXIF Orientation대로 회전합니다. (세로로 찍은 사진이 눕혀져 인식되지 않도록)
+3. 흑백으로 바꾸고 긴 변을 INBODY_OCR_MAX_SIDE 이하로 줄인 뒤 JPEG(INBODY_OCR_JPEG_QUALITY)으로 다시 인코딩합니다.
+
+이미지로 열 수 없거나(StubOCR용 텍스트 등) 결과가 원본보다 크면 원본 바이트를 그대로 사용합니다.
+"""
+import io
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled():
+    return getattr(settings, 'INBODY_PREPROCESS_ENABLED', True)
+
+
+def prepare_for_ocr(image_bytes, max_side=None, quality=None):
+    """ OCR에 보낼 바이트를 반환합니다. (전처리할 수 없으면 image_bytes 그대로) """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return image_bytes
+    max_side = max_side or getattr(settings, 'INBODY_OCR_MAX_SIDE', 2048)
+    quality = quality or getattr(settings, 'INBODY_OCR_JPEG_QUALITY', 85)
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            # 긴 변이 max_side 이상으로 남는 가장 작은 크기로 디코딩 (JPEG만 적용됨)
+            scale = max_side / max(image.size)
+            if scale < 1:
+                image.draft('L', (int(image.width * scale) + 1, int(image.height * scale) + 1))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('L')
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    except Exception:
+        logger.debug('Inbody image could not be preprocessed; sending original bytes', exc_info=True)
+        return image_bytes
+
+    prepared = buffer.getvalue()
+    return prepared if len(prepared) < len(image_bytes) else image_bytes
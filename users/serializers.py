@@ -2,7 +2,7 @@
 
 from django.contrib.auth.models import User
 from rest_framework import serializers, generics
-from .models import UserProfile
+from .models import InbodyJob, UserProfile
 import logging
 
 logger = logging.getLogger(__name__)
@@ -108,4 +108,16 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'skeletal_muscle_mass_kg', 'body_fat_mass_kg',
             'segment_right_arm_kg', 'segment_left_arm_kg', 'segment_trunk_kg',
             'segment_right_leg_kg', 'segment_left_leg_kg',
-        ]
\ No newline at end of file
+        ]
+
+# 인바디 분석 작업 상태/결과 조회용 Serializer
+class InbodyJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = InbodyJob
+        fields = [
+            'job_id', 'status', 'auto_apply', 'applied_fields', 'result', 'ocr_source', 'error',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
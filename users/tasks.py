@@ -0,0 +1,34 @@
+from celery import shared_task
+from . import ocr_cache
+from .inbody import recover_stale_jobs, run_job
+
+
+@shared_task
+def analyze_inbody(job_id):
+    """
+    Run OCR and parsing for one uploaded Inbody sheet (and apply it to the profile if requested).
+    Enqueued by InbodyAnalyzeView after the job row commits. Idempotent; see users.inbody.run_job.
+    """
+    return {'job_id': job_id, 'status': run_job(job_id)}
+
+
+@shared_task
+def recover_inbody_jobs():
+    """
+    Re-enqueue Inbody jobs stuck in PENDING/PROCESSING past INBODY_JOB_TIMEOUT_SECONDS
+    (worker killed after claiming, lost task) and fail those that keep getting stuck.
+    Scheduled by Celery beat; run_job reclaims stale PROCESSING jobs.
+    """
+    job_ids = recover_stale_jobs()
+    for job_id in job_ids:
+        analyze_inbody.delay(job_id)
+    return {'requeued': job_ids}
+
+
+@shared_task
+def prune_inbody_ocr_cache():
+    """
+    Delete expired Inbody OCR cache entries and evict the least recently used ones above
+    INBODY_OCR_CACHE_MAX_ENTRIES, in bounded batches. Scheduled by Celery beat.
+    """
+    return {'deleted': ocr_cache.prune()}
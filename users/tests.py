@@ -1,3 +1,344 @@
-from django.test import TestCase
+import datetime
+import glob
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .inbody_parser import FIELDS, parse_detections, parse_lines
+from . import ocr_cache
+from .models import InbodyJob, InbodyOCRCacheEntry, UserProfile
+from .ocr import OCRError, StubOCR, detections_from_response
+from .preprocess import prepare_for_ocr
+from .tasks import analyze_inbody, prune_inbody_ocr_cache, recover_inbody_jobs
+
+SHEET = '\n'.join([
+    'InBody 570',
+    '체중 72.4 kg',
+    '골격근량 33.1 kg',
+    '체지방률 18.2 %',
+    'BMI 23.5',
+]).encode('utf-8')
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'testdata', 'inbody')
+
+
+def _lines(*texts):
+    return [{'text': text, 'type': 'LINE', 'confidence': 99.0, 'geometry': None} for text in texts]
+
+
+def _photo(seed=1, size=(360, 480), fmt='PNG'):
+    """ 무늬가 있는 사진 같은 테스트 이미지 바이트 (같은 seed면 크기/형식이 달라도 같은 사진) """
+    from PIL import Image
+    rnd = random.Random(seed)
+    image = Image.new('L', (36, 48))
+    image.putdata([rnd.randrange(256) for _ in range(36 * 48)])
+    buffer = io.BytesIO()
+    image.resize(size, Image.BICUBIC).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _sheet(weight, body_fat):
+    """ 배치는 같고 숫자만 다른 결과지 이미지 바이트 """
+    from PIL import Image, ImageDraw
+    image = Image.new('L', (600, 800), 255)
+    draw = ImageDraw.Draw(image)
+    for row, line in enumerate((f'Weight {weight} kg', f'Body Fat {body_fat} %', 'SMM 33.1 kg', 'BMI 23.5')):
+        draw.text((60, 80 + row * 60), line, fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ParseDetectionsTests(SimpleTestCase):
+    def test_recorded_corpus(self):
+        """ users/testdata/inbody/ 의 기록된 응답마다 모든 항목이 기대값과 같아야 합니다. """
+        paths = sorted(glob.glob(os.path.join(CORPUS_DIR, '*.json')))
+        self.assertTrue(paths)
+        for path in paths:
+            with open(path, encoding='utf-8') as fh:
+                document = json.load(fh)
+            with self.subTest(os.path.basename(path)):
+                parsed = parse_detections(detections_from_response(document['response']))['parsed']
+                self.assertEqual(parsed, {field: document['expected'].get(field) for field in FIELDS})
+
+    def test_parses_keyword_values(self):
+        result = parse_detections(StubOCR(latency_ms=0).detect_text(SHEET))
+        self.assertEqual(
+            {field: value for field, value in result['parsed'].items() if value is not None},
+            {'weight_kg': 72.4, 'body_fat_percentage': 18.2, 'skeletal_muscle_mass_kg': 33.1, 'bmi': 23.5},
+        )
+        self.assertEqual(len(result['raw_lines']), 5)
+
+    def test_value_on_following_line(self):
+        parsed = parse_detections(_lines('체중', '68.0 kg', 'Body Fat', '21.5'))['parsed']
+        self.assertEqual(parsed['weight_kg'], 68.0)
+        self.assertEqual(parsed['body_fat_percentage'], 21.5)
+
+    def test_body_fat_mass_is_not_read_as_percentage(self):
+        parsed = parse_lines(['체지방량 14.2 kg', '체지방률 19.6 %'])
+        self.assertEqual((parsed['body_fat_mass_kg'], parsed['body_fat_percentage']), (14.2, 19.6))
+
+    def test_implausible_numbers_and_expired_labels_are_ignored(self):
+        parsed = parse_lines(['BMI (kg/m2) 24.1', '골격근·지방분석', '-', '-', '99.0'])
+        self.assertEqual(parsed['bmi'], 24.1)
+        self.assertIsNone(parsed['skeletal_muscle_mass_kg'])
+
+
+class PreprocessTests(SimpleTestCase):
+    def test_rotates_grayscales_and_downscales(self):
+        from PIL import Image
+        photo = Image.open(io.BytesIO(_photo(size=(1600, 1200), fmt='JPEG'))).convert('RGB')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # 시계 방향 90도 회전 필요
+        buffer = io.BytesIO()
+        photo.save(buffer, format='JPEG', quality=95, exif=exif)
+
+        prepared = prepare_for_ocr(buffer.getvalue(), max_side=800)
+        self.assertLess(len(prepared), len(buffer.getvalue()))
+        with Image.open(io.BytesIO(prepared)) as image:
+            self.assertEqual((image.format, image.mode, image.size), ('JPEG', 'L', (600, 800)))
+
+    def test_small_images_are_not_upscaled(self):
+        from PIL import Image
+        with Image.open(io.BytesIO(prepare_for_ocr(_photo(size=(300, 400)), max_side=2048))) as image:
+            self.assertEqual(image.size, (300, 400))
+
+    def test_non_images_are_sent_unchanged(self):
+        self.assertEqual(prepare_for_ocr(SHEET), SHEET)
+
+
+@override_settings(INBODY_OCR_BACKEND='users.ocr.StubOCR', INBODY_STUB_LATENCY_MS=0)
+class InbodyUploadTestCase(TestCase):
+    """ 임시 MEDIA_ROOT와 StubOCR로 업로드 → 분석 태스크까지 실행하는 테스트 기반 클래스 """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.user = User.objects.create_user(username='member', password='pw')
+        UserProfile.objects.create(user=self.user, weight_kg=80.0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content=SHEET, **data):
+        """ 태스크를 즉시 실행(eager)하도록 바꾼 뒤 업로드하고 응답을 반환합니다. """
+        image = SimpleUploadedFile('inbody.jpg', content, content_type='image/jpeg')
+        with mock.patch.object(analyze_inbody, 'delay', side_effect=lambda job_id: analyze_inbody.apply(args=(job_id,))):
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post('/api/inbody/analyze/', {'image': image, **data}, format='multipart')
+
+
+class InbodyJobTests(InbodyUploadTestCase):
+    def test_upload_returns_job_and_status_serves_result(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'PENDING')
+        self.assertTrue(response.data['status_url'].endswith(f"/api/inbody/jobs/{response.data['job_id']}/"))
+
+        job = self.client.get(f"/api/inbody/jobs/{response.data['job_id']}/")
+        self.assertEqual(job.status_code, 200)
+        self.assertEqual(job.data['status'], 'SUCCEEDED')
+        self.assertEqual(job.data['result']['parsed']['weight_kg'], 72.4)
+        self.assertEqual(job.data['applied_fields'], [])
+        # 자동 반영을 요청하지 않았으면 프로필은 그대로, 업로드 이미지는 삭제됨
+        self.assertEqual(UserProfile.objects.get(user=self.user).weight_kg, 80.0)
+        self.assertEqual(InbodyJob.objects.get().image.name, '')
+
+    def test_auto_apply_updates_profile(self):
+        response = self.upload(auto_apply='true')
+        job = InbodyJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, InbodyJob.SUCCEEDED)
+        self.assertEqual(set(job.applied_fields), {'weight_kg', 'body_fat_percentage', 'skeletal_muscle_mass_kg', 'bmi'})
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.weight_kg, profile.bmi), (72.4, 23.5))
+
+    def test_auto_apply_recorded_response_fills_segments(self):
+        with open(os.path.join(CORPUS_DIR, 'ko_inbody570_full.json'), 'rb') as fh:
+            self.upload(fh.read(), auto_apply='1')
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.segment_trunk_kg, profile.body_fat_mass_kg, profile.inbody_score), (26.1, 14.2, 78.0))
+
+    @override_settings(INBODY_OCR_MAX_SIDE=512)
+    def test_ocr_receives_preprocessed_image(self):
+        photo = _photo(size=(1200, 1600))
+        with mock.patch.object(StubOCR, 'detect_text', return_value=_lines('체중 72.4 kg')) as detect_text:
+            self.upload(photo)
+            with override_settings(INBODY_PREPROCESS_ENABLED=False, INBODY_OCR_CACHE_ENABLED=False):
+                self.upload(photo)
+        sent, original = (call.args[0] for call in detect_text.call_args_list)
+        self.assertEqual(original, photo)
+        self.assertTrue(sent.startswith(b'\xff\xd8'))  # JPEG
+        self.assertLess(len(sent), len(photo))
+
+    def test_ocr_failure_marks_job_failed(self):
+        with mock.patch.object(StubOCR, 'detect_text', side_effect=OCRError('throttled')):
+            response = self.upload()
+        job = InbodyJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual((job.status, job.error), (InbodyJob.FAILED, 'throttled'))
+        self.assertIsNone(job.result)
+
+    def test_job_is_processed_once(self):
+        job_id = self.upload().data['job_id']
+        self.assertEqual(analyze_inbody.apply(args=(job_id,)).get()['status'], None)
+
+    def test_stale_processing_job_is_reclaimed(self):
+        job_id = self.upload().data['job_id']
+        # 선점 후 워커가 죽은 상태: PROCESSING, 이미지 남아 있음
+        job = InbodyJob.objects.get(pk=job_id)
+        job.image.save('inbody.jpg', SimpleUploadedFile('inbody.jpg', SHEET), save=False)
+        InbodyJob.objects.filter(pk=job_id).update(
+            status=InbodyJob.PROCESSING, started_at=timezone.now(), image=job.image.name, result=None
+        )
+
+        # 타임아웃 전에는 다시 전달되어도 처리하지 않음
+        self.assertIsNone(analyze_inbody.apply(args=(job_id,)).get()['status'])
+
+        InbodyJob.objects.filter(pk=job_id).update(started_at=timezone.now() - datetime.timedelta(minutes=11))
+        with mock.patch.object(analyze_inbody, 'delay', side_effect=lambda job_id: analyze_inbody.apply(args=(job_id,))):
+            self.assertEqual(recover_inbody_jobs(), {'requeued': [job_id]})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.image.name), (InbodyJob.SUCCEEDED, ''))
+        self.assertEqual(job.result['parsed']['weight_kg'], 72.4)
+
+    def test_repeatedly_stuck_job_is_failed(self):
+        job_id = self.upload().data['job_id']
+        long_ago = timezone.now() - datetime.timedelta(hours=1)
+        InbodyJob.objects.filter(pk=job_id).update(status=InbodyJob.PROCESSING, started_at=long_ago, created_at=long_ago)
+        with mock.patch.object(analyze_inbody, 'delay') as delay:
+            self.assertEqual(recover_inbody_jobs(), {'requeued': []})
+        delay.assert_not_called()
+        job = InbodyJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.error), (InbodyJob.FAILED, 'Inbody analysis timed out'))
+
+    def test_enqueue_failure_marks_job_failed(self):
+        image = SimpleUploadedFile('inbody.jpg', SHEET, content_type='image/jpeg')
+        with mock.patch.object(analyze_inbody, 'delay', side_effect=ConnectionError('broker down')):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/inbody/analyze/', {'image': image}, format='multipart')
+        self.assertEqual(InbodyJob.objects.get(pk=response.data['job_id']).status, InbodyJob.FAILED)
+
+    def test_validation(self):
+        self.assertEqual(self.client.post('/api/inbody/analyze/', {}, format='multipart').status_code, 400)
+        with override_settings(INBODY_MAX_UPLOAD_BYTES=10):
+            self.assertEqual(self.upload().status_code, 400)
+        self.assertFalse(InbodyJob.objects.exists())
+
+    def test_other_users_job_is_not_visible(self):
+        job_id = self.upload().data['job_id']
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', password='pw'))
+        self.assertEqual(other.get(f'/api/inbody/jobs/{job_id}/').status_code, 404)
+
+
+class OCRCacheTests(InbodyUploadTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(StubOCR, 'detect_text', return_value=_lines('체중 72.4 kg'))
+        self.detect_text = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def job(self, response):
+        return InbodyJob.objects.get(pk=response.data['job_id'])
+
+    def test_same_image_is_served_from_cache(self):
+        self.assertEqual(self.job(self.upload(SHEET)).ocr_source, InbodyJob.SOURCE_OCR)
+        second = self.job(self.upload(SHEET, auto_apply='true'))
+        self.assertEqual((second.status, second.ocr_source), (InbodyJob.SUCCEEDED, InbodyJob.SOURCE_CACHE))
+        self.assertEqual(second.result['parsed']['weight_kg'], 72.4)
+        self.assertEqual(UserProfile.objects.get(user=self.user).weight_kg, 72.4)
+        self.assertEqual(self.detect_text.call_count, 1)
+        self.assertEqual(InbodyOCRCacheEntry.objects.get().hit_count, 1)
+
+    @override_settings(INBODY_OCR_CACHE_PERCEPTUAL=True)
+    def test_reencoded_image_matches_perceptual_hash(self):
+        self.upload(_photo())
+        similar = self.job(self.upload(_photo(size=(720, 960), fmt='JPEG')))
+        self.assertEqual(similar.ocr_source, InbodyJob.SOURCE_CACHE_SIMILAR)
+        self.assertEqual(self.detect_text.call_count, 1)
+
+        self.assertEqual(self.job(self.upload(_photo(seed=2))).ocr_source, InbodyJob.SOURCE_OCR)
+        with override_settings(INBODY_OCR_CACHE_PERCEPTUAL=False):
+            self.assertEqual(self.job(self.upload(_photo(size=(540, 720)))).ocr_source, InbodyJob.SOURCE_OCR)
+
+    def test_sheets_with_different_values_do_not_collide(self):
+        self.upload(_sheet(72.4, 18.2))
+        self.assertEqual(self.job(self.upload(_sheet(69.8, 16.5))).ocr_source, InbodyJob.SOURCE_OCR)
+        self.assertEqual(self.detect_text.call_count, 2)
+
+    @override_settings(INBODY_OCR_CACHE_PERCEPTUAL=True)
+    def test_similar_hit_is_never_auto_applied(self):
+        self.upload(_sheet(72.4, 18.2))
+        similar = self.job(self.upload(_sheet(69.8, 16.5), auto_apply='true'))
+        self.assertEqual(similar.ocr_source, InbodyJob.SOURCE_CACHE_SIMILAR)
+        self.assertEqual(similar.applied_fields, [])
+        self.assertEqual(UserProfile.objects.get(user=self.user).weight_kg, 80.0)
+
+    def test_cache_is_per_user(self):
+        self.upload(SHEET)
+        other = User.objects.create_user(username='other', password='pw')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.job(self.upload(SHEET)).ocr_source, InbodyJob.SOURCE_OCR)
+        self.assertEqual(self.detect_text.call_count, 2)
+
+    def test_expired_entries_are_not_used(self):
+        self.upload(SHEET)
+        InbodyOCRCacheEntry.objects.update(created_at=timezone.now() - datetime.timedelta(days=2))
+        with override_settings(INBODY_OCR_CACHE_TTL_SECONDS=24 * 3600):
+            self.assertEqual(self.job(self.upload(SHEET)).ocr_source, InbodyJob.SOURCE_OCR)
+        self.assertEqual(InbodyOCRCacheEntry.objects.count(), 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for content in (b'a', b'b', b'c', b'd', b'e'):
+            self.upload(content)
+        # 업로드 경로에서는 정리하지 않음
+        self.assertEqual(InbodyOCRCacheEntry.objects.count(), 5)
+        self.upload(b'a')  # 적중 → 가장 최근에 사용한 항목
+
+        with override_settings(INBODY_OCR_CACHE_MAX_ENTRIES=2):
+            self.assertEqual(ocr_cache.prune(batch_size=2), 3)
+        self.assertEqual(
+            set(InbodyOCRCacheEntry.objects.values_list('content_hash', flat=True)),
+            {ocr_cache.content_hash(b'a'), ocr_cache.content_hash(b'e')},
+        )
+
+    def test_prune_task_removes_expired_entries_in_batches(self):
+        for content in (b'a', b'b', b'c'):
+            self.upload(content)
+        InbodyOCRCacheEntry.objects.exclude(content_hash=ocr_cache.content_hash(b'c')).update(
+            created_at=timezone.now() - datetime.timedelta(days=2)
+        )
+        with override_settings(INBODY_OCR_CACHE_TTL_SECONDS=24 * 3600), mock.patch.object(ocr_cache, 'PRUNE_BATCH_SIZE', 1):
+            self.assertEqual(prune_inbody_ocr_cache(), {'deleted': 2})
+        self.assertEqual(list(InbodyOCRCacheEntry.objects.values_list('content_hash', flat=True)), [ocr_cache.content_hash(b'c')])
+
+    def test_disabled_cache_always_calls_ocr(self):
+        with override_settings(INBODY_OCR_CACHE_ENABLED=False):
+            self.upload(SHEET)
+            self.upload(SHEET)
+        self.assertEqual(self.detect_text.call_count, 2)
+        self.assertFalse(InbodyOCRCacheEntry.objects.exists())
+
+    def test_stats_endpoint(self):
+        self.upload(SHEET)
+        self.upload(SHEET)
+        self.assertEqual(self.client.get('/api/inbody/ocr-cache/stats/').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(username='staff', password='pw', is_staff=True))
+        stats = self.client.get('/api/inbody/ocr-cache/stats/?days=1').data
+        self.assertEqual((stats['misses'], stats['hits'], stats['similar_hits']), (1, 1, 0))
+        self.assertEqual((stats['hit_ratio'], stats['entries']), (0.5, 1))
+        for days in ('inf', 'nan', '1e10', '0', '366', '1.5', 'week'):
+            with self.subTest(days=days):
+                self.assertEqual(self.client.get(f'/api/inbody/ocr-cache/stats/?days={days}').status_code, 400)
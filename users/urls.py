@@ -3,7 +3,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import UserViewSet, current_user_profile
-from .views import InbodyAnalyzeView
+from .views import InbodyAnalyzeView, InbodyJobView, InbodyOCRCacheStatsView
 
 # API URL을 자동으로 생성해주는 라우터를 생성합니다.
 router = DefaultRouter()
@@ -13,5 +13,7 @@ urlpatterns = [
     # 주의: 'users/<pk>/' 라우트보다 'users/profile/'가 먼저 매칭되도록 순서 중요
     path('users/profile/', current_user_profile, name='current_user_profile'),
     path('inbody/analyze/', InbodyAnalyzeView.as_view(), name='inbody_analyze'),
+    path('inbody/jobs/<int:pk>/', InbodyJobView.as_view(), name='inbody_job'),
+    path('inbody/ocr-cache/stats/', InbodyOCRCacheStatsView.as_view(), name='inbody_ocr_cache_stats'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -3,36 +3,46 @@ from django.shortcuts import render
 
 from django.contrib.auth.models import User
 from rest_framework import viewsets, generics, status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import UserSerializer, RegisterSerializer, UserProfileSerializer
-from .models import UserProfile
+from rest_framework.reverse import reverse
+from .serializers import UserSerializer, RegisterSerializer, UserProfileSerializer, InbodyJobSerializer
+from .models import InbodyJob, UserProfile
+from .inbody import fail_job
+from . import ocr_cache
+import datetime
 import logging
-import re
-import boto3
 from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
-from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from backend.query_budget import query_budget
 
 logger = logging.getLogger(__name__)
 
+@query_budget(6, list=3, retrieve=3)
 class UserViewSet(viewsets.ModelViewSet):
     # 이 줄을 추가하여 '출입증 검사'를 설정합니다.
     permission_classes = [IsAuthenticated]
-    queryset = User.objects.all()
+    # UserSerializer.get_role이 프로필을 읽으므로 함께 조회
+    queryset = User.objects.select_related('userprofile')
     serializer_class = UserSerializer
+    cursor_ordering = 'id'
+    max_page_size = 100
 
 # RegisterView는 누구나 접근해야 하므로 수정하지 않습니다.
+@query_budget(4)
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = RegisterSerializer
 
 # 현재 로그인한 사용자 정보를 가져오는 View
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_current_user(request):
@@ -40,6 +50,7 @@ def get_current_user(request):
     return Response(serializer.data)
 
 # 현재 로그인한 사용자의 프로필 조회/수정
+@query_budget(3, get=2)
 @api_view(['GET', 'PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def current_user_profile(request):
@@ -129,149 +140,78 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         
         return data
 
+@query_budget(4)
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
+@query_budget(post=2)
 class InbodyAnalyzeView(APIView):
+    """
+    인바디 결과지 이미지를 업로드하면 분석 작업을 만들고 바로 202와 작업 id를 돌려줍니다.
+    OCR/파싱은 Celery 태스크가 수행하며, 결과는 InbodyJobView(status_url)로 조회합니다.
+    multipart/form-data: image (필수), auto_apply (선택, true면 분석 후 프로필에 바로 반영)
+    """
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser]
 
     def post(self, request):
-        # Expecting multipart/form-data with field 'image'
         image_file = request.FILES.get('image')
         if not image_file:
             return Response({'detail': 'No image provided'}, status=status.HTTP_400_BAD_REQUEST)
+        max_bytes = getattr(settings, 'INBODY_MAX_UPLOAD_BYTES', 5 * 1024 * 1024)
+        if image_file.size > max_bytes:
+            return Response({'detail': f'Image is larger than {max_bytes} bytes'}, status=status.HTTP_400_BAD_REQUEST)
+
+        auto_apply = str(request.data.get('auto_apply', '')).lower() in ('1', 'true', 'yes', 'on')
+        # 업로드 파일은 청크 단위로 저장소에 기록됩니다. (메모리에 전체를 읽지 않음)
+        job = InbodyJob.objects.create(user=request.user, image=image_file, auto_apply=auto_apply)
+        transaction.on_commit(lambda: _enqueue_inbody_job(job.id))
+
+        return Response(
+            {
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': reverse('inbody_job', kwargs={'pk': job.id}, request=request),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+def _enqueue_inbody_job(job_id):
+    from .tasks import analyze_inbody
+    try:
+        analyze_inbody.delay(job_id)
+    except Exception:
+        logger.exception('Failed to enqueue inbody job %s', job_id)
+        fail_job(job_id, 'Could not enqueue analysis task')
 
-        try:
-            # Read bytes
-            if isinstance(image_file, InMemoryUploadedFile):
-                img_bytes = image_file.read()
-            else:
-                img_bytes = image_file.file.read()
-
-            # Call AWS Rekognition detect_text
-            rek = boto3.client('rekognition',
-                               region_name=getattr(settings, 'AWS_REGION', None))
-            resp = rek.detect_text(Image={'Bytes': img_bytes})
-
-            # Build a list of detections with type/confidence for better post-processing
-            detections = resp.get('TextDetections', []) or []
-            items = []
-            for d in detections:
-                items.append({
-                    'text': d.get('DetectedText', '').strip(),
-                    'type': d.get('Type'),
-                    'confidence': d.get('Confidence'),
-                    'geometry': d.get('Geometry'),
-                })
-
-            # Helper: normalize numeric string -> float (remove commas/fullwidth digits)
-            def normalize_num_str(s: str) -> str:
-                if not s:
-                    return s
-                # replace full-width digits
-                s = s.replace('\uFF10', '0').replace('\uFF11', '1').replace('\uFF12', '2').replace('\uFF13', '3')
-                s = s.replace('\uFF14', '4').replace('\uFF15', '5').replace('\uFF16', '6').replace('\uFF17', '7')
-                s = s.replace('\uFF18', '8').replace('\uFF19', '9')
-                # remove commas and spaces
-                s = s.replace(',', '').replace('\u2009', '').strip()
-                return s
-
-            def to_float(s: str):
-                try:
-                    s2 = normalize_num_str(s)
-                    return float(s2)
-                except Exception:
-                    return None
-
-            # Helper: find number in a text using common patterns
-            def find_number_in_text(text: str):
-                if not text:
-                    return None
-                # common number patterns like 70, 70.1, 70.1kg, 70kg
-                m = re.search(r"([0-9]+(?:[\.,][0-9]+)?)", text)
-                if m:
-                    return to_float(m.group(1))
-                return None
-
-            # Sequence-based search: look for a keyword then number within same text or adjacent items
-            def find_by_keywords(keywords_regex_list, unit_hint=None):
-                # search lines first
-                for idx, it in enumerate(items):
-                    text = it['text']
-                    for kw in keywords_regex_list:
-                        if re.search(kw, text, re.IGNORECASE):
-                            # try to extract number from same text
-                            num = None
-                            # common pattern: keyword followed by number
-                            m = re.search(kw + r"[:\s]*([0-9]+(?:[\.,][0-9]+)?)", text, re.IGNORECASE)
-                            if m:
-                                num = to_float(m.group(1))
-                            else:
-                                # try any number in same text
-                                num = find_number_in_text(text)
-                            if num is not None:
-                                return num
-                            # else try following few items concatenated
-                            look = ' '.join([items[j]['text'] for j in range(idx, min(idx+3, len(items)))])
-                            num = find_number_in_text(look)
-                            if num is not None:
-                                return num
-                return None
-
-            # Build concatenated lines for fallback
-            lines = [it['text'] for it in items if it.get('type') == 'LINE']
-            concat = '\n'.join(lines)
-
-            parsed = {}
-
-            # weight: keywords in Korean/English
-            parsed['weight_kg'] = find_by_keywords([r"체중", r"몸무게", r"weight"], unit_hint='kg')
-            # also try kg tokens anywhere
-            if parsed['weight_kg'] is None:
-                m = re.search(r"([0-9]+(?:[\.,][0-9]+)?)\s*(kg|㎏)\b", concat, re.IGNORECASE)
-                if m:
-                    parsed['weight_kg'] = to_float(m.group(1))
-
-            # body fat percent: keywords and percent symbols
-            parsed['body_fat_percentage'] = find_by_keywords([r"체지방률", r"체지방", r"체지방율", r"body fat", r"bodyfat"], unit_hint='%')
-            if parsed['body_fat_percentage'] is None:
-                m = re.search(r"([0-9]+(?:[\.,][0-9]+)?)\s*(%|퍼센트)", concat, re.IGNORECASE)
-                if m:
-                    parsed['body_fat_percentage'] = to_float(m.group(1))
-
-            # skeletal muscle mass
-            parsed['skeletal_muscle_mass_kg'] = find_by_keywords([r"골격근량", r"골격근", r"skeletal muscle", r"SMM", r"muscle"], unit_hint='kg')
-            if parsed['skeletal_muscle_mass_kg'] is None:
-                # try patterns like 'xx kg' with muscle keywords nearby
-                m = re.search(r"(골격근량|골격근|SMM|skeletal muscle|muscle)[:\s]*([0-9]+(?:[\.,][0-9]+)?)\s*(kg)?", concat, re.IGNORECASE)
-                if m:
-                    parsed['skeletal_muscle_mass_kg'] = to_float(m.group(2))
-
-            # BMI
-            parsed['bmi'] = find_by_keywords([r"BMI", r"체질량지수"], unit_hint=None)
-            if parsed['bmi'] is None:
-                m = re.search(r"\b([0-9]+(?:[\.,][0-9]+)?)\s*BMI\b", concat, re.IGNORECASE)
-                if m:
-                    parsed['bmi'] = to_float(m.group(1))
 
-            # Fallback heuristics: if weight missing, find any standalone kg number
-            if parsed.get('weight_kg') is None:
-                m = re.search(r"([0-9]+(?:[\.,][0-9]+)?)\s*(kg|㎏)\b", concat, re.IGNORECASE)
-                if m:
-                    parsed['weight_kg'] = to_float(m.group(1))
+@query_budget(get=2)
+class InbodyJobView(generics.RetrieveAPIView):
+    """ 인바디 분석 작업의 상태와 결과 (본인 작업만) """
+    permission_classes = [IsAuthenticated]
+    serializer_class = InbodyJobSerializer
 
-            # Attach raw detected lines with confidences for debugging and possible UI display
-            raw_lines = [{'text': it['text'], 'type': it['type'], 'confidence': it.get('confidence')} for it in items if it.get('type') == 'LINE']
+    def get_queryset(self):
+        return InbodyJob.objects.filter(user=self.request.user)
 
-            result = {
-                'parsed': parsed,
-                'raw_lines': raw_lines,
-            }
 
-            return Response(result)
+@query_budget(get=3)
+class InbodyOCRCacheStatsView(APIView):
+    """
+    운영자(staff) 전용: 최근 N일(?days=, 1~365, 기본 7) 동안 끝난 인바디 분석 작업의 OCR 호출/캐시 적중 횟수와
+    캐시 항목 수를 반환합니다.
+    """
+    permission_classes = [IsAdminUser]
+    max_days = 365
 
-        except Exception as e:
-            logger.exception('Inbody analyze failed')
-            return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= self.max_days:
+            return Response({'detail': f'days must be an integer between 1 and {self.max_days}'}, status=status.HTTP_400_BAD_REQUEST)
+        since = timezone.now() - datetime.timedelta(days=days)
+        return Response({'days': days, **ocr_cache.get_stats(since)})
@@ -0,0 +1,113 @@
+# workouts/eta.py
+"""
+대기열 예상 대기 시간(ETA) 계산
+
+예상 대기 시간 = 현재 세션의 남은 시간
+               + 앞에 있는 대기자 수 x (기구의 평균 세션 길이 + 평균 교대 시간)
+
+- 평균 세션 길이 / 교대 시간(알림 → 운동 시작)은 최근 ETA_HISTORY_DAYS일의 EquipmentUtilization 롤업에서
+  구해 기구별로 캐시합니다. (ETA_STATS_TTL_SECONDS, 롤업 주기와 같은 15분)
+  기록이 적은 기구는 기구의 base_session_time_minutes 쪽으로 당겨 계산합니다. (ETA_PRIOR_SESSIONS건 가중)
+- 현재 세션의 남은 시간은 시작 시각 + 배정 시간(allocated_duration_minutes) 기준이며, 초과했으면 0으로 봅니다.
+- 진행 중 세션이 없고 알림을 받고 아직 시작하지 않은(NOTIFIED) 예약이 있으면, 그 사용자를 앞의 이용자 한 명으로 봅니다.
+  (남은 알림 유효 시간 + 평균 세션 길이)
+
+대기열 등록/순번 조회 경로에서는 캐시 조회와 진행 중 세션 조회(인덱스) 한 번만 추가됩니다.
+(진행 중 세션이 없을 때만 NOTIFIED 예약 조회 한 번이 더 추가됨)
+predict_wait_seconds는 DB에 접근하지 않으므로 오프라인 평가(evaluate_eta 명령)도 같은 식을 사용합니다.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import EquipmentUtilization, Reservation, UsageSession
+
+
+def _stats_key(equipment_id):
+    return f'eta-stats:{equipment_id}'
+
+
+def blend_stats(base_minutes, session_seconds=0.0, session_count=0, handover_seconds=0.0, handover_count=0):
+    """ 누적 합계/건수 → {'session_seconds', 'handover_seconds', 'samples'} (기록이 적으면 기본 시간 쪽으로 보정) """
+    prior = getattr(settings, 'ETA_PRIOR_SESSIONS', 5)
+    return {
+        'session_seconds': (session_seconds + prior * base_minutes * 60) / (session_count + prior),
+        'handover_seconds': handover_seconds / handover_count if handover_count else 0.0,
+        'samples': session_count,
+    }
+
+
+def get_equipment_stats(equipment, now=None):
+    """ 기구의 평균 세션 길이/교대 시간 (캐시, 없으면 롤업 집계 쿼리 한 번) """
+    key = _stats_key(equipment.id)
+    stats = cache.get(key)
+    if stats is None:
+        now = now or timezone.now()
+        since = now - datetime.timedelta(days=getattr(settings, 'ETA_HISTORY_DAYS', 30))
+        totals = EquipmentUtilization.objects.filter(equipment_id=equipment.id, bucket_start__gte=since).aggregate(
+            busy=Sum('busy_seconds'),
+            sessions=Sum('session_count'),
+            delay=Sum('start_delay_seconds'),
+            started=Sum('started_count'),
+        )
+        stats = blend_stats(
+            equipment.base_session_time_minutes,
+            totals['busy'] or 0.0, totals['sessions'] or 0,
+            totals['delay'] or 0.0, totals['started'] or 0,
+        )
+        cache.set(key, stats, timeout=getattr(settings, 'ETA_STATS_TTL_SECONDS', 900))
+    return stats
+
+
+def remaining_seconds(start_time, allocated_minutes, now):
+    """ 배정 시간 기준 세션의 남은 시간(초). 초과했으면 0 """
+    ends_at = start_time + datetime.timedelta(minutes=allocated_minutes or 0)
+    return max((ends_at - now).total_seconds(), 0.0)
+
+
+def notified_holder_seconds(notified_at, stats, now):
+    """ 알림을 받고 아직 시작하지 않은 사용자가 기구를 비울 때까지의 예상 시간(초): 남은 알림 유효 시간 + 평균 세션 길이 """
+    deadline = notified_at + datetime.timedelta(minutes=getattr(settings, 'RESERVATION_NOTIFY_TIMEOUT_MINUTES', 0.25))
+    return max((deadline - now).total_seconds(), 0.0) + stats['session_seconds']
+
+
+def predict_wait_seconds(position, current_remaining, stats):
+    """
+    순번(position, WAITING 기준 1부터)의 사용자가 알림을 받을 때까지의 예상 시간(초).
+    position이 0 이하(이미 NOTIFIED)면 0입니다.
+    """
+    if position <= 0:
+        return 0.0
+    return current_remaining + (position - 1) * (stats['session_seconds'] + stats['handover_seconds'])
+
+
+def estimate_wait(equipment, position, now=None):
+    """
+    응답에 넣을 예상 대기 정보를 반환합니다.
+    반환값: {'estimated_wait_seconds': int, 'estimated_notify_at': datetime}
+    """
+    now = now or timezone.now()
+    seconds = 0
+    if position > 0:
+        session = (
+            UsageSession.objects.filter(equipment_id=equipment.id, end_time__isnull=True)
+            .order_by('-start_time')
+            .values_list('start_time', 'allocated_duration_minutes')
+            .first()
+        )
+        stats = get_equipment_stats(equipment, now=now)
+        if session is not None:
+            current = remaining_seconds(session[0], session[1], now)
+        else:
+            holder = (
+                Reservation.objects.filter(equipment_id=equipment.id, status='NOTIFIED')
+                .order_by('notified_at')
+                .values_list('notified_at')
+                .first()
+            )
+            current = notified_holder_seconds(holder[0] or now, stats, now) if holder is not None else 0.0
+        seconds = int(round(predict_wait_seconds(position, current, stats)))
+    return {'estimated_wait_seconds': seconds, 'estimated_notify_at': now + datetime.timedelta(seconds=seconds)}
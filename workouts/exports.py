@@ -0,0 +1,149 @@
+# workouts/exports.py
+"""
+운영자용 이용 기록 내보내기 (GET /api/workouts/export/<sessions|reservations>/)
+
+모델 인스턴스나 DRF 직렬화를 거치지 않고 values_list() 튜플을 .iterator(chunk_size)로 읽어
+CSV/NDJSON 줄로 바로 흘려보내므로, 내보내는 행 수와 관계없이 메모리 사용량이 일정합니다.
+(PostgreSQL에서는 서버 측 커서를 사용합니다)
+"""
+import csv
+import io
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+from .models import Reservation, UsageSession
+
+# kind -> (모델, 기간 필터 기준 필드, [(컬럼 이름, values_list 경로), ...])
+EXPORTS = {
+    'sessions': (UsageSession, 'start_time', [
+        ('id', 'id'),
+        ('gym_id', 'equipment__gym_id'),
+        ('equipment_id', 'equipment_id'),
+        ('equipment', 'equipment__name'),
+        ('user_id', 'user_id'),
+        ('user', 'user__username'),
+        ('session_type', 'session_type'),
+        ('allocated_duration_minutes', 'allocated_duration_minutes'),
+        ('start_time', 'start_time'),
+        ('end_time', 'end_time'),
+    ]),
+    'reservations': (Reservation, 'created_at', [
+        ('id', 'id'),
+        ('gym_id', 'equipment__gym_id'),
+        ('equipment_id', 'equipment_id'),
+        ('equipment', 'equipment__name'),
+        ('user_id', 'user_id'),
+        ('user', 'user__username'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+        ('notified_at', 'notified_at'),
+    ]),
+}
+
+
+def get_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_rows(kind, gym_ids, start=None, end=None):
+    """
+    (컬럼 이름 목록, 행 튜플 이터레이터)를 반환합니다. 행은 기간 기준 필드 → id 순서입니다.
+    gym_ids는 id 목록 또는 서브쿼리, start/end는 [start, end) 범위의 datetime입니다.
+    """
+    model, time_field, columns = EXPORTS[kind]
+    queryset = model.objects.filter(equipment__gym_id__in=gym_ids)
+    if start is not None:
+        queryset = queryset.filter(**{f'{time_field}__gte': start})
+    if end is not None:
+        queryset = queryset.filter(**{f'{time_field}__lt': end})
+    rows = (
+        queryset.order_by(time_field, 'id')
+        .values_list(*[path for _, path in columns])
+        .iterator(chunk_size=get_chunk_size())
+    )
+    return [name for name, _ in columns], rows
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(columns, rows):
+    """ 헤더 한 줄 + 행마다 한 줄. 조회 청크 단위로 모아서 내보냅니다. """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batched(rows, get_chunk_size()):
+        writer.writerows((value.isoformat() if hasattr(value, 'isoformat') else value for value in row) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(columns, rows):
+    """ 행마다 JSON 객체 한 줄 (application/x-ndjson) """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for batch in _batched(rows, get_chunk_size()):
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in batch)
+
+
+class _ExportRenderer(BaseRenderer):
+    """
+    ?format=csv / ?format=ndjson (또는 Accept 헤더)로 내보내기 형식을 고르는 용도의 렌더러.
+    본문은 뷰가 StreamingHttpResponse로 직접 만들므로 render()는 사용하지 않습니다. (select_export_renderer 참고)
+    """
+    charset = 'utf-8'
+
+
+class CSVExportRenderer(_ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    stream = staticmethod(stream_csv)
+
+
+class NDJSONExportRenderer(_ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    stream = staticmethod(stream_ndjson)
+
+
+EXPORT_RENDERERS = (CSVExportRenderer, NDJSONExportRenderer)
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    내보내기 뷰의 DRF 응답(검증 오류 등)은 항상 첫 번째 렌더러(JSON)로 보냅니다.
+    내보내기 형식은 요청을 검증한 뒤 뷰가 select_export_renderer()로 고릅니다.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def select_export_renderer(request):
+    """
+    ?format= 또는 Accept 헤더로 내보내기 렌더러를 고릅니다. (기본 CSV)
+    알 수 없는 format이거나 Accept에 맞는 형식이 없으면 None
+    """
+    renderers = [renderer_class() for renderer_class in EXPORT_RENDERERS]
+    fmt = request.query_params.get('format')
+    if fmt:
+        return next((renderer for renderer in renderers if renderer.format == fmt), None)
+    try:
+        renderer, _ = DefaultContentNegotiation().select_renderer(request, renderers)
+    except NotAcceptable:
+        return None
+    return renderer
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+import datetime
+
+from workouts.services import bucket_for
+from workouts.utilization import rollup_utilization
+
+
+class Command(BaseCommand):
+    help = 'Rebuild EquipmentUtilization rollups from UsageSession/Reservation history, one day at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=90, help='최근 N일의 버킷을 다시 만듭니다.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = bucket_for(now - datetime.timedelta(days=options['days']))
+        end = bucket_for(now) + datetime.timedelta(hours=1)
+        self.stdout.write(f'Rebuilding utilization rollups for buckets since {since.isoformat()}')
+
+        # 하루 단위로 나눠 계산/교체하므로 메모리 사용량과 트랜잭션 크기가 기간과 무관합니다.
+        created = 0
+        day_start = since
+        while day_start < end:
+            day_end = min(day_start + datetime.timedelta(days=1), end)
+            created += rollup_utilization(day_start, day_end, now=now)
+            day_start = day_end
+
+        self.stdout.write(self.style.SUCCESS(f'Created: {created}'))
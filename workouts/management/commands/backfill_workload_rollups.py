@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+import datetime
+
+from workouts.models import BodyPartWorkload, UsageSession
+from workouts.services import aggregate_session_workload, bucket_for
+
+
+class Command(BaseCommand):
+    help = 'Rebuild BodyPartWorkload rollups from completed UsageSession history in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=None,
+            help='최근 N일의 버킷만 다시 만듭니다. 생략하면 전체 기록을 다시 만듭니다.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create 배치 크기')
+
+    def handle(self, *args, **options):
+        sessions = UsageSession.objects.all()
+        rollups = BodyPartWorkload.objects.all()
+        if options['days'] is not None:
+            since = bucket_for(timezone.now() - datetime.timedelta(days=options['days']))
+            sessions = sessions.filter(start_time__gte=since)
+            rollups = rollups.filter(bucket_start__gte=since)
+            self.stdout.write(f'Rebuilding rollups for buckets since {since.isoformat()}')
+        else:
+            self.stdout.write('Rebuilding all rollups')
+
+        batch_size = options['batch_size']
+        created = 0
+        # 범위 내 롤업을 지우고 원본 세션을 한 번의 GROUP BY로 집계해 다시 채웁니다.
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            batch = []
+            for row in aggregate_session_workload(sessions):
+                batch.append(BodyPartWorkload(
+                    user_id=row['user_id'],
+                    bucket_start=row['bucket_start'],
+                    body_part=row['body_part'],
+                    duration_seconds=max(row['duration'].total_seconds(), 0) if row['duration'] else 0,
+                    session_count=row['session_count'],
+                ))
+                if len(batch) >= batch_size:
+                    BodyPartWorkload.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                BodyPartWorkload.objects.bulk_create(batch)
+                created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted: {deleted}, Created: {created}'))
@@ -0,0 +1,152 @@
+"""
+GET /api/sessions/ 목록의 페이지 조회 비용을 테이블 크기별로 측정합니다.
+
+커서 페이지네이션(기본)의 첫 페이지 / 깊은 페이지(90% 지점)와, 비교용 OFFSET 페이지네이션의
+같은 위치 페이지를 뷰 전체(스코프 + 직렬화)로 호출해 쿼리 수, 지연 시간, 메모리 피크를 출력합니다.
+벤치마크용 데이터는 트랜잭션 안에서 만들고 끝나면 롤백합니다.
+Usage: python manage.py bench_pagination [--sizes 1000,10000,100000] [--page-size 50] [--repeat 5]
+"""
+import contextlib
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.pagination import StandardCursorPagination
+from equipment.models import Equipment
+from gyms.models import Gym
+from workouts.models import UsageSession
+from workouts.views import UsageSessionViewSet
+
+BATCH_SIZE = 5000
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _OffsetPagination(PageNumberPagination):
+    """ 비교용 ?page=N&page_size=M OFFSET 페이지네이션 """
+    page_size_query_param = 'page_size'
+    max_page_size = StandardCursorPagination.max_page_size
+
+
+class _OffsetSessionViewSet(UsageSessionViewSet):
+    """ 비교용: 같은 뷰를 OFFSET(page=N) 페이지네이션으로 """
+    pagination_class = _OffsetPagination
+
+    def get_queryset(self):
+        return super().get_queryset().order_by('-start_time', '-id')
+
+
+@contextlib.contextmanager
+def _explicit_start_time():
+    # start_time은 auto_now_add라 bulk_create가 현재 시각으로 덮어쓰므로, 생성하는 동안만 해제
+    field = UsageSession._meta.get_field('start_time')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks cursor vs offset pagination of the session list as the table grows (rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='측정할 세션 행 수 (쉼표 구분, 오름차순)')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5, help='페이지별 측정 횟수')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes는 쉼표로 구분된 정수여야 합니다.')
+
+        try:
+            with transaction.atomic():
+                self._run(sizes, options['page_size'], options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, sizes, page_size, repeat):
+        member = User.objects.create(username='bench-pagination-member')
+        gym = Gym.objects.create(owner=member, name='bench gym', address='-')
+        equipment = Equipment.objects.create(
+            gym=gym, name='bench', type='STRENGTH', nfc_tag_id='bench-page-nfc', arduino_id='bench-page-ard'
+        )
+        self.factory = APIRequestFactory()
+        self.member = member
+        self.page_size = page_size
+        self.repeat = repeat
+
+        self.stdout.write(f'page_size={page_size}, repeat={repeat}')
+        self.stdout.write(f"{'rows':>9} | {'page':<13} | {'queries':>7} {'p50 ms':>8} {'peak KB':>8}")
+
+        base = timezone.now() - timedelta(days=365)
+        rows = 0
+        for size in sizes:
+            with _explicit_start_time():
+                while rows < size:
+                    count = min(BATCH_SIZE, size - rows)
+                    UsageSession.objects.bulk_create([
+                        UsageSession(user=member, equipment=equipment, allocated_duration_minutes=15,
+                                     start_time=base + timedelta(seconds=rows + i))
+                        for i in range(count)
+                    ])
+                    rows += count
+
+            deep_index = int(size * 0.9)
+            deep_start = base + timedelta(seconds=size - 1 - deep_index)
+            paginator = StandardCursorPagination()
+            paginator.base_url = '/api/sessions/'
+            cursor_url = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(deep_start)))
+            cursor = parse_qs(urlparse(cursor_url).query)['cursor'][0]
+            deep_page = deep_index // page_size + 1
+
+            list_view = UsageSessionViewSet.as_view({'get': 'list'})
+            offset_view = _OffsetSessionViewSet.as_view({'get': 'list'})
+            self._measure(size, 'cursor first', list_view, {})
+            self._measure(size, 'cursor 90%', list_view, {'cursor': cursor})
+            self._measure(size, 'offset 90%', offset_view, {'page': deep_page})
+
+    def _measure(self, size, label, view, params):
+        params = {'page_size': self.page_size, **params}
+
+        def call():
+            request = self.factory.get('/api/sessions/', params)
+            force_authenticate(request, user=self.member)
+            response = view(request)
+            response.render()
+            return response
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = call()
+        if response.status_code != 200 or len(response.data['results']) != self.page_size:
+            raise CommandError(f'{label}: unexpected response {response.status_code}')
+
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f'{size:>9} | {label:<13} | {len(ctx.captured_queries):>7} {statistics.median(timings):>8.3f} {peak / 1024:>8.1f}'
+        )
@@ -0,0 +1,95 @@
+"""
+대기 순번 계산을 기존 방식(WAITING 목록 전체를 읽어 index 계산)과 COUNT 방식으로 비교합니다.
+벤치마크용 데이터는 트랜잭션 안에서 만들고 끝나면 롤백합니다.
+Usage: python manage.py bench_queue_position [--depths 10 100 1000] [--polls 200]
+"""
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from equipment.models import Equipment
+from gyms.models import Gym
+from workouts.models import Reservation
+from workouts.queue_engine import DatabaseQueueEngine
+
+
+def legacy_position(reservation):
+    """ 변경 전 JoinQueueView의 계산 방식 """
+    waiting = Reservation.objects.filter(equipment_id=reservation.equipment_id, status='WAITING').order_by('created_at')
+    position = list(waiting).index(reservation) + 1
+    waiting_count = Reservation.objects.filter(equipment_id=reservation.equipment_id, status='WAITING').count()
+    return position, waiting_count
+
+
+def count_position(reservation, engine=DatabaseQueueEngine()):
+    return engine.rank(reservation) + 1, engine.length(reservation.equipment_id)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks queue-position computation (materialized list vs. indexed COUNT) at several queue depths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depths', type=int, nargs='+', default=[10, 100, 1000], help='대기열 길이')
+        parser.add_argument('--polls', type=int, default=200, help='깊이별 폴링(순번 조회) 횟수')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'depth':>6} | {'legacy q':>8} {'p50 ms':>8} {'p95 ms':>8} | {'count q':>7} {'p50 ms':>8} {'p95 ms':>8}"
+            f" | {'endpoint p50':>12}"
+        )
+        for depth in options['depths']:
+            try:
+                with transaction.atomic():
+                    self._run(depth, options['polls'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _run(self, depth, polls):
+        owner = User.objects.create(username='bench-queue-owner')
+        gym = Gym.objects.create(owner=owner, name='bench gym', address='-')
+        equipment = Equipment.objects.create(
+            gym=gym, name='bench squat rack', type='STRENGTH',
+            nfc_tag_id='bench-queue-nfc', arduino_id='bench-queue-ard',
+        )
+        users = User.objects.bulk_create([User(username=f'bench-queue-{i}') for i in range(depth)])
+        Reservation.objects.bulk_create([Reservation(user=u, equipment=equipment, status='WAITING') for u in users])
+        waiting = list(Reservation.objects.filter(equipment=equipment).order_by('created_at', 'id'))
+
+        # 여러 클라이언트가 대기열 곳곳에서 폴링하는 상황을 흉내냄
+        targets = [waiting[(i * 7919) % depth] for i in range(polls)]
+        legacy = self._measure(legacy_position, targets)
+        counted = self._measure(count_position, targets)
+
+        client = APIClient()
+        endpoint = []
+        for reservation in targets[:min(polls, 50)]:
+            client.force_authenticate(reservation.user)
+            started = time.perf_counter()
+            client.get('/api/workouts/queue-position/', {'reservation_id': reservation.id})
+            endpoint.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(
+            f'{depth:>6} | {legacy[0]:>8} {legacy[1]:>8.3f} {legacy[2]:>8.3f}'
+            f' | {counted[0]:>7} {counted[1]:>8.3f} {counted[2]:>8.3f} | {statistics.median(endpoint):>12.3f}'
+        )
+
+    def _measure(self, fn, targets):
+        with CaptureQueriesContext(connection) as ctx:
+            fn(targets[0])
+        timings = []
+        for reservation in targets:
+            started = time.perf_counter()
+            fn(reservation)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return len(ctx.captured_queries), statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
@@ -0,0 +1,87 @@
+"""
+QueueService의 핫 패스(advance / cancel / expire_stale)의 쿼리 수와 지연 시간을 측정합니다.
+벤치마크용 데이터는 트랜잭션 안에서 만들고 끝나면 롤백합니다.
+Usage: python manage.py bench_queue_service [--equipment 50] [--depth 20] [--rounds 200]
+"""
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from equipment.models import Equipment
+from gyms.models import Gym
+from workouts.models import Reservation
+from workouts.queue_service import QueueService
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks QueueService operations (query count and latency) on a rolled-back synthetic queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipment', type=int, default=50, help='기구 수')
+        parser.add_argument('--depth', type=int, default=20, help='기구별 대기자 수')
+        parser.add_argument('--rounds', type=int, default=200, help='advance/cancel 측정 횟수')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options['equipment'], options['depth'], options['rounds'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, n_equipment, depth, rounds):
+        owner = User.objects.create(username='bench-service-owner')
+        gym = Gym.objects.create(owner=owner, name='bench gym', address='-')
+        equipments = Equipment.objects.bulk_create([
+            Equipment(gym=gym, name=f'bench {i}', type='STRENGTH', nfc_tag_id=f'bench-svc-nfc-{i}', arduino_id=f'bench-svc-ard-{i}')
+            for i in range(n_equipment)
+        ])
+        users = User.objects.bulk_create([User(username=f'bench-service-{i}') for i in range(depth)])
+        stale = timezone.now() - timedelta(hours=1)
+        reservations = []
+        for equipment in equipments:
+            reservations.append(Reservation(user=users[0], equipment=equipment, status='NOTIFIED', notified_at=stale))
+            reservations.extend(Reservation(user=u, equipment=equipment, status='WAITING') for u in users[1:])
+        Reservation.objects.bulk_create(reservations)
+
+        service = QueueService()
+        self.stdout.write(f'{n_equipment} equipment x {depth} reservations')
+        self.stdout.write(f"{'operation':<14} | {'queries':>7} {'p50 ms':>8} {'p95 ms':>8}")
+
+        # expire_stale: 모든 기구의 NOTIFIED 예약을 한 번에 만료 + 승격
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            result = service.expire_stale(timezone.now(), batch_size=n_equipment)
+            elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"{'expire_stale':<14} | {len(ctx.captured_queries):>7} {elapsed:>8.3f} {'-':>8}"
+                          f"  (expired={result['expired']}, notified={result['notified']})")
+
+        targets = [equipments[i % n_equipment].id for i in range(rounds)]
+        self._report('advance', [lambda eq_id=eq_id: service.advance(eq_id) for eq_id in targets])
+
+        waiting = list(Reservation.objects.filter(equipment__in=equipments, status='WAITING')[:rounds])
+        self._report('cancel', [lambda r=r: service.cancel(r) for r in waiting])
+
+    def _report(self, name, calls):
+        if not calls:
+            return
+        with CaptureQueriesContext(connection) as ctx:
+            calls[0]()
+        timings = []
+        for call in calls[1:]:
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings = sorted(timings) or [0.0]
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(f'{name:<14} | {len(ctx.captured_queries):>7} {statistics.median(timings):>8.3f} {p95:>8.3f}')
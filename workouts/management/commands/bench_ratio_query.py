@@ -0,0 +1,118 @@
+"""
+StartSessionView의 24시간 상/하체 비율 계산을 기존 방식(세션별 루프), 단일 집계 쿼리,
+BodyPartWorkload 롤업 조회로 비교합니다.
+벤치마크용 데이터는 트랜잭션 안에서 만들고 끝나면 롤백합니다.
+Usage: python manage.py bench_ratio_query [--history 10 100 1000 5000] [--repeat 20]
+"""
+import datetime
+import io
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from equipment.models import Equipment
+from gyms.models import Gym
+from workouts.models import UsageSession
+from workouts.services import get_recent_body_part_ratios, get_recent_body_part_ratios_from_sessions
+
+
+def legacy_ratios(user, now):
+    """ 변경 전 StartSessionView의 계산 방식 (세션마다 equipment를 따로 조회) """
+    recent_sessions = UsageSession.objects.filter(
+        user=user,
+        start_time__gte=now - datetime.timedelta(hours=24),
+        end_time__isnull=False,
+    )
+    total = upper = lower = 0
+    for session in recent_sessions:
+        duration = (session.end_time - session.start_time).total_seconds() / 60
+        total += duration
+        if session.equipment.body_part == 'UPPER':
+            upper += duration
+        elif session.equipment.body_part == 'LOWER':
+            lower += duration
+    return {
+        'upper_ratio': (upper / total) if total > 0 else 0,
+        'lower_ratio': (lower / total) if total > 0 else 0,
+    }
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks query count and latency of the 24h upper/lower ratio computation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history', type=int, nargs='+', default=[10, 100, 1000, 5000],
+                            help='사용자별 전체 세션 수 (최근 24시간 + 과거 기록)')
+        parser.add_argument('--repeat', type=int, default=20, help='측정 반복 횟수')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'history':>8} {'in 24h':>7} | {'legacy q':>8} {'legacy ms':>10} | {'agg q':>5} {'agg ms':>8}"
+            f" | {'rollup q':>8} {'rollup ms':>9}"
+        )
+        for history in options['history']:
+            try:
+                with transaction.atomic():
+                    self._run(history, options['repeat'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _run(self, history, repeat):
+        owner = User.objects.create(username='bench-ratio-owner')
+        user = User.objects.create(username='bench-ratio-user')
+        gym = Gym.objects.create(owner=owner, name='bench gym', address='-')
+        equipments = [
+            Equipment.objects.create(
+                gym=gym, name=f'bench-{part}', type='STRENGTH', body_part=part,
+                nfc_tag_id=f'bench-ratio-nfc-{part}', arduino_id=f'bench-ratio-ard-{part}',
+            )
+            for part in ('UPPER', 'LOWER', 'CORE')
+        ]
+
+        # 세션의 20%는 최근 24시간, 나머지는 과거 30일에 분포
+        now = timezone.now()
+        sessions = UsageSession.objects.bulk_create([
+            UsageSession(user=user, equipment=equipments[i % 3], allocated_duration_minutes=15, session_type='BASE')
+            for i in range(history)
+        ])
+        recent = max(1, history // 5)
+        for i, session in enumerate(sessions):
+            if i < recent:
+                session.start_time = now - datetime.timedelta(minutes=20 * (i % 60) + 5)
+            else:
+                session.start_time = now - datetime.timedelta(days=2 + i % 28, minutes=i % 600)
+            session.end_time = session.start_time + datetime.timedelta(minutes=10 + i % 20)
+        UsageSession.objects.bulk_update(sessions, ['start_time', 'end_time'], batch_size=500)
+        in_window = UsageSession.objects.filter(user=user, start_time__gte=now - datetime.timedelta(hours=24)).count()
+
+        call_command('backfill_workload_rollups', stdout=io.StringIO())
+
+        legacy = self._measure(lambda: legacy_ratios(user, now), repeat)
+        aggregated = self._measure(lambda: get_recent_body_part_ratios_from_sessions(user, now=now), repeat)
+        rollup = self._measure(lambda: get_recent_body_part_ratios(user, now=now), repeat)
+
+        self.stdout.write(
+            f'{history:>8} {in_window:>7} | {legacy[0]:>8} {legacy[1]:>10.3f} | {aggregated[0]:>5} {aggregated[1]:>8.3f}'
+            f' | {rollup[0]:>8} {rollup[1]:>9.3f}'
+        )
+
+    def _measure(self, fn, repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return len(ctx.captured_queries), statistics.median(timings)
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+import datetime
+
+from workouts.models import BodyPartWorkload, UsageSession
+from workouts.services import aggregate_session_workload, bucket_for
+
+
+class Command(BaseCommand):
+    help = 'Compare BodyPartWorkload rollups against raw UsageSession rows and report mismatching buckets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=7, help='검사할 기간(일). 기본 7일')
+        parser.add_argument('--user', type=int, default=None, help='특정 user id만 검사')
+        parser.add_argument('--tolerance', type=float, default=1.0, help='허용 오차(초). 기본 1초')
+        parser.add_argument('--limit', type=int, default=20, help='출력할 불일치 항목 수')
+
+    def handle(self, *args, **options):
+        since = bucket_for(timezone.now() - datetime.timedelta(days=options['days']))
+        sessions = UsageSession.objects.filter(start_time__gte=since)
+        rollups = BodyPartWorkload.objects.filter(bucket_start__gte=since)
+        if options['user'] is not None:
+            sessions = sessions.filter(user_id=options['user'])
+            rollups = rollups.filter(user_id=options['user'])
+
+        expected = {}
+        for row in aggregate_session_workload(sessions):
+            key = (row['user_id'], row['bucket_start'], row['body_part'])
+            seconds = max(row['duration'].total_seconds(), 0) if row['duration'] else 0
+            expected[key] = (seconds, row['session_count'])
+
+        actual = {
+            (r['user_id'], r['bucket_start'], r['body_part']): (r['duration_seconds'], r['session_count'])
+            for r in rollups.values('user_id', 'bucket_start', 'body_part', 'duration_seconds', 'session_count').iterator()
+        }
+
+        mismatches = []
+        for key in expected.keys() | actual.keys():
+            exp_seconds, exp_count = expected.get(key, (0, 0))
+            act_seconds, act_count = actual.get(key, (0, 0))
+            if abs(exp_seconds - act_seconds) > options['tolerance'] or exp_count != act_count:
+                mismatches.append((key, (exp_seconds, exp_count), (act_seconds, act_count)))
+
+        self.stdout.write(f'Checked {len(expected)} session buckets / {len(actual)} rollup rows since {since.isoformat()}')
+        for (user_id, bucket, part), exp, act in sorted(mismatches, key=lambda m: m[0][1])[:options['limit']]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'user={user_id} bucket={bucket.isoformat()} body_part={part} '
+                    f'sessions={exp[0]:.0f}s/{exp[1]} rollup={act[0]:.0f}s/{act[1]}'
+                )
+            )
+
+        if mismatches:
+            raise CommandError(
+                f'{len(mismatches)} mismatching buckets. Run backfill_workload_rollups --days {options["days"]:g} to repair.'
+            )
+        self.stdout.write(self.style.SUCCESS('Rollups are consistent with raw sessions.'))
@@ -0,0 +1,132 @@
+"""
+과거 예약 기록을 재생해 대기열 ETA(workouts.eta)의 오차를 측정합니다.
+
+각 예약의 등록 시점(created_at)으로 돌아가 그 시점에 알 수 있던 정보만으로
+(앞선 대기자 수, 진행 중 세션의 남은 시간, 직전 ETA_HISTORY_DAYS일의 평균 세션 길이/교대 시간)
+predict_wait_seconds를 계산하고, 실제 대기 시간(created_at → notified_at)과 비교합니다.
+비교 기준으로 '순번 x 기구 기본 세션 시간' 단순 추정의 오차도 함께 출력합니다.
+Usage: python manage.py evaluate_eta [--days 30] [--equipment 3]
+"""
+import bisect
+import datetime
+import itertools
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from equipment.models import Equipment
+from workouts.eta import blend_stats, predict_wait_seconds, remaining_seconds
+from workouts.models import Reservation, UsageSession
+
+
+class _Window:
+    """ 시각순 (시각, 값) 이벤트의 [since, until) 합계/건수를 이분 탐색으로 구합니다. """
+
+    def __init__(self, events):
+        events = sorted(events)
+        self.times = [at for at, _ in events]
+        self.sums = [0.0, *itertools.accumulate(value for _, value in events)]
+
+    def total(self, since, until):
+        lo, hi = bisect.bisect_left(self.times, since), bisect.bisect_left(self.times, until)
+        return self.sums[hi] - self.sums[lo], hi - lo
+
+
+class Command(BaseCommand):
+    help = 'Replays historical reservations and measures the error of the queue wait-time estimate.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=30, help='최근 N일 동안 등록된 예약을 평가합니다.')
+        parser.add_argument('--equipment', type=int, default=None, help='특정 기구만 평가')
+
+    def handle(self, *args, **options):
+        until = timezone.now()
+        since = until - datetime.timedelta(days=options['days'])
+        history = datetime.timedelta(days=getattr(settings, 'ETA_HISTORY_DAYS', 30))
+
+        equipments = Equipment.objects.order_by('id')
+        if options['equipment'] is not None:
+            equipments = equipments.filter(id=options['equipment'])
+
+        errors = {'eta': [], 'baseline': []}
+        for equipment in equipments.iterator():
+            for predicted, baseline, actual in self._replay(equipment, since, until, history):
+                errors['eta'].append(predicted - actual)
+                errors['baseline'].append(baseline - actual)
+
+        samples = len(errors['eta'])
+        self.stdout.write(f'{samples} reservations notified between {since:%Y-%m-%d} and {until:%Y-%m-%d}')
+        if not samples:
+            return
+        self.stdout.write(f"{'estimator':<10} | {'MAE s':>8} {'median s':>9} {'p90 s':>8} {'bias s':>8}")
+        for name, values in errors.items():
+            absolute = sorted(abs(v) for v in values)
+            p90 = absolute[min(int(len(absolute) * 0.9), len(absolute) - 1)]
+            self.stdout.write(
+                f'{name:<10} | {statistics.mean(absolute):>8.1f} {statistics.median(absolute):>9.1f} '
+                f'{p90:>8.1f} {statistics.mean(values):>8.1f}'
+            )
+
+    def _replay(self, equipment, since, until, history):
+        """ 기구 하나의 예약들을 재생해 (예측, 기준 추정, 실제) 대기 시간(초)을 돌려줍니다. """
+        sessions = list(
+            UsageSession.objects.filter(equipment=equipment, start_time__gte=since - history, start_time__lt=until)
+            .order_by('start_time')
+            .values_list('user_id', 'start_time', 'end_time', 'allocated_duration_minutes')
+        )
+        reservations = list(
+            Reservation.objects.filter(equipment=equipment, created_at__gte=since - history, created_at__lt=until)
+            .order_by('created_at', 'id')
+            .values_list('user_id', 'created_at', 'notified_at', 'status')
+        )
+        base = equipment.base_session_time_minutes
+
+        starts = [start for _, start, _, _ in sessions]
+        durations = _Window(
+            (end, (end - start).total_seconds()) for _, start, end, _ in sessions if end is not None
+        )
+        # 교대 시간: 알림 후 같은 사용자의 첫 세션 시작까지 (시작 시점에 알 수 있음)
+        user_starts = {}
+        for user_id, start, _, _ in sessions:
+            user_starts.setdefault(user_id, []).append(start)
+        handovers = []
+        for user_id, _, notified_at, status in reservations:
+            if status != 'COMPLETED' or notified_at is None:
+                continue
+            candidates = user_starts.get(user_id, [])
+            index = bisect.bisect_left(candidates, notified_at)
+            if index < len(candidates):
+                handovers.append((candidates[index], (candidates[index] - notified_at).total_seconds()))
+        handovers = _Window(handovers)
+
+        for index, (_, created_at, notified_at, _) in enumerate(reservations):
+            if created_at < since or notified_at is None:
+                continue
+
+            # 등록 시점에 아직 기다리고 있던 앞선 예약 수 (알림 전 취소된 예약은 종료 시각을 알 수 없어 제외)
+            ahead = sum(
+                1 for _, other_created, other_notified, other_status in reservations[:index]
+                if (other_notified is not None and other_notified > created_at)
+                or (other_notified is None and other_status == 'WAITING')
+            )
+            position = ahead + 1
+
+            current = 0.0
+            latest = bisect.bisect_right(starts, created_at) - 1
+            if latest >= 0:
+                _, start, end, allocated = sessions[latest]
+                if end is None or end > created_at:
+                    current = remaining_seconds(start, allocated, created_at)
+
+            stats = blend_stats(
+                base,
+                *durations.total(created_at - history, created_at),
+                *handovers.total(created_at - history, created_at),
+            )
+            yield (
+                predict_wait_seconds(position, current, stats),
+                position * base * 60,
+                (notified_at - created_at).total_seconds(),
+            )
@@ -1,51 +1,38 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from workouts.models import Reservation
-from django.db import transaction
+from workouts.tasks import expire_notified_reservations
 import datetime
 
 
 class Command(BaseCommand):
     help = 'Expire NOTIFIED reservations older than the configured timeout and notify next waiting user.'
 
-    # 기본 만료 시간(분) - 데모를 위해 기본을 0.25분(15초)로 설정
-    DEFAULT_TIMEOUT_MINUTES = 0.25
-
     def add_arguments(self, parser):
         parser.add_argument(
             '--minutes',
             type=float,
-            help='만료 타임아웃(분). 소수값 허용 (예: 0.25 = 15초). 기본값은 0.25분입니다.',
-            default=self.DEFAULT_TIMEOUT_MINUTES,
+            help='만료 타임아웃(분). 소수값 허용 (예: 0.25 = 15초). 기본값은 settings.RESERVATION_NOTIFY_TIMEOUT_MINUTES 입니다.',
+            default=None,
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='한 트랜잭션에서 만료시킬 최대 예약 수 (기본 500)',
         )
 
     def handle(self, *args, **options):
-        timeout_minutes = options.get('minutes', self.DEFAULT_TIMEOUT_MINUTES)
+        timeout_minutes = options['minutes']
+        if timeout_minutes is None:
+            timeout_minutes = settings.RESERVATION_NOTIFY_TIMEOUT_MINUTES
         cutoff = timezone.now() - datetime.timedelta(minutes=timeout_minutes)
 
         self.stdout.write(f'Expire reservations NOTIFIED before {cutoff.isoformat()}')
 
-        # 트랜잭션 내부에서 처리: 만료시키고 다음 대기자 알림
-        expired_count = 0
-        notified_count = 0
-
-        with transaction.atomic():
-            expired_reservations = Reservation.objects.select_for_update().filter(status='NOTIFIED', notified_at__lt=cutoff)
-
-            for r in expired_reservations:
-                self.stdout.write(f'Expiring reservation id={r.id} user={r.user.username} equipment={r.equipment.name}')
-                r.status = 'EXPIRED'
-                r.save()
-                expired_count += 1
-
-                # 다음 대기자에게 알림 상태로 변경
-                next_r = Reservation.objects.filter(equipment=r.equipment, status='WAITING').order_by('created_at').first()
-                if next_r:
-                    next_r.status = 'NOTIFIED'
-                    next_r.notified_at = timezone.now()
-                    next_r.save()
-                    notified_count += 1
-                    self.stdout.write(f'Notified next reservation id={next_r.id} user={next_r.user.username}')
-                    # TODO: 실제 푸시 전송 로직을 여기에 추가
+        # Celery 태스크와 같은 집합 단위(batch) 만료/승격 로직을 그대로 실행
+        result = expire_notified_reservations(timeout_minutes=timeout_minutes, batch_size=options['batch_size'])
 
-        self.stdout.write(self.style.SUCCESS(f'Expired: {expired_count}, Notified: {notified_count}'))
+        for i, batch in enumerate(result['batches'], start=1):
+            self.stdout.write(f"batch {i}: expired={batch['expired']} notified={batch['notified']} ({batch['ms']}ms)")
+        self.stdout.write(self.style.SUCCESS(f"Expired: {result['expired']}, Notified: {result['notified']}"))
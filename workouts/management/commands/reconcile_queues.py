@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from workouts.queue_engine import get_queue_engine
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the configured queue engine (e.g. Redis sorted sets) from WAITING reservations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipment', type=int, default=None, help='특정 기구(id)의 대기열만 재구성')
+
+    def handle(self, *args, **options):
+        engine = get_queue_engine()
+        rebuilt = engine.rebuild(options['equipment'])
+        self.stdout.write(self.style.SUCCESS(f'{type(engine).__name__}: rebuilt {rebuilt} queue(s)'))
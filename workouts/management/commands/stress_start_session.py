@@ -0,0 +1,101 @@
+"""
+한 기구에 동시에 운동 시작(StartSessionView) 요청을 몰아 보내는 부하 테스트입니다.
+정확히 한 명만 시작(201)하고 나머지는 409를 받는지, 그리고 지연 시간(p50/p99)을 확인합니다.
+
+스레드마다 별도 DB 연결을 쓰므로 데이터는 실제로 커밋되고, 끝나면 만든 행을 지웁니다.
+행 잠금(select_for_update)을 지원하는 DB(PostgreSQL)에서 실행하세요.
+Usage: python manage.py stress_start_session [--users 200] [--rounds 3] [--max-p99-ms 2000]
+"""
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from equipment.models import Equipment
+from gyms.models import Gym
+from workouts.models import UsageSession
+from workouts.views import StartSessionView
+
+
+class Command(BaseCommand):
+    help = 'Fires simultaneous session starts at one machine and checks there is exactly one winner.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='동시에 시작을 시도하는 사용자 수')
+        parser.add_argument('--rounds', type=int, default=3, help='반복 횟수 (라운드마다 기구를 비움)')
+        parser.add_argument('--max-p99-ms', type=float, default=2000, help='p99 지연 시간 상한 (초과하면 실패)')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        owner = User.objects.create(username=f'stress-{tag}-owner')
+        try:
+            gym = Gym.objects.create(owner=owner, name='stress gym', address='-')
+            equipment = Equipment.objects.create(
+                gym=gym, name='stress', type='STRENGTH', nfc_tag_id=f'stress-{tag}', arduino_id=f'stress-{tag}'
+            )
+            users = User.objects.bulk_create([User(username=f'stress-{tag}-{i}') for i in range(options['users'])])
+
+            latencies = []
+            for round_no in range(options['rounds']):
+                Equipment.objects.filter(pk=equipment.pk).update(status='AVAILABLE')
+                UsageSession.objects.filter(equipment=equipment).delete()
+                results = self._fire(equipment, users)
+
+                codes = [code for code, _ in results]
+                winners = codes.count(201)
+                open_sessions = UsageSession.objects.filter(equipment=equipment, end_time__isnull=True).count()
+                latencies.extend(ms for _, ms in results)
+                self.stdout.write(
+                    f'round {round_no + 1}: 201={winners} 409={codes.count(409)} '
+                    f'other={len(codes) - winners - codes.count(409)} open_sessions={open_sessions}'
+                )
+                if winners != 1 or open_sessions != 1:
+                    raise CommandError(f'expected exactly one winner, got {winners} (open sessions: {open_sessions})')
+                if len(codes) != winners + codes.count(409):
+                    raise CommandError(f'unexpected responses: {sorted(set(codes))}')
+        finally:
+            # 사용자 삭제 시 세션/기구/헬스장도 함께 삭제 (CASCADE)
+            User.objects.filter(username__startswith=f'stress-{tag}-').delete()
+
+        latencies.sort()
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+        self.stdout.write(f'latency ms: p50={statistics.median(latencies):.1f} p99={p99:.1f} max={latencies[-1]:.1f}')
+        if p99 > options['max_p99_ms']:
+            raise CommandError(f'p99 {p99:.1f}ms exceeds {options["max_p99_ms"]}ms')
+        self.stdout.write(self.style.SUCCESS('OK: exactly one winner per round'))
+
+    def _fire(self, equipment, users):
+        """ 모든 스레드가 준비되면 동시에 시작 요청을 보내고 (상태 코드, 지연 ms) 목록을 반환합니다. """
+        view = StartSessionView.as_view()
+        factory = APIRequestFactory()
+        barrier = threading.Barrier(len(users))
+        results = []
+        lock = threading.Lock()
+
+        def start(user):
+            request = factory.post('/api/workouts/start/', {'equipment_id': equipment.id}, format='json')
+            force_authenticate(request, user=user)
+            try:
+                barrier.wait()
+                started = time.perf_counter()
+                try:
+                    code = view(request).status_code
+                except Exception:
+                    code = 500
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    results.append((code, elapsed))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=start, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
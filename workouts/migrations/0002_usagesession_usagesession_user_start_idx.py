@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_equipment_ai_model_id_equipment_body_part_and_more'),
+        ('workouts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usagesession',
+            index=models.Index(fields=['user', 'start_time'], name='usagesession_user_start_idx'),
+        ),
+    ]
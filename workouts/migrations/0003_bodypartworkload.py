@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0002_usagesession_usagesession_user_start_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BodyPartWorkload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('body_part', models.CharField(choices=[('UPPER', '상체'), ('LOWER', '하체'), ('CORE', '코어'), ('CARDIO', '유산소'), ('ETC', '기타')], max_length=10)),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('session_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'bucket_start', 'body_part'), name='unique_workload_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_equipment_ai_model_id_equipment_body_part_and_more'),
+        ('workouts', '0004_reservation_queue_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentUtilization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('busy_seconds', models.FloatField(default=0)),
+                ('session_count', models.IntegerField(default=0)),
+                ('queue_seconds', models.FloatField(default=0)),
+                ('notified_count', models.IntegerField(default=0)),
+                ('wait_seconds', models.FloatField(default=0)),
+                ('started_count', models.IntegerField(default=0)),
+                ('start_delay_seconds', models.FloatField(default=0)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='equipment.equipment')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('equipment', 'bucket_start'), name='unique_utilization_bucket')],
+            },
+        ),
+    ]
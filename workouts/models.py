@@ -18,9 +18,37 @@ class UsageSession(models.Model):
     ]
     session_type = models.CharField(max_length=20, choices=SESSION_TYPE_CHOICES)
 
+    class Meta:
+        indexes = [
+            # 최근 N시간 사용자 운동 기록 조회(AI 비율 계산)에 사용
+            models.Index(fields=['user', 'start_time'], name='usagesession_user_start_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username} used {self.equipment.name} at {self.start_time}'
 
+class BodyPartWorkload(models.Model):
+    """
+    사용자별 · 1시간 버킷별 · 운동 부위별 누적 운동 시간 (롤업 테이블)
+
+    UsageSession이 종료될 때 세션 시작 시각이 속한 버킷에 증분으로 더해집니다.
+    AI 추천 시 최근 24시간 상/하체 비율을 원본 세션 대신 이 테이블에서 읽습니다.
+    (초기 구축: backfill_workload_rollups / 검증: check_workload_rollups 명령)
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    bucket_start = models.DateTimeField() # 버킷 시작 시각 (UTC, 정시)
+    body_part = models.CharField(max_length=10, choices=Equipment.BODY_PART_CHOICES)
+    duration_seconds = models.FloatField(default=0)
+    session_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'bucket_start', 'body_part'], name='unique_workload_bucket'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} {self.body_part} @ {self.bucket_start}: {self.duration_seconds:.0f}s'
+
 class Reservation(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE)
@@ -35,5 +63,37 @@ class Reservation(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='WAITING')
     notified_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # 기구별 대기열 순번(COUNT), 맨 앞 대기자, 대기 인원 조회에 사용
+            models.Index(fields=['equipment', 'status', 'created_at'], name='reservation_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} reserved {self.equipment.name}'
+
+class EquipmentUtilization(models.Model):
+    """
+    기구별 · 1시간 버킷별 이용 현황 (운영자 분석용 롤업 테이블)
+
+    Celery 태스크(rollup_equipment_utilization)가 최근 몇 시간의 버킷을 원본 세션/예약에서 다시 계산해 채웁니다.
+    평균값은 합계와 건수를 저장해 두고 조회 시 기간 합계로 나눕니다. (workouts.utilization 참고)
+    (초기 구축: backfill_utilization 명령)
+    """
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE)
+    bucket_start = models.DateTimeField() # 버킷 시작 시각 (UTC, 정시)
+    busy_seconds = models.FloatField(default=0) # 세션이 진행 중이던 시간 (버킷 경계로 나눔)
+    session_count = models.IntegerField(default=0) # 이 버킷에 시작된 세션 수
+    queue_seconds = models.FloatField(default=0) # 대기 인원 x 대기 시간 합계 (/ 3600 = 평균 대기열 길이)
+    notified_count = models.IntegerField(default=0) # 이 버킷에 알림(NOTIFIED)을 받은 예약 수
+    wait_seconds = models.FloatField(default=0) # 위 예약들의 WAITING → NOTIFIED 시간 합계
+    started_count = models.IntegerField(default=0) # 위 예약 중 운동을 시작(COMPLETED)한 수
+    start_delay_seconds = models.FloatField(default=0) # 위 예약들의 NOTIFIED → 세션 시작 시간 합계
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['equipment', 'bucket_start'], name='unique_utilization_bucket'),
+        ]
+
     def __str__(self):
-        return f'{self.user.username} reserved {self.equipment.name}'
\ No newline at end of file
+        return f'{self.equipment_id} @ {self.bucket_start}: {self.busy_seconds:.0f}s busy'
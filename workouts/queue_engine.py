@@ -0,0 +1,227 @@
+# workouts/queue_engine.py
+"""
+기구별 대기열(WAITING 예약) 엔진
+
+Reservation 테이블이 항상 원본(source of truth)이고, 엔진은 순번/길이/맨 앞 대기자 조회를
+빠르게 하기 위한 인덱스 역할을 합니다.
+
+- DatabaseQueueEngine: Reservation 테이블을 직접 조회 (테스트/기본값)
+- RedisQueueEngine: 기구별 Redis sorted set (score = created_at, 같은 시각은 id 순) 으로 O(log n) 조회
+
+settings.QUEUE_ENGINE 에 사용할 클래스 경로를 지정합니다.
+"""
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Reservation
+
+logger = logging.getLogger(__name__)
+
+
+class QueueEngine:
+    """ 대기열 엔진 인터페이스. rank는 0부터 시작하며 대기열에 없으면 None 입니다. """
+
+    def enqueue(self, reservation):
+        """ 새 WAITING 예약을 대기열에 추가합니다. (트랜잭션 커밋 후 반영) """
+        raise NotImplementedError
+
+    def remove(self, reservation):
+        """ WAITING이 아니게 된 예약(NOTIFIED/EXPIRED 등)을 대기열에서 뺍니다. (커밋 후 반영) """
+        raise NotImplementedError
+
+    def rank(self, reservation):
+        raise NotImplementedError
+
+    def length(self, equipment_id):
+        raise NotImplementedError
+
+    def next_waiting(self, equipment_id, lock=False):
+        """
+        대기열 맨 앞의 WAITING 예약(Reservation 인스턴스)을 반환합니다.
+        lock=True면 select_for_update(skip_locked=True)로 행을 잠급니다. (트랜잭션 안에서 호출)
+        """
+        raise NotImplementedError
+
+    def rebuild(self, equipment_id=None):
+        """ Reservation 테이블 기준으로 엔진 상태를 다시 맞춥니다. 반환값: 대기자가 있는 기구 수 """
+        return 0
+
+
+def _waiting(equipment_id):
+    return Reservation.objects.filter(equipment_id=equipment_id, status='WAITING')
+
+
+def _waiting_before(reservation):
+    # (created_at, id) 순서에서 reservation보다 앞에 있는 WAITING 예약
+    return _waiting(reservation.equipment_id).filter(
+        Q(created_at__lt=reservation.created_at) | Q(created_at=reservation.created_at, id__lt=reservation.id)
+    )
+
+
+class DatabaseQueueEngine(QueueEngine):
+    """ Reservation 테이블만 사용하는 엔진. enqueue/remove는 할 일이 없습니다. """
+
+    def enqueue(self, reservation):
+        pass
+
+    def remove(self, reservation):
+        pass
+
+    def rank(self, reservation):
+        if reservation.status != 'WAITING':
+            return None
+        return _waiting_before(reservation).count()
+
+    def length(self, equipment_id):
+        return _waiting(equipment_id).count()
+
+    def next_waiting(self, equipment_id, lock=False):
+        qs = _waiting(equipment_id)
+        if lock:
+            qs = qs.select_for_update(skip_locked=True)
+        return qs.order_by('created_at', 'id').first()
+
+
+class RedisQueueEngine(QueueEngine):
+    """
+    기구별 sorted set(`<prefix>:equipment:<id>:waiting`)에 예약 id를 created_at 점수로 보관합니다.
+    같은 점수끼리는 member 문자열 순으로 정렬되므로 member는 0으로 채운 id(_member)를 씁니다. (DB의 created_at, id 순서와 같음)
+
+    변경은 transaction.on_commit으로 DB 커밋 이후에만 반영되므로 롤백된 예약이 남지 않습니다.
+    커밋과 Redis 반영 사이에 프로세스가 죽는 경우의 어긋남은 rebuild()
+    (reconcile_queues 명령 / reconcile_queue_engine 태스크)로 주기적으로 바로잡습니다.
+    """
+
+    # rebuild 중 대기열이 바뀌어 EXEC가 취소되었을 때 다시 시도하는 횟수
+    rebuild_retries = 5
+
+    def __init__(self, url=None, prefix=None, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or settings.QUEUE_REDIS_URL)
+        self.client = client
+        self.prefix = prefix or getattr(settings, 'QUEUE_REDIS_PREFIX', 'healthqueue')
+
+    def _key(self, equipment_id):
+        return f'{self.prefix}:equipment:{equipment_id}:waiting'
+
+    @staticmethod
+    def _score(reservation):
+        return reservation.created_at.timestamp()
+
+    @staticmethod
+    def _member(reservation_id):
+        return f'{reservation_id:020d}'
+
+    def enqueue(self, reservation):
+        key, member, score = self._key(reservation.equipment_id), self._member(reservation.id), self._score(reservation)
+        transaction.on_commit(lambda: self.client.zadd(key, {member: score}))
+
+    def remove(self, reservation):
+        key, member = self._key(reservation.equipment_id), self._member(reservation.id)
+        transaction.on_commit(lambda: self.client.zrem(key, member))
+
+    def rank(self, reservation):
+        if reservation.status != 'WAITING':
+            return None
+        rank = self.client.zrank(self._key(reservation.equipment_id), self._member(reservation.id))
+        if rank is None:
+            # 아직 커밋 전이거나 어긋난 경우: DB 기준으로 계산
+            return _waiting_before(reservation).count()
+        return rank
+
+    def length(self, equipment_id):
+        return self.client.zcard(self._key(equipment_id))
+
+    def next_waiting(self, equipment_id, lock=False):
+        key = self._key(equipment_id)
+        for member in self.client.zrange(key, 0, 4):
+            qs = Reservation.objects.filter(pk=int(member), status='WAITING')
+            if lock:
+                qs = qs.select_for_update(skip_locked=True)
+            reservation = qs.first()
+            if reservation is not None:
+                return reservation
+            if not Reservation.objects.filter(pk=int(member), status='WAITING').exists():
+                # 더 이상 WAITING이 아닌 항목 정리 (잠겨 있을 뿐인 경우는 남겨 둠)
+                self.client.zrem(key, member)
+
+        # 엔진에서 찾지 못하면 DB로 확인하고, 어긋나 있으면 해당 기구를 재구성
+        reservation = DatabaseQueueEngine().next_waiting(equipment_id, lock=lock)
+        if reservation is not None:
+            logger.warning('Redis 대기열이 DB와 어긋나 재구성합니다. (equipment_id=%s)', equipment_id)
+            transaction.on_commit(lambda: self.rebuild(equipment_id))
+        return reservation
+
+    def rebuild(self, equipment_id=None):
+        if equipment_id is not None:
+            return int(self._rebuild_queue(equipment_id))
+
+        # DB에 대기자가 있는 기구 + Redis에 키가 남아 있는 기구 (대기자가 없어졌으면 키 삭제)
+        equipment_ids = set(
+            Reservation.objects.filter(status='WAITING').order_by().values_list('equipment_id', flat=True).distinct()
+        )
+        head, tail = self._key('*').split('*')
+        for key in self.client.scan_iter(match=self._key('*')):
+            key = key.decode() if isinstance(key, bytes) else key
+            eq_id = key[len(head):-len(tail)]
+            if eq_id.isdigit():
+                equipment_ids.add(int(eq_id))
+        return sum(self._rebuild_queue(eq_id) for eq_id in sorted(equipment_ids))
+
+    def _rebuild_queue(self, equipment_id):
+        """
+        한 기구의 sorted set을 DB 기준으로 다시 만듭니다. 반환값: 대기자가 있는지
+
+        키를 WATCH한 뒤 DB를 읽으므로, 그 사이 커밋된 enqueue/remove가 키를 바꾸면 EXEC가 취소되고 다시 읽습니다.
+        (읽은 뒤 반영된 변경을 덮어쓰지 않음) 새 내용은 임시 키에 채운 뒤 RENAME으로 한 번에 교체합니다.
+        """
+        from redis.exceptions import WatchError
+
+        key = self._key(equipment_id)
+        temp_key = f'{key}:rebuild:{uuid.uuid4().hex}'
+        try:
+            for _ in range(self.rebuild_retries):
+                with self.client.pipeline(transaction=True) as pipe:
+                    try:
+                        pipe.watch(key)
+                        members = {
+                            self._member(res_id): created_at.timestamp()
+                            for res_id, created_at in _waiting(equipment_id).values_list('id', 'created_at')
+                        }
+                        if members:
+                            self.client.zadd(temp_key, members)
+                        pipe.multi()
+                        if members:
+                            pipe.rename(temp_key, key)
+                        else:
+                            pipe.delete(key)
+                        pipe.execute()
+                        return bool(members)
+                    except WatchError:
+                        self.client.delete(temp_key)
+            logger.warning('Redis 대기열 재구성 중 변경이 계속되어 다음 재구성으로 미룹니다. (equipment_id=%s)', equipment_id)
+            return bool(members)
+        finally:
+            self.client.delete(temp_key)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_queue_engine():
+    """ settings.QUEUE_ENGINE 으로 지정된 프로세스 전역 대기열 엔진을 반환합니다. """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                path = getattr(settings, 'QUEUE_ENGINE', 'workouts.queue_engine.DatabaseQueueEngine')
+                _engine = import_string(path)()
+    return _engine
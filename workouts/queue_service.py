@@ -0,0 +1,296 @@
+# workouts/queue_service.py
+"""
+대기열 상태 전이(승격/만료/취소/완료)를 한곳에서 처리하는 서비스
+
+StartSession/EndSession/LeaveQueue 뷰, Celery 태스크, expire_reservations 명령은
+모두 이 모듈을 통해서만 예약 상태를 바꿉니다.
+
+잠금 규칙 (모든 작업 공통):
+1. 관련 Equipment 행을 id 순서로 먼저 잠급니다. (select_for_update)
+2. 그다음 Reservation 행을 잠급니다. 대기자 승격은 skip_locked로 다른 작업이 잡고 있는 행을 건너뜁니다.
+(세션 시작은 1단계 전에 사용자 행을 먼저 잠급니다. 사용자 행은 다른 곳에서 잠그지 않습니다)
+항상 같은 순서로 잠그므로 뷰/태스크가 동시에 같은 기구를 처리해도 교착 상태가 생기지 않고,
+한 기구의 대기열 변경은 Equipment 행 잠금으로 직렬화됩니다.
+모든 메서드는 transaction.atomic() 안에서 실행되며, 호출자의 트랜잭션이 있으면 그 안에 포함됩니다.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from equipment.models import Equipment
+from realtime import events
+from .models import Reservation, UsageSession
+from .queue_engine import get_queue_engine
+
+logger = logging.getLogger(__name__)
+
+
+def get_notify_timeout():
+    """ NOTIFIED 예약이 유효한 시간 (settings.RESERVATION_NOTIFY_TIMEOUT_MINUTES, 기본 15초) """
+    return timedelta(minutes=getattr(settings, 'RESERVATION_NOTIFY_TIMEOUT_MINUTES', 0.25))
+
+
+def schedule_reservation_expiry(reservation):
+    """
+    방금 NOTIFIED가 된 예약의 만료 태스크(expire_reservation)를 정확히 notified_at + 유효 시간에 예약합니다.
+    태스크는 트랜잭션이 커밋된 뒤에 등록되므로 롤백된 알림 전환은 아무것도 예약하지 않습니다.
+
+    브로커에 연결할 수 없으면 주기적 만료 처리(expire_notified_reservations)가 조금 늦게 만료시킵니다.
+    """
+    if not getattr(settings, 'RESERVATION_EXPIRY_SCHEDULING', True):
+        return
+    reservation_id, notified_at = reservation.id, reservation.notified_at
+
+    def publish():
+        from .tasks import expire_reservation
+        try:
+            expire_reservation.apply_async(
+                args=(reservation_id, notified_at.isoformat()),
+                eta=notified_at + get_notify_timeout(),
+            )
+        except Exception:
+            logger.exception('예약 %s 만료 태스크 등록 실패: 주기적 만료 처리에서 만료됩니다.', reservation_id)
+
+    transaction.on_commit(publish)
+
+
+class QueueService:
+    """ 대기열 상태 전이 서비스. get_queue_service()로 프로세스 전역 인스턴스를 사용합니다. """
+
+    def __init__(self, engine=None):
+        self.engine = engine or get_queue_engine()
+
+    # ------------------------------------------------------------------
+    # 잠금
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def lock_equipment(equipment_ids):
+        """ 기구 행들을 id 순서로 잠급니다. (잠금 규칙 1단계) """
+        ids = sorted(set(equipment_ids))
+        if not ids:
+            return []
+        return list(Equipment.objects.select_for_update().filter(id__in=ids).order_by('id').values_list('id', flat=True))
+
+    # ------------------------------------------------------------------
+    # 승격
+    # ------------------------------------------------------------------
+
+    def promote(self, slots, now=None):
+        """
+        기구별로 앞에서부터 slots[equipment_id]명의 WAITING 예약을 NOTIFIED로 바꿉니다.
+        호출자가 해당 Equipment 행을 이미 잠근 상태여야 합니다.
+
+        한 기구에 한 명이면 엔진의 next_waiting(Redis면 O(log n))을 쓰고,
+        여러 기구를 한 번에 처리할 때는 ROW_NUMBER() 윈도 쿼리 한 번으로 대상을 고릅니다.
+        어느 경우든 UPDATE 한 번으로 승격하며 반환값은 승격된 Reservation 목록입니다.
+        """
+        slots = {eq_id: n for eq_id, n in slots.items() if n > 0}
+        if not slots:
+            return []
+        now = now or timezone.now()
+
+        if len(slots) == 1 and sum(slots.values()) == 1:
+            (equipment_id,) = slots
+            head = self.engine.next_waiting(equipment_id, lock=True)
+            promoted = [head] if head is not None else []
+        else:
+            promoted = self._pick_waiters(slots)
+
+        if not promoted:
+            return []
+        Reservation.objects.filter(id__in=[r.id for r in promoted]).update(status='NOTIFIED', notified_at=now)
+
+        expires_at = now + get_notify_timeout()
+        for reservation in promoted:
+            reservation.status = 'NOTIFIED'
+            reservation.notified_at = now
+            self.engine.remove(reservation)
+            schedule_reservation_expiry(reservation)
+            events.reservation_changed(reservation, 'notified', expires_at=expires_at)
+            # TODO: 다음 사용자에게 FCM 푸시 알림을 보내는 로직 추가
+        events.queue_changed(r.equipment_id for r in promoted)
+        return promoted
+
+    def _pick_waiters(self, slots):
+        ranked = (
+            Reservation.objects.filter(status='WAITING', equipment_id__in=list(slots))
+            .annotate(
+                queue_rank=Window(
+                    RowNumber(),
+                    partition_by=[F('equipment_id')],
+                    order_by=[F('created_at').asc(), F('id').asc()],
+                )
+            )
+            .filter(queue_rank__lte=max(slots.values()))
+            .values_list('id', 'equipment_id', 'queue_rank')
+        )
+        ids = [res_id for res_id, eq_id, rank in ranked if rank <= slots[eq_id]]
+        if not ids:
+            return []
+        # 다른 작업이 잡고 있는 행은 건너뛰고, 그사이 WAITING이 아니게 된 행은 제외
+        return list(
+            Reservation.objects.select_for_update(skip_locked=True)
+            .filter(id__in=ids, status='WAITING')
+            .order_by('equipment_id', 'created_at', 'id')
+        )
+
+    def advance(self, equipment_id, now=None):
+        """
+        기구가 비었을 때(세션 종료/기구 전환) 다음 대기자 한 명을 알림 상태로 바꿉니다.
+        반환값: 승격된 Reservation 또는 None
+        """
+        with transaction.atomic():
+            self.lock_equipment([equipment_id])
+            promoted = self.promote({equipment_id: 1}, now=now)
+        return promoted[0] if promoted else None
+
+    # ------------------------------------------------------------------
+    # 만료 / 취소 / 완료
+    # ------------------------------------------------------------------
+
+    def expire(self, reservation_id, notified_at):
+        """
+        알림 유효 시간이 지난 예약 하나를 만료시키고 다음 대기자를 승격합니다. (예약별 ETA 태스크)
+
+        같은 알림(notified_at 일치)에 대해 아직 NOTIFIED일 때만 동작하므로 여러 번 실행해도 안전합니다.
+        사용자가 이미 해당 기구에서 운동을 시작했다면 만료 대신 완료 처리하고 아무도 승격하지 않습니다.
+        반환값: 'expired' / 'completed' / 'skipped'
+        """
+        equipment_id = Reservation.objects.filter(pk=reservation_id).values_list('equipment_id', flat=True).first()
+        if equipment_id is None:
+            return 'skipped'
+
+        with transaction.atomic():
+            self.lock_equipment([equipment_id])
+            reservation = (
+                Reservation.objects.select_for_update()
+                .filter(pk=reservation_id, status='NOTIFIED', notified_at=notified_at)
+                .first()
+            )
+            if reservation is None:
+                return 'skipped'
+
+            started = UsageSession.objects.filter(
+                user_id=reservation.user_id,
+                equipment_id=reservation.equipment_id,
+                end_time__isnull=True,
+                start_time__gte=reservation.notified_at,
+            ).exists()
+            if started:
+                self.complete(reservation)
+                return 'completed'
+
+            self._set_status(reservation, 'EXPIRED')
+            events.reservation_changed(reservation, 'expired')
+            self.promote({equipment_id: 1})
+        return 'expired'
+
+    def expire_stale(self, cutoff, batch_size=500):
+        """
+        cutoff 이전에 알림을 받고도 시작하지 않은 NOTIFIED 예약을 batch_size씩 만료시키고,
+        만료된 수만큼 기구별 다음 대기자를 승격합니다. (주기적 안전망 스윕)
+
+        배치마다 후보 id 조회 → 기구 잠금 → 예약 잠금 → 만료 UPDATE → 승격(윈도 쿼리 + 잠금 + UPDATE)으로
+        처리하는 행 수와 관계없이 왕복 횟수가 일정합니다.
+        반환값: {'expired', 'notified', 'batches': [{'expired', 'notified', 'ms'}, ...]}
+        """
+        expired_total = 0
+        notified_total = 0
+        batches = []
+
+        while True:
+            started = time.perf_counter()
+            with transaction.atomic():
+                candidates = (
+                    Reservation.objects.filter(status='NOTIFIED', notified_at__lt=cutoff)
+                    .order_by('notified_at')
+                    .values_list('id', 'equipment_id')[:batch_size]
+                )
+                candidates = list(candidates)
+                if not candidates:
+                    break
+
+                self.lock_equipment(eq_id for _, eq_id in candidates)
+                rows = list(
+                    Reservation.objects.select_for_update(skip_locked=True)
+                    .filter(id__in=[res_id for res_id, _ in candidates], status='NOTIFIED', notified_at__lt=cutoff)
+                    .only('id', 'user_id', 'equipment_id', 'notified_at')
+                )
+                Reservation.objects.filter(id__in=[r.id for r in rows]).update(status='EXPIRED')
+                for reservation in rows:
+                    reservation.status = 'EXPIRED'
+                    events.reservation_changed(reservation, 'expired')
+                promoted = self.promote(Counter(r.equipment_id for r in rows))
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            expired_total += len(rows)
+            notified_total += len(promoted)
+            batches.append({'expired': len(rows), 'notified': len(promoted), 'ms': round(elapsed_ms, 2)})
+            logger.info('expire batch: expired=%d notified=%d %.1fms', len(rows), len(promoted), elapsed_ms)
+
+            # 모두 다른 작업에 잠겨 있던 경우 같은 후보를 반복하지 않도록 종료
+            if len(candidates) < batch_size or not rows:
+                break
+
+        return {'expired': expired_total, 'notified': notified_total, 'batches': batches}
+
+    def cancel(self, reservation):
+        """
+        사용자가 대기열에서 나가거나 알림 후 포기한 예약을 만료 처리합니다.
+        취소한 예약이 NOTIFIED였다면 기구가 비어 있으므로 다음 대기자를 승격합니다.
+        반환값: 승격된 Reservation 또는 None
+        """
+        with transaction.atomic():
+            self.lock_equipment([reservation.equipment_id])
+            locked = (
+                Reservation.objects.select_for_update()
+                .filter(pk=reservation.pk, status__in=['WAITING', 'NOTIFIED'])
+                .first()
+            )
+            if locked is None:
+                return None
+            was_notified = locked.status == 'NOTIFIED'
+            self._set_status(locked, 'EXPIRED')
+            self.engine.remove(locked)
+            reservation.status = locked.status
+            events.reservation_changed(locked, 'cancelled')
+
+            if not was_notified:
+                events.queue_changed([locked.equipment_id])
+                return None
+            promoted = self.promote({locked.equipment_id: 1})
+        return promoted[0] if promoted else None
+
+    def complete(self, reservation):
+        """ 알림 받은 사용자가 운동을 시작했을 때 예약을 완료 처리합니다. (호출자가 기구 행을 잠근 상태) """
+        self._set_status(reservation, 'COMPLETED')
+        self.engine.remove(reservation)
+        events.reservation_changed(reservation, 'completed')
+
+    @staticmethod
+    def _set_status(reservation, status):
+        reservation.status = status
+        reservation.save(update_fields=['status'])
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_queue_service():
+    """ 프로세스 전역 QueueService를 반환합니다. (settings.QUEUE_ENGINE 엔진 사용) """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = QueueService()
+    return _service
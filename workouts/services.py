@@ -0,0 +1,146 @@
+# workouts/services.py
+
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import BodyPartWorkload, UsageSession
+
+# 롤업 버킷 크기 (TruncHour와 일치해야 함)
+WORKLOAD_BUCKET = datetime.timedelta(hours=1)
+
+SESSION_DURATION = ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField())
+
+
+def _minutes(duration):
+    return duration.total_seconds() / 60 if duration else 0.0
+
+
+def _ratios(total_minutes, upper_minutes, lower_minutes):
+    # 비율(ratio) 계산 (0으로 나누기 방지)
+    return {
+        'upper_ratio': (upper_minutes / total_minutes) if total_minutes > 0 else 0,
+        'lower_ratio': (lower_minutes / total_minutes) if total_minutes > 0 else 0,
+        'total_minutes': total_minutes,
+        'upper_minutes': upper_minutes,
+        'lower_minutes': lower_minutes,
+    }
+
+
+def bucket_for(dt):
+    """ 시각이 속한 롤업 버킷의 시작 시각(UTC 정시)을 반환합니다. """
+    return dt.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def parse_date_bound(value, end=False):
+    """ 'YYYY-MM-DD' 또는 ISO datetime → aware datetime. 날짜만 주면 end는 그다음 날 0시(해당 날짜 포함). """
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is not None:
+        parsed = datetime.datetime.combine(day + datetime.timedelta(days=1) if end else day, datetime.time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def get_recent_body_part_ratios(user, hours=24, now=None):
+    """
+    최근 `hours` 시간 동안의 상/하체 운동 비율을 BodyPartWorkload 롤업에서 읽습니다.
+
+    사용자당 최대 (hours + 1) x 부위 수 만큼의 작은 행만 읽으므로 운동 기록 길이와 무관합니다.
+    버킷 단위(1시간)로 집계되므로 창의 시작 경계는 정시로 내림 처리됩니다.
+
+    반환값: {'upper_ratio', 'lower_ratio', 'total_minutes', 'upper_minutes', 'lower_minutes'}
+    """
+    now = now or timezone.now()
+    since = bucket_for(now - datetime.timedelta(hours=hours))
+
+    totals = BodyPartWorkload.objects.filter(user=user, bucket_start__gte=since).aggregate(
+        total=Sum('duration_seconds'),
+        upper=Sum('duration_seconds', filter=Q(body_part='UPPER')),
+        lower=Sum('duration_seconds', filter=Q(body_part='LOWER')),
+    )
+    return _ratios(
+        (totals['total'] or 0) / 60,
+        (totals['upper'] or 0) / 60,
+        (totals['lower'] or 0) / 60,
+    )
+
+
+def get_recent_body_part_ratios_from_sessions(user, hours=24, now=None):
+    """
+    최근 `hours` 시간 동안 완료된 세션의 상/하체 운동 비율을 원본 UsageSession에서 계산합니다.
+
+    세션마다 equipment를 따로 조회하던 방식 대신, body_part 조건부 Sum으로
+    전체/상체/하체 운동 시간을 한 번의 집계 쿼리로 구합니다.
+    (UsageSession(user, start_time) 인덱스 사용)
+    """
+    now = now or timezone.now()
+
+    totals = UsageSession.objects.filter(
+        user=user,
+        start_time__gte=now - datetime.timedelta(hours=hours),
+        end_time__isnull=False, # 완료된 세션만
+    ).aggregate(
+        total=Sum(SESSION_DURATION),
+        upper=Sum(SESSION_DURATION, filter=Q(equipment__body_part='UPPER')),
+        lower=Sum(SESSION_DURATION, filter=Q(equipment__body_part='LOWER')),
+    )
+    return _ratios(_minutes(totals['total']), _minutes(totals['upper']), _minutes(totals['lower']))
+
+
+def record_session_workload(session, body_part=None):
+    """
+    종료된 세션의 운동 시간을 BodyPartWorkload 롤업에 증분으로 더합니다.
+    세션 종료와 같은 트랜잭션 안에서 호출하세요.
+    - body_part: 이미 알고 있다면 전달 (equipment 재조회 생략)
+    """
+    if session.end_time is None:
+        return
+    body_part = body_part or session.equipment.body_part
+    seconds = max((session.end_time - session.start_time).total_seconds(), 0)
+    lookup = {
+        'user_id': session.user_id,
+        'bucket_start': bucket_for(session.start_time),
+        'body_part': body_part,
+    }
+    increment = {
+        'duration_seconds': F('duration_seconds') + seconds,
+        'session_count': F('session_count') + 1,
+    }
+
+    if BodyPartWorkload.objects.filter(**lookup).update(**increment):
+        return
+    try:
+        # 같은 버킷을 동시에 처음 만드는 경우를 대비해 savepoint 안에서 생성
+        with transaction.atomic():
+            BodyPartWorkload.objects.create(duration_seconds=seconds, session_count=1, **lookup)
+    except IntegrityError:
+        BodyPartWorkload.objects.filter(**lookup).update(**increment)
+
+
+def aggregate_session_workload(sessions):
+    """
+    UsageSession 쿼리셋을 (user, 버킷, body_part) 단위로 집계합니다. (백필/검증용)
+    반환값: dict 이터레이터 {'user_id', 'bucket_start', 'body_part', 'duration', 'session_count'}
+    """
+    return (
+        sessions.filter(end_time__isnull=False)
+        .annotate(
+            bucket_start=TruncHour('start_time', tzinfo=datetime.timezone.utc),
+            body_part=F('equipment__body_part'),
+        )
+        .values('user_id', 'bucket_start', 'body_part')
+        .annotate(duration=Sum(SESSION_DURATION), session_count=Count('id'))
+        .order_by()
+        .iterator(chunk_size=2000)
+    )
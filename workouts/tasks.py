@@ -1,49 +1,51 @@
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
-from django.db import transaction
 from datetime import timedelta
-from .models import Reservation
+from .queue_engine import get_queue_engine
+from .queue_service import get_notify_timeout, get_queue_service
+from .utilization import rollup_utilization
+
+
+@shared_task
+def expire_reservation(reservation_id, notified_at):
+    """
+    Expire one NOTIFIED reservation at its deadline and notify the next waiting user.
+    Scheduled per reservation by queue_service.schedule_reservation_expiry (Celery ETA).
+    Idempotent; see QueueService.expire.
+    """
+    return get_queue_service().expire(reservation_id, notified_at)
 
 
 @shared_task(bind=True)
-def expire_notified_reservations(self, timeout_minutes: float = 0.25, batch_size: int = 50):
+def expire_notified_reservations(self, timeout_minutes: float = None, batch_size: int = 500):
     """
     Expire NOTIFIED reservations older than timeout_minutes and notify next waiting users.
-    This task is intended to be run periodically (or scheduled per-reservation).
-    """
-    cutoff = timezone.now() - timedelta(minutes=timeout_minutes)
-    expired_total = 0
-    notified_total = 0
-
-    # Batch processing with select_for_update(skip_locked=True) for safety
-    while True:
-        with transaction.atomic():
-            qs = (
-                Reservation.objects.select_for_update(skip_locked=True)
-                .filter(status='NOTIFIED', notified_at__lt=cutoff)
-                .order_by('notified_at')[:batch_size]
-            )
-
-            reservations = list(qs)
-            if not reservations:
-                break
-
-            for r in reservations:
-                r.status = 'EXPIRED'
-                r.save()
-                expired_total += 1
-
-                # notify next waiting
-                next_r = (
-                    Reservation.objects.filter(equipment=r.equipment, status='WAITING')
-                    .order_by('created_at')
-                    .first()
-                )
-                if next_r:
-                    next_r.status = 'NOTIFIED'
-                    next_r.notified_at = timezone.now()
-                    next_r.save()
-                    notified_total += 1
-                    # TODO: enqueue/send FCM push notification for next_r.user
-
-    return {'expired': expired_total, 'notified': notified_total}
+    Each reservation is normally expired on time by expire_reservation; this periodic
+    sweep is the safety net for expiries that could not be scheduled or were lost.
+    Rows are processed in set-based batches; see QueueService.expire_stale.
+    """
+    timeout = get_notify_timeout() if timeout_minutes is None else timedelta(minutes=timeout_minutes)
+    return get_queue_service().expire_stale(timezone.now() - timeout, batch_size=batch_size)
+
+
+@shared_task
+def reconcile_queue_engine():
+    """
+    Rebuild the queue engine (e.g. Redis sorted sets) from the Reservation table.
+    Repairs drift left by a crash between a DB commit and the engine update.
+    """
+    return {'queues': get_queue_engine().rebuild()}
+
+
+@shared_task
+def rollup_equipment_utilization(lookback_hours: float = None):
+    """
+    Recompute EquipmentUtilization buckets for the last lookback_hours, up to the current hour.
+    Recent buckets are recomputed on every run so sessions and reservations that finish after
+    their bucket closed (e.g. a late session start after a notification) are still counted.
+    Idempotent; older history is built with the backfill_utilization command.
+    """
+    if lookback_hours is None:
+        lookback_hours = getattr(settings, 'UTILIZATION_ROLLUP_LOOKBACK_HOURS', 3)
+    return {'rows': rollup_utilization(timezone.now() - timedelta(hours=lookback_hours))}
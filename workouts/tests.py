@@ -1,3 +1,822 @@
-from django.test import TestCase
+import csv
+import datetime
+import fnmatch
+import io
+import json
+import threading
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from equipment.models import Equipment
+from gyms.models import Gym
+from users.models import UserProfile
+from .models import BodyPartWorkload, EquipmentUtilization, Reservation, UsageSession
+from .eta import blend_stats, predict_wait_seconds
+from .queue_engine import DatabaseQueueEngine, RedisQueueEngine, get_queue_engine
+from .queue_service import QueueService
+from .tasks import expire_notified_reservations, expire_reservation, rollup_equipment_utilization
+from .services import (
+    get_recent_body_part_ratios,
+    get_recent_body_part_ratios_from_sessions,
+    record_session_workload,
+)
+from .utilization import rollup_utilization
+
+
+def make_equipment(gym, name, **kwargs):
+    kwargs.setdefault('type', 'STRENGTH')
+    return Equipment.objects.create(
+        gym=gym, name=name, nfc_tag_id=f'nfc-{name}', arduino_id=f'ard-{name}', **kwargs
+    )
+
+
+def make_session(user, equipment, start, minutes, **kwargs):
+    session = UsageSession.objects.create(
+        user=user, equipment=equipment, allocated_duration_minutes=15, session_type='BASE', **kwargs
+    )
+    # start_time은 auto_now_add 이므로 생성 후 덮어씁니다.
+    end = start + datetime.timedelta(minutes=minutes) if minutes is not None else None
+    UsageSession.objects.filter(pk=session.pk).update(start_time=start, end_time=end)
+    session.refresh_from_db()
+    return session
+
+
+class RecentBodyPartRatioTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='member', password='pw')
+        owner = User.objects.create_user(username='owner', password='pw')
+        cls.gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        cls.upper = make_equipment(cls.gym, 'bench', body_part='UPPER')
+        cls.lower = make_equipment(cls.gym, 'squat', body_part='LOWER')
+        cls.cardio = make_equipment(cls.gym, 'treadmill', body_part='CARDIO')
+
+    def test_ratios_are_computed_in_a_single_query(self):
+        now = timezone.now()
+        make_session(self.user, self.upper, now - datetime.timedelta(hours=3), 30)
+        make_session(self.user, self.lower, now - datetime.timedelta(hours=2), 10)
+        make_session(self.user, self.cardio, now - datetime.timedelta(hours=1), 10)
+        # 24시간 이전 / 진행 중 세션은 제외
+        make_session(self.user, self.upper, now - datetime.timedelta(hours=30), 60)
+        make_session(self.user, self.lower, now - datetime.timedelta(minutes=5), None)
+
+        with self.assertNumQueries(1):
+            result = get_recent_body_part_ratios_from_sessions(self.user, now=now)
+
+        self.assertAlmostEqual(result['total_minutes'], 50)
+        self.assertAlmostEqual(result['upper_ratio'], 0.6)
+        self.assertAlmostEqual(result['lower_ratio'], 0.2)
+
+    def test_no_history_returns_zero_ratios(self):
+        for fn in (get_recent_body_part_ratios, get_recent_body_part_ratios_from_sessions):
+            result = fn(self.user)
+            self.assertEqual(result['upper_ratio'], 0)
+            self.assertEqual(result['lower_ratio'], 0)
+
+    def test_rollup_matches_raw_sessions(self):
+        now = timezone.now()
+        for hours_ago, equipment, minutes in [(3, self.upper, 30), (3, self.upper, 15), (2, self.lower, 10), (1, self.cardio, 5)]:
+            session = make_session(self.user, equipment, now - datetime.timedelta(hours=hours_ago), minutes)
+            record_session_workload(session)
+
+        # 같은 버킷의 두 세션은 한 행으로 합쳐짐
+        upper_rows = BodyPartWorkload.objects.filter(user=self.user, body_part='UPPER')
+        self.assertEqual(upper_rows.count(), 1)
+        self.assertEqual(upper_rows.get().session_count, 2)
+
+        with self.assertNumQueries(1):
+            rollup = get_recent_body_part_ratios(self.user, now=now)
+        raw = get_recent_body_part_ratios_from_sessions(self.user, now=now)
+        self.assertAlmostEqual(rollup['upper_ratio'], raw['upper_ratio'])
+        self.assertAlmostEqual(rollup['lower_ratio'], raw['lower_ratio'])
+
+    def test_backfill_and_consistency_check(self):
+        now = timezone.now()
+        make_session(self.user, self.upper, now - datetime.timedelta(hours=5), 20)
+        make_session(self.user, self.lower, now - datetime.timedelta(days=3), 40)
+
+        # 롤업이 비어 있으면 검사기가 불일치를 보고
+        with self.assertRaises(CommandError):
+            call_command('check_workload_rollups', stdout=io.StringIO())
+
+        call_command('backfill_workload_rollups', stdout=io.StringIO())
+        self.assertEqual(BodyPartWorkload.objects.count(), 2)
+        call_command('check_workload_rollups', stdout=io.StringIO())
+
+
+class EndSessionViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='member', password='pw')
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipment = make_equipment(gym, 'bench', body_part='UPPER', status='IN_USE')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_ending_a_session_updates_the_workload_rollup(self):
+        make_session(self.user, self.equipment, timezone.now() - datetime.timedelta(minutes=12), None)
+
+        response = self.client.post('/api/workouts/end/')
+
+        self.assertEqual(response.status_code, 200)
+        rollup = BodyPartWorkload.objects.get(user=self.user)
+        self.assertEqual(rollup.body_part, 'UPPER')
+        self.assertEqual(rollup.session_count, 1)
+        self.assertAlmostEqual(rollup.duration_seconds, 12 * 60, delta=5)
+
+
+@override_settings(RESERVATION_EXPIRY_SCHEDULING=False)
+class StartSessionViewTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipment = make_equipment(gym, 'bench', base_session_time_minutes=20)
+        self.users = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(3)]
+
+    def start(self, user, equipment=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/workouts/start/', {'equipment_id': (equipment or self.equipment).id}, format='json')
+
+    def test_second_start_on_the_same_machine_conflicts(self):
+        self.assertEqual(self.start(self.users[0]).status_code, 201)
+        self.assertEqual(self.start(self.users[1]).status_code, 409)
+        self.assertEqual(UsageSession.objects.filter(equipment=self.equipment, end_time__isnull=True).count(), 1)
+
+    def test_notified_user_starts_with_base_time_and_completes_reservation(self):
+        reservation = Reservation.objects.create(
+            user=self.users[0], equipment=self.equipment, status='NOTIFIED', notified_at=timezone.now()
+        )
+        Reservation.objects.create(user=self.users[1], equipment=self.equipment, status='WAITING')
+
+        self.assertEqual(self.start(self.users[1]).status_code, 409)
+        response = self.start(self.users[0])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['session_type'], response.data['allocated_duration_minutes']), ('BASE', 20))
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'COMPLETED')
+
+    def test_switching_machines_ends_previous_session_and_promotes_next(self):
+        other = make_equipment(self.equipment.gym, 'rack')
+        self.assertEqual(self.start(self.users[0], other).status_code, 201)
+        waiting = Reservation.objects.create(user=self.users[1], equipment=other, status='WAITING')
+
+        self.assertEqual(self.start(self.users[0]).status_code, 201)
+
+        other.refresh_from_db()
+        waiting.refresh_from_db()
+        self.assertEqual(other.status, 'AVAILABLE')
+        self.assertEqual(waiting.status, 'NOTIFIED')
+        self.assertEqual(UsageSession.objects.filter(user=self.users[0], end_time__isnull=True).get().equipment, self.equipment)
+
+    def test_inference_runs_before_the_lock(self):
+        UserProfile.objects.create(user=self.users[0])
+        order = []
+        real_select_for_update = Equipment.objects.select_for_update
+
+        def recommend(*args):
+            order.append('inference')
+            return 17
+
+        def select_for_update(*args, **kwargs):
+            order.append('lock')
+            return real_select_for_update(*args, **kwargs)
+
+        with mock.patch('workouts.views.get_ai_recommendation', side_effect=recommend), \
+                mock.patch.object(Equipment.objects, 'select_for_update', side_effect=select_for_update):
+            response = self.start(self.users[0])
+
+        self.assertEqual(response.data['allocated_duration_minutes'], 17)
+        self.assertEqual(order, ['inference', 'lock'])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', '행 잠금(select_for_update)을 지원하는 PostgreSQL 필요')
+class StartSessionConcurrencyTests(TransactionTestCase):
+    def test_simultaneous_starts_have_exactly_one_winner(self):
+        out = io.StringIO()
+        # PostgreSQL 기본 max_connections(100) 안에서 실행되도록 80명
+        call_command('stress_start_session', '--users', '80', '--rounds', '3', '--max-p99-ms', '2000', stdout=out)
+        self.assertIn('OK: exactly one winner per round', out.getvalue())
+
+    def test_same_user_starting_two_machines_keeps_one_open_session(self):
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        machines = [make_equipment(gym, f'machine{i}') for i in range(2)]
+        member = User.objects.create_user(username='member', password='pw')
+        barrier = threading.Barrier(len(machines))
+
+        def start(equipment):
+            client = APIClient()
+            client.force_authenticate(member)
+            barrier.wait()
+            try:
+                client.post('/api/workouts/start-session/', {'equipment_id': equipment.id}, format='json')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=start, args=(machine,)) for machine in machines]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(UsageSession.objects.filter(user=member, end_time__isnull=True).count(), 1)
+
+
+class QueueViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipment = make_equipment(gym, 'rack', body_part='LOWER', status='IN_USE')
+        self.users = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(3)]
+
+    def _post(self, user, url, data):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(url, data, format='json')
+
+    def test_join_queue_reports_position_and_waiting_count(self):
+        for i, user in enumerate(self.users):
+            response = self._post(user, '/api/workouts/join-queue/', {'equipment_id': self.equipment.id})
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.data['position'], i + 1)
+            self.assertEqual(response.data['waiting_count'], i + 1)
+
+        # 다시 등록하면 기존 순번을 돌려줌
+        response = self._post(self.users[1], '/api/workouts/join-queue/', {'equipment_id': self.equipment.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['position'], 2)
+        self.assertEqual(response.data['waiting_count'], 3)
+
+    def test_queue_position_endpoint_uses_constant_queries(self):
+        for user in self.users:
+            Reservation.objects.create(user=user, equipment=self.equipment, status='WAITING')
+        client = APIClient()
+        client.force_authenticate(self.users[2])
+
+        # 기구 통계(ETA)를 캐시에 올려 둠
+        client.get('/api/workouts/queue-position/', {'equipment_id': self.equipment.id})
+
+        # 예약 조회 + 앞선 대기자 COUNT + 대기 인원 COUNT + 진행 중 세션 + (세션이 없으므로) 알림 받은 예약 (ETA)
+        with self.assertNumQueries(5):
+            response = client.get('/api/workouts/queue-position/', {'equipment_id': self.equipment.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['position'], 3)
+        self.assertEqual(response.data['waiting_count'], 3)
+
+        client.force_authenticate(User.objects.create_user(username='outsider', password='pw'))
+        response = client.get('/api/workouts/queue-position/', {'equipment_id': self.equipment.id})
+        self.assertEqual(response.status_code, 404)
+
+    def test_leaving_the_queue_notifies_the_next_waiter(self):
+        reservations = [
+            Reservation.objects.create(user=user, equipment=self.equipment, status='WAITING') for user in self.users
+        ]
+        reservations[0].status = 'NOTIFIED'
+        reservations[0].save()
+
+        response = self._post(self.users[0], '/api/workouts/leave-queue/', {'reservation_id': reservations[0].id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['waiting_count'], 1)
+        reservations[1].refresh_from_db()
+        self.assertEqual(reservations[1].status, 'NOTIFIED')
+        self.assertEqual(get_queue_engine().rank(Reservation.objects.get(pk=reservations[2].pk)), 0)
+
+    def test_leaving_while_waiting_does_not_promote_anyone(self):
+        notified = Reservation.objects.create(user=self.users[0], equipment=self.equipment, status='NOTIFIED', notified_at=timezone.now())
+        leaving = Reservation.objects.create(user=self.users[1], equipment=self.equipment, status='WAITING')
+        waiter = Reservation.objects.create(user=self.users[2], equipment=self.equipment, status='WAITING')
+
+        self.assertIsNone(QueueService().cancel(leaving))
+
+        self.assertEqual(leaving.status, 'EXPIRED')
+        statuses = dict(Reservation.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[notified.id], 'NOTIFIED')
+        self.assertEqual(statuses[waiter.id], 'WAITING')
+
+
+
+class HistoryListViewTests(TestCase):
+    def setUp(self):
+        self.operator = User.objects.create_user(username='operator', password='pw', is_staff=True)
+        self.member = User.objects.create_user(username='member', password='pw')
+        self.stranger = User.objects.create_user(username='stranger', password='pw')
+        gym = Gym.objects.create(owner=self.operator, name='gym', address='addr')
+        other_gym = Gym.objects.create(owner=self.stranger, name='other', address='addr')
+        self.equipment = make_equipment(gym, 'bench')
+        other_equipment = make_equipment(other_gym, 'rack')
+        now = timezone.now()
+        for i in range(5):
+            make_session(self.member, self.equipment, now - datetime.timedelta(hours=i + 1), 10)
+        make_session(self.stranger, other_equipment, now - datetime.timedelta(hours=1), 10)
+
+    def list_sessions(self, user, path='/api/sessions/'):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(path)
+
+    def test_member_sees_only_own_sessions_newest_first(self):
+        response = self.list_sessions(self.member)
+
+        results = response.data['results']
+        self.assertEqual(len(results), 5)
+        self.assertEqual({row['user'] for row in results}, {'member'})
+        self.assertEqual([row['start_time'] for row in results], sorted((row['start_time'] for row in results), reverse=True))
+
+    def test_operator_sees_sessions_of_managed_gyms(self):
+        response = self.list_sessions(self.operator)
+        self.assertEqual({row['equipment'] for row in response.data['results']}, {'bench'})
+
+    def test_other_users_session_is_not_found(self):
+        session = UsageSession.objects.filter(user=self.stranger).get()
+        self.assertEqual(self.list_sessions(self.member, f'/api/sessions/{session.id}/').status_code, 404)
+
+    def test_cursor_pages_do_not_overlap(self):
+        first = self.list_sessions(self.member, '/api/sessions/?page_size=3').data
+        second = self.list_sessions(self.member, first['next']).data
+
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+        self.assertIsNone(second['next'])
+
+
+class HistoryExportViewTests(TestCase):
+    def setUp(self):
+        self.operator = User.objects.create_user(username='operator', password='pw')
+        UserProfile.objects.create(user=self.operator, role='OPERATOR')
+        self.member = User.objects.create_user(username='member', password='pw')
+        UserProfile.objects.create(user=self.member)
+        self.gym = Gym.objects.create(owner=self.operator, name='gym', address='addr')
+        self.other_gym = Gym.objects.create(owner=self.member, name='other', address='addr')
+        equipment = make_equipment(self.gym, 'bench')
+        start = timezone.make_aware(datetime.datetime(2025, 3, 1, 9))
+        for day in range(3):
+            make_session(self.member, equipment, start + datetime.timedelta(days=day), 10)
+        make_session(self.member, make_equipment(self.other_gym, 'rack'), start, 10)
+        Reservation.objects.create(user=self.member, equipment=equipment)
+
+    def export(self, path, user=None, **headers):
+        client = APIClient()
+        client.force_authenticate(user or self.operator)
+        return client.get(path, **headers)
+
+    def test_csv_streams_sessions_of_managed_gyms_in_date_range(self):
+        response = self.export(f'/api/workouts/export/sessions/?gym_id={self.gym.id}&from=2025-03-02&to=2025-03-03')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['start_time'][:10] for row in rows], ['2025-03-02', '2025-03-03'])
+        self.assertEqual({row['equipment'] for row in rows}, {'bench'})
+
+    def test_ndjson_reservations(self):
+        response = self.export('/api/workouts/export/reservations/?format=ndjson')
+
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(row['user'], row['status']) for row in lines], [('member', 'WAITING')])
+
+    def test_rejects_members_and_unmanaged_gyms(self):
+        self.assertEqual(self.export('/api/workouts/export/sessions/', user=self.member).status_code, 403)
+        self.assertEqual(self.export(f'/api/workouts/export/sessions/?gym_id={self.other_gym.id}').status_code, 403)
+        self.assertEqual(self.export('/api/workouts/export/sessions/?from=yesterday').status_code, 400)
+        self.assertEqual(self.export('/api/workouts/export/payments/').status_code, 404)
+
+    def test_validation_errors_are_json(self):
+        for path in (
+            '/api/workouts/export/sessions/?from=yesterday',
+            '/api/workouts/export/sessions/?format=xml',
+            '/api/workouts/export/reservations/?format=ndjson&gym_id=abc',
+        ):
+            with self.subTest(path):
+                response = self.export(path)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response['Content-Type'].startswith('application/json'))
+                self.assertIn('detail', response.json())
+
+    def test_accept_header_selects_format(self):
+        response = self.export('/api/workouts/export/reservations/', HTTP_ACCEPT='application/x-ndjson')
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        self.assertEqual(self.export('/api/workouts/export/reservations/', HTTP_ACCEPT='image/png').status_code, 400)
+
+
+class EquipmentUtilizationTests(TestCase):
+    def setUp(self):
+        self.operator = User.objects.create_user(username='operator', password='pw')
+        UserProfile.objects.create(user=self.operator, role='OPERATOR')
+        self.member = User.objects.create_user(username='member', password='pw')
+        gym = Gym.objects.create(owner=self.operator, name='gym', address='addr')
+        self.equipment = make_equipment(gym, 'bench')
+        self.nine = timezone.make_aware(datetime.datetime(2025, 3, 1, 9))
+
+    def at(self, minutes):
+        return self.nine + datetime.timedelta(minutes=minutes)
+
+    def rollup(self):
+        return rollup_utilization(self.nine, self.at(120), now=self.at(120))
+
+    def buckets(self):
+        return {row.bucket_start: row for row in EquipmentUtilization.objects.filter(equipment=self.equipment)}
+
+    def test_session_time_is_split_across_hour_buckets(self):
+        make_session(self.member, self.equipment, self.at(50), 20)
+
+        self.rollup()
+
+        buckets = self.buckets()
+        self.assertEqual(buckets[self.at(0)].busy_seconds, 600)
+        self.assertEqual(buckets[self.at(0)].session_count, 1)
+        self.assertEqual(buckets[self.at(60)].busy_seconds, 600)
+        self.assertEqual(buckets[self.at(60)].session_count, 0)
+
+    def test_queue_wait_and_start_delay(self):
+        reservation = Reservation.objects.create(user=self.member, equipment=self.equipment, status='COMPLETED')
+        Reservation.objects.filter(pk=reservation.pk).update(created_at=self.at(0), notified_at=self.at(30))
+        make_session(self.member, self.equipment, self.at(31), 10)
+
+        self.rollup()
+
+        row = self.buckets()[self.at(0)]
+        self.assertEqual(row.queue_seconds, 1800)
+        self.assertEqual((row.notified_count, row.wait_seconds), (1, 1800))
+        self.assertEqual((row.started_count, row.start_delay_seconds), (1, 60))
+
+    def test_rollup_is_idempotent(self):
+        make_session(self.member, self.equipment, self.at(10), 10)
+
+        self.assertEqual(self.rollup(), 1)
+        self.assertEqual(self.rollup(), 1)
+        self.assertEqual(EquipmentUtilization.objects.count(), 1)
+
+    def test_task_rolls_up_recent_buckets(self):
+        # 세션이 정시를 걸치면 버킷이 2개가 되므로 현재 시각을 시간 중간으로 고정합니다.
+        now = self.at(0) + datetime.timedelta(minutes=45)
+        make_session(self.member, self.equipment, now - datetime.timedelta(minutes=30), 10)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            self.assertEqual(rollup_equipment_utilization(lookback_hours=2), {'rows': 1})
+
+    def test_operator_endpoint_reads_rollups(self):
+        make_session(self.member, self.equipment, self.at(0), 30)
+        self.rollup()
+        client = APIClient()
+        client.force_authenticate(self.operator)
+
+        response = client.get('/api/equipment/utilization/?from=2025-03-01&to=2025-03-01&interval=hour')
+
+        self.assertEqual(response.status_code, 200)
+        (item,) = response.data['equipments']
+        self.assertEqual((item['busy_minutes'], item['session_count']), (30.0, 1))
+        self.assertEqual(item['utilization'], round(1800 / (24 * 3600), 4))
+        self.assertEqual([point['busy_minutes'] for point in item['series']], [30.0])
+
+        client.force_authenticate(self.member)
+        self.assertEqual(client.get('/api/equipment/utilization/').status_code, 403)
+
+
+class WaitEstimateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipment = make_equipment(gym, 'rack', status='IN_USE', base_session_time_minutes=15)
+        self.users = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(3)]
+
+    def test_prediction_adds_session_and_handover_per_user_ahead(self):
+        stats = {'session_seconds': 600, 'handover_seconds': 60}
+        self.assertEqual(predict_wait_seconds(3, 300, stats), 300 + 2 * 660)
+        self.assertEqual(predict_wait_seconds(0, 300, stats), 0)
+
+    def test_sparse_history_is_pulled_towards_base_time(self):
+        self.assertEqual(blend_stats(15)['session_seconds'], 900)
+        # 5건 가중 기본값(900초)과 실제 평균(300초) 5건 → 600초
+        self.assertEqual(blend_stats(15, 5 * 300, 5)['session_seconds'], 600)
+
+    def test_join_queue_returns_estimated_wait(self):
+        make_session(self.users[2], self.equipment, timezone.now() - datetime.timedelta(minutes=5), None)
+        client = APIClient()
+
+        estimates = []
+        for user in self.users[:2]:
+            client.force_authenticate(user)
+            response = client.post('/api/workouts/join-queue/', {'equipment_id': self.equipment.id}, format='json')
+            estimates.append(response.data['estimated_wait_seconds'])
+
+        # 1번: 현재 세션의 남은 시간(약 10분), 2번: + 기본 세션 시간 15분
+        self.assertAlmostEqual(estimates[0], 600, delta=5)
+        self.assertAlmostEqual(estimates[1] - estimates[0], 900, delta=2)
+
+        response = client.get('/api/workouts/queue-position/', {'equipment_id': self.equipment.id})
+        self.assertAlmostEqual(response.data['estimated_wait_seconds'], estimates[1], delta=5)
+
+    @override_settings(RESERVATION_NOTIFY_TIMEOUT_MINUTES=2)
+    def test_notified_holder_counts_as_occupant_ahead(self):
+        self.equipment.status = 'AVAILABLE'
+        self.equipment.save(update_fields=['status'])
+        Reservation.objects.create(
+            user=self.users[2], equipment=self.equipment, status='NOTIFIED',
+            notified_at=timezone.now() - datetime.timedelta(minutes=1),
+        )
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+
+        response = client.post('/api/workouts/join-queue/', {'equipment_id': self.equipment.id}, format='json')
+
+        # 1번이지만 알림 받은 사용자의 남은 유효 시간(약 1분) + 기본 세션 시간 15분을 기다림
+        self.assertEqual(response.data['position'], 1)
+        self.assertAlmostEqual(response.data['estimated_wait_seconds'], 60 + 900, delta=5)
+
+    def test_evaluate_command_replays_history(self):
+        now = timezone.now()
+        make_session(self.users[0], self.equipment, now - datetime.timedelta(hours=2), 15)
+        reservation = Reservation.objects.create(user=self.users[1], equipment=self.equipment, status='COMPLETED')
+        Reservation.objects.filter(pk=reservation.pk).update(
+            created_at=now - datetime.timedelta(hours=2, minutes=-5),
+            notified_at=now - datetime.timedelta(hours=1, minutes=45),
+        )
+        make_session(self.users[1], self.equipment, now - datetime.timedelta(hours=1, minutes=44), 15)
+
+        out = io.StringIO()
+        call_command('evaluate_eta', '--days', '1', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('1 reservations notified', output)
+        # 등록 시점 남은 시간 10분 = 실제 대기 10분
+        self.assertRegex(output, r'eta\s+\|\s+0\.0 ')
+
+
+class ExpireReservationsTaskTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.rack = make_equipment(gym, 'rack', status='IN_USE')
+        self.bench = make_equipment(gym, 'bench', status='IN_USE')
+        self.users = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(6)]
+
+    def _reserve(self, user, equipment, status='WAITING', notified_minutes_ago=None):
+        notified_at = None
+        if notified_minutes_ago is not None:
+            notified_at = timezone.now() - datetime.timedelta(minutes=notified_minutes_ago)
+        return Reservation.objects.create(user=user, equipment=equipment, status=status, notified_at=notified_at)
+
+    def test_expired_notifications_promote_next_waiters_per_equipment(self):
+        stale_rack = self._reserve(self.users[0], self.rack, 'NOTIFIED', notified_minutes_ago=10)
+        fresh_bench = self._reserve(self.users[1], self.bench, 'NOTIFIED', notified_minutes_ago=0)
+        stale_bench = self._reserve(self.users[2], self.bench, 'NOTIFIED', notified_minutes_ago=10)
+        rack_waiters = [self._reserve(user, self.rack) for user in self.users[3:5]]
+        bench_waiter = self._reserve(self.users[5], self.bench)
+
+        # 후보 조회 + 기구 잠금 + 예약 잠금 + 만료 UPDATE + 대기자 순위(window) + 잠금 + 승격 UPDATE (+ savepoint)
+        with self.assertNumQueries(9):
+            result = expire_notified_reservations(timeout_minutes=1)
+
+        self.assertEqual((result['expired'], result['notified']), (2, 2))
+        status = dict(Reservation.objects.values_list('id', 'status'))
+        self.assertEqual(status[stale_rack.id], 'EXPIRED')
+        self.assertEqual(status[stale_bench.id], 'EXPIRED')
+        self.assertEqual(status[fresh_bench.id], 'NOTIFIED')
+        # 기구별로 가장 먼저 기다린 사람만 승격
+        self.assertEqual(status[rack_waiters[0].id], 'NOTIFIED')
+        self.assertEqual(status[rack_waiters[1].id], 'WAITING')
+        self.assertEqual(status[bench_waiter.id], 'NOTIFIED')
+
+    def test_batches_until_no_expired_rows_remain(self):
+        for user in self.users[:5]:
+            self._reserve(user, self.rack, 'NOTIFIED', notified_minutes_ago=10)
+
+        result = expire_notified_reservations(timeout_minutes=1, batch_size=2)
+
+        self.assertEqual(result['expired'], 5)
+        self.assertEqual(result['notified'], 0)
+        self.assertEqual([b['expired'] for b in result['batches']], [2, 2, 1])
+
+
+
+class ReservationExpirySchedulingTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipment = make_equipment(gym, 'rack', status='IN_USE')
+        self.users = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(3)]
+
+    def test_promotion_schedules_expiry_at_the_deadline(self):
+        make_session(self.users[0], self.equipment, timezone.now() - datetime.timedelta(minutes=5), None)
+        waiter = Reservation.objects.create(user=self.users[1], equipment=self.equipment, status='WAITING')
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+
+        with mock.patch.object(expire_reservation, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post('/api/workouts/end/')
+
+        waiter.refresh_from_db()
+        self.assertEqual(waiter.status, 'NOTIFIED')
+        apply_async.assert_called_once()
+        kwargs = apply_async.call_args.kwargs
+        self.assertEqual(kwargs['args'], (waiter.id, waiter.notified_at.isoformat()))
+        self.assertEqual(kwargs['eta'], waiter.notified_at + datetime.timedelta(minutes=settings.RESERVATION_NOTIFY_TIMEOUT_MINUTES))
+
+    def test_expiry_promotes_next_waiter_once(self):
+        notified_at = timezone.now() - datetime.timedelta(minutes=1)
+        notified = Reservation.objects.create(user=self.users[0], equipment=self.equipment, status='NOTIFIED', notified_at=notified_at)
+        waiter = Reservation.objects.create(user=self.users[1], equipment=self.equipment, status='WAITING')
+
+        with mock.patch.object(expire_reservation, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(expire_reservation(notified.id, notified_at.isoformat()), 'expired')
+            # 중복 실행(재전송)은 아무것도 바꾸지 않음
+            self.assertEqual(expire_reservation(notified.id, notified_at.isoformat()), 'skipped')
+
+        notified.refresh_from_db()
+        waiter.refresh_from_db()
+        self.assertEqual(notified.status, 'EXPIRED')
+        self.assertEqual(waiter.status, 'NOTIFIED')
+        # 새로 알림 받은 대기자의 만료도 예약됨
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs['args'][0], waiter.id)
+
+    def test_user_who_already_started_is_completed_not_expired(self):
+        notified_at = timezone.now() - datetime.timedelta(minutes=1)
+        notified = Reservation.objects.create(user=self.users[0], equipment=self.equipment, status='NOTIFIED', notified_at=notified_at)
+        waiter = Reservation.objects.create(user=self.users[1], equipment=self.equipment, status='WAITING')
+        make_session(self.users[0], self.equipment, notified_at + datetime.timedelta(seconds=5), None)
+
+        self.assertEqual(expire_reservation(notified.id, notified_at.isoformat()), 'completed')
+
+        notified.refresh_from_db()
+        waiter.refresh_from_db()
+        self.assertEqual(notified.status, 'COMPLETED')
+        self.assertEqual(waiter.status, 'WAITING')
+
+
+def _redis_available():
+    try:
+        import redis
+        return redis.Redis.from_url(settings.QUEUE_REDIS_URL, socket_connect_timeout=0.2).ping()
+    except Exception:
+        return False
+
+
+class _InMemoryRedis:
+    """ Redis 서버가 없을 때 RedisQueueEngine 테스트용: 엔진이 쓰는 sorted set 명령과 WATCH/MULTI/EXEC만 흉내 냄 """
+
+    def __init__(self):
+        self.data = {}
+        self.versions = {}
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _ordered(self, key):
+        return [member for member, _ in sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]))]
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+        self._touch(key)
+
+    def zrem(self, key, *members):
+        zset = self.data.get(key, {})
+        if any([zset.pop(member, None) is not None for member in members]):
+            self._touch(key)
+        if not zset:
+            self.data.pop(key, None)
+
+    def zrank(self, key, member):
+        ordered = self._ordered(key)
+        return ordered.index(member) if member in ordered else None
+
+    def zrange(self, key, start, end):
+        return self._ordered(key)[start:None if end == -1 else end + 1]
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def delete(self, *keys):
+        for key in keys:
+            if self.data.pop(key, None) is not None:
+                self._touch(key)
+
+    def rename(self, src, dst):
+        self.data[dst] = self.data.pop(src)
+        self._touch(src)
+        self._touch(dst)
+
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+    def pipeline(self, transaction=True):
+        return _InMemoryPipeline(self)
+
+
+class _InMemoryPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.watched = {}
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.watched, self.commands = {}, []
+
+    def watch(self, *keys):
+        self.watched = {key: self.client.versions.get(key, 0) for key in keys}
+
+    def multi(self):
+        pass
+
+    def __getattr__(self, name):
+        # MULTI 이후 명령은 모아 두었다가 EXEC(execute)에서 실행
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        from redis.exceptions import WatchError
+
+        if any(self.client.versions.get(key, 0) != version for key, version in self.watched.items()):
+            raise WatchError('Watched variable changed.')
+        return [getattr(self.client, name)(*args) for name, args in self.commands]
+
+
+class RedisQueueEngineTests(TransactionTestCase):
+    """ Redis 서버가 있으면 서버로, 없으면 _InMemoryRedis로 실행합니다. """
+
+    def setUp(self):
+        client = None if _redis_available() else _InMemoryRedis()
+        self.engine = RedisQueueEngine(prefix='healthqueue-test', client=client)
+        owner = User.objects.create_user(username='owner', password='pw')
+        gym = Gym.objects.create(owner=owner, name='gym', address='addr')
+        self.equipment = make_equipment(gym, 'rack')
+        self.users = [User.objects.create_user(username=f'member{i}', password='pw') for i in range(3)]
+
+    def tearDown(self):
+        for key in self.engine.client.scan_iter(match='healthqueue-test:*'):
+            self.engine.client.delete(key)
+
+    def test_rank_length_and_head_follow_the_reservation_table(self):
+        reservations = []
+        for user in self.users:
+            reservation = Reservation.objects.create(user=user, equipment=self.equipment, status='WAITING')
+            self.engine.enqueue(reservation) # autocommit이므로 즉시 반영
+            reservations.append(reservation)
+
+        self.assertEqual(self.engine.length(self.equipment.id), 3)
+        self.assertEqual([self.engine.rank(r) for r in reservations], [0, 1, 2])
+        self.assertEqual(self.engine.next_waiting(self.equipment.id), reservations[0])
+
+        # DB만 바뀐 경우(어긋남)에도 맨 앞 대기자는 DB 기준으로 보정되고, rebuild로 복구됨
+        Reservation.objects.filter(pk=reservations[0].pk).update(status='EXPIRED')
+        self.assertEqual(self.engine.next_waiting(self.equipment.id), reservations[1])
+        self.engine.rebuild()
+        self.assertEqual(self.engine.length(self.equipment.id), 2)
+
+    def test_same_created_at_is_ordered_by_id(self):
+        users = self.users + [User.objects.create_user(username=f'late{i}', password='pw') for i in range(10)]
+        reservations = [
+            Reservation.objects.create(user=user, equipment=self.equipment, status='WAITING') for user in users
+        ]
+        Reservation.objects.filter(equipment=self.equipment).update(created_at=timezone.now())
+        reservations = list(Reservation.objects.filter(equipment=self.equipment).order_by('id'))
+        for reservation in reservations:
+            self.engine.enqueue(reservation)
+
+        expected = [DatabaseQueueEngine().rank(r) for r in reservations]
+        self.assertEqual(expected, list(range(len(reservations))))
+        self.assertEqual([self.engine.rank(r) for r in reservations], expected)
+        self.engine.rebuild(self.equipment.id)
+        self.assertEqual([self.engine.rank(r) for r in reservations], expected)
+        self.assertEqual(self.engine.next_waiting(self.equipment.id), reservations[0])
+
+    def test_rebuild_keeps_an_enqueue_committed_while_it_reads(self):
+        Reservation.objects.create(user=self.users[0], equipment=self.equipment, status='WAITING')
+        zadd = self.engine.client.zadd
+        late = []
+
+        def zadd_after_concurrent_enqueue(key, mapping):
+            # 재구성이 DB를 읽은 직후 다른 프로세스가 새 예약을 커밋하고 Redis에 반영
+            if ':rebuild:' in key and not late:
+                late.append(Reservation.objects.create(user=self.users[1], equipment=self.equipment, status='WAITING'))
+                self.engine.enqueue(late[0])
+            return zadd(key, mapping)
+
+        with mock.patch.object(self.engine.client, 'zadd', side_effect=zadd_after_concurrent_enqueue):
+            self.assertEqual(self.engine.rebuild(), 1)
+
+        self.assertEqual(self.engine.length(self.equipment.id), 2)
+        self.assertEqual(self.engine.rank(late[0]), 1)
+        self.assertEqual(list(self.engine.client.scan_iter(match='healthqueue-test:*:rebuild:*')), [])
@@ -3,7 +3,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 # StartSessionView를 import 합니다.
-from .views import UsageSessionViewSet, ReservationViewSet, StartSessionView, EndSessionView, JoinQueueView, LeaveQueueView
+from .views import UsageSessionViewSet, ReservationViewSet, StartSessionView, EndSessionView, JoinQueueView, LeaveQueueView, QueuePositionView, HistoryExportView
 from .views import JoinQueueView
 
 router = DefaultRouter()
@@ -16,6 +16,8 @@ urlpatterns = [
     path('workouts/end/', EndSessionView.as_view(), name='end-session'),
     path('workouts/join-queue/', JoinQueueView.as_view(), name='join-queue'),
     path('workouts/leave-queue/', LeaveQueueView.as_view(), name='leave-queue'),
+    path('workouts/queue-position/', QueuePositionView.as_view(), name='queue-position'),
+    path('workouts/export/<str:kind>/', HistoryExportView.as_view(), name='history-export'),
     # 기존 router.urls는 그대로 둡니다.
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,178 @@
+# workouts/utilization.py
+"""
+기구 이용률 롤업 (EquipmentUtilization) 계산과 운영자 분석 조회
+
+- rollup_utilization(since, until): [since, until) 범위의 시간 버킷을 원본 세션/예약에서 다시 계산해
+  지우고 채웁니다. 같은 범위를 여러 번 실행해도 결과가 같으므로(멱등) Celery 태스크는 최근 몇 시간만
+  주기적으로 다시 계산하고, 초기 구축/복구는 backfill_utilization 명령이 하루 단위로 호출합니다.
+- get_utilization(...): 분석 API가 기간 합계(와 선택적으로 시간/일 단위 시계열)를 롤업 테이블에서만 읽습니다.
+
+가정:
+- 세션의 이용 시간은 버킷 경계로 나눠 각 버킷에 더하고, 진행 중인 세션은 지금까지를 이용 시간으로 봅니다.
+- 대기 시간은 created_at → notified_at 구간입니다. 아직 WAITING이면 지금까지로 보며,
+  알림 전에 취소된 예약은 대기 종료 시각이 기록되지 않으므로 대기열 길이 계산에서 제외합니다.
+- 알림 → 시작 시간은 COMPLETED 예약의 notified_at 이후 같은 사용자/기구의 첫 세션 시작 시각까지입니다.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import EquipmentUtilization, Reservation, UsageSession
+from .services import WORKLOAD_BUCKET, bucket_for
+
+ROLLUP_FIELDS = (
+    'busy_seconds', 'session_count', 'queue_seconds',
+    'notified_count', 'wait_seconds', 'started_count', 'start_delay_seconds',
+)
+
+
+def _split_by_bucket(start, end, since, until):
+    """ [start, end) 구간을 [since, until) 안에서 버킷별 (bucket_start, 초)로 나눕니다. """
+    start, end = max(start, since), min(end, until)
+    while start < end:
+        bucket = bucket_for(start)
+        boundary = min(bucket + WORKLOAD_BUCKET, end)
+        yield bucket, (boundary - start).total_seconds()
+        start = boundary
+
+
+def compute_utilization(since, until, now=None):
+    """
+    [since, until) 범위의 기구별/버킷별 롤업 값을 원본 테이블에서 계산합니다. (쿼리 3번)
+    반환값: {(equipment_id, bucket_start): {필드: 값}}
+    """
+    now = now or timezone.now()
+    buckets = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+
+    # 1) 이용 시간 / 세션 수: 범위와 겹치는 세션
+    sessions = (
+        UsageSession.objects.filter(start_time__lt=until)
+        .filter(Q(end_time__gt=since) | Q(end_time__isnull=True))
+        .values_list('equipment_id', 'start_time', 'end_time')
+        .iterator(chunk_size=2000)
+    )
+    for equipment_id, start, end in sessions:
+        for bucket, seconds in _split_by_bucket(start, end or now, since, until):
+            buckets[equipment_id, bucket]['busy_seconds'] += seconds
+        if since <= start < until:
+            buckets[equipment_id, bucket_for(start)]['session_count'] += 1
+
+    # 2) 대기열 길이: 범위와 겹치는 대기 구간 (created_at → notified_at, 아직 WAITING이면 지금까지)
+    waiting = (
+        Reservation.objects.filter(created_at__lt=until)
+        .filter(Q(notified_at__gt=since) | Q(notified_at__isnull=True, status='WAITING'))
+        .values_list('equipment_id', 'created_at', 'notified_at')
+        .iterator(chunk_size=2000)
+    )
+    for equipment_id, created_at, notified_at in waiting:
+        for bucket, seconds in _split_by_bucket(created_at, notified_at or now, since, until):
+            buckets[equipment_id, bucket]['queue_seconds'] += seconds
+
+    # 3) 대기 → 알림 → 시작: 범위 안에서 알림을 받은 예약 (알림 시각의 버킷에 기록)
+    first_start = (
+        UsageSession.objects.filter(
+            user_id=OuterRef('user_id'), equipment_id=OuterRef('equipment_id'), start_time__gte=OuterRef('notified_at')
+        )
+        .order_by('start_time')
+        .values('start_time')[:1]
+    )
+    notified = (
+        Reservation.objects.filter(notified_at__gte=since, notified_at__lt=until)
+        .annotate(started_at=Subquery(first_start))
+        .values_list('equipment_id', 'created_at', 'notified_at', 'status', 'started_at')
+        .iterator(chunk_size=2000)
+    )
+    for equipment_id, created_at, notified_at, status, started_at in notified:
+        row = buckets[equipment_id, bucket_for(notified_at)]
+        row['notified_count'] += 1
+        row['wait_seconds'] += max((notified_at - created_at).total_seconds(), 0)
+        if status == 'COMPLETED' and started_at is not None:
+            row['started_count'] += 1
+            row['start_delay_seconds'] += max((started_at - notified_at).total_seconds(), 0)
+
+    return buckets
+
+
+def rollup_utilization(since, until=None, now=None):
+    """
+    [since, until) 범위(정시로 맞춤)의 EquipmentUtilization 행을 다시 계산해 교체합니다.
+    until을 생략하면 현재 진행 중인 버킷까지 포함합니다. 반환값: 저장한 행 수
+    """
+    now = now or timezone.now()
+    since = bucket_for(since)
+    until = bucket_for(until) if until is not None else bucket_for(now) + WORKLOAD_BUCKET
+
+    rows = [
+        EquipmentUtilization(equipment_id=equipment_id, bucket_start=bucket, **values)
+        for (equipment_id, bucket), values in compute_utilization(since, until, now=now).items()
+    ]
+    with transaction.atomic():
+        EquipmentUtilization.objects.filter(bucket_start__gte=since, bucket_start__lt=until).delete()
+        EquipmentUtilization.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _averages(totals, hours):
+    busy = totals['busy_seconds'] or 0
+    notified = totals['notified_count'] or 0
+    started = totals['started_count'] or 0
+    return {
+        'busy_minutes': round(busy / 60, 1),
+        'session_count': totals['session_count'] or 0,
+        'utilization': round(busy / (hours * 3600), 4) if hours else 0,
+        'avg_queue_length': round((totals['queue_seconds'] or 0) / (hours * 3600), 2) if hours else 0,
+        'notified_count': notified,
+        'avg_wait_seconds': round(totals['wait_seconds'] / notified, 1) if notified else None,
+        'avg_start_delay_seconds': round(totals['start_delay_seconds'] / started, 1) if started else None,
+    }
+
+
+def _sums():
+    return {
+        field: Sum(field, output_field=FloatField()) if field.endswith('seconds') else Sum(field)
+        for field in ROLLUP_FIELDS
+    }
+
+
+def get_utilization(equipments, start, end, interval=None):
+    """
+    equipments(Equipment 쿼리셋)의 [start, end) 기간 이용 현황을 롤업 테이블에서 읽습니다.
+    interval='hour' / 'day'면 기구별 시계열(series)을 함께 반환합니다.
+
+    반환값: [{'equipment_id', 'name', 'gym_id', 'busy_minutes', 'session_count', 'utilization',
+              'avg_queue_length', 'notified_count', 'avg_wait_seconds', 'avg_start_delay_seconds',
+              ('series': [...])}, ...]
+    """
+    start, end = bucket_for(start), bucket_for(end)
+    hours = (end - start) / WORKLOAD_BUCKET
+    rollups = EquipmentUtilization.objects.filter(
+        equipment__in=equipments, bucket_start__gte=start, bucket_start__lt=end
+    )
+
+    totals = {row['equipment_id']: row for row in rollups.values('equipment_id').annotate(**_sums()).order_by()}
+    result = []
+    for equipment in equipments.order_by('gym_id', 'id').values('id', 'name', 'gym_id'):
+        row = totals.get(equipment['id'], dict.fromkeys(ROLLUP_FIELDS, 0))
+        result.append({'equipment_id': equipment['id'], 'name': equipment['name'], 'gym_id': equipment['gym_id'],
+                       **_averages(row, hours)})
+
+    if interval:
+        trunc = {'hour': TruncHour, 'day': TruncDay}[interval]
+        bucket_hours = 1 if interval == 'hour' else 24
+        series = defaultdict(list)
+        rows = (
+            rollups.annotate(period=trunc('bucket_start', tzinfo=datetime.timezone.utc))
+            .values('equipment_id', 'period')
+            .annotate(**_sums())
+            .order_by('equipment_id', 'period')
+        )
+        for row in rows:
+            series[row['equipment_id']].append({'bucket_start': row['period'], **_averages(row, bucket_hours)})
+        for item in result:
+            item['series'] = series.get(item['equipment_id'], [])
+
+    return result
@@ -1,36 +1,71 @@
 from django.shortcuts import render
 # workouts/views.py
 
+import datetime
+
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 # workouts/views.py (이 코드로 덮어쓰세요)
 from .models import UsageSession, Reservation
 from .serializers import UsageSessionSerializer, ReservationSerializer
+from .services import get_recent_body_part_ratios, parse_date_bound, record_session_workload
+from .queue_engine import get_queue_engine
+from .eta import estimate_wait
+from .queue_service import get_queue_service
+from .exports import EXPORTS, EXPORT_RENDERERS, ExportContentNegotiation, export_rows, select_export_renderer
 from equipment.models import Equipment # Equipment 모델 import
+from realtime import events
 from users.models import UserProfile # UserProfile 모델 import
+from django.contrib.auth.models import User
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 from django.db import transaction
-import datetime
+from backend.query_budget import query_budget
+from gyms.services import get_managed_gym_ids, scope_to_user
 
 # "AI 두뇌 사용설명서"에서 예측 함수를 가져옵니다.
 from ai_model.prediction_utils import get_ai_recommendation
 
+@query_budget(6, list=3, retrieve=4)
 class UsageSessionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated] # <- 이 줄 추가
     queryset = UsageSession.objects.all()
     serializer_class = UsageSessionSerializer
+    cursor_ordering = ('-start_time', '-id')
+
+    def get_queryset(self):
+        # 본인 세션 (운영자는 관리 헬스장의 세션 포함), 사용자/기구 이름은 JOIN으로 함께 조회
+        queryset = scope_to_user(UsageSession.objects.all(), self.request.user, 'user', 'equipment__gym_id')
+        return queryset.select_related('user', 'equipment')
 
+@query_budget(6, list=3, retrieve=4)
 class ReservationViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated] # <- 이 줄 추가
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    cursor_ordering = ('-created_at', '-id')
 
+    def get_queryset(self):
+        queryset = scope_to_user(Reservation.objects.all(), self.request.user, 'user', 'equipment__gym_id')
+        return queryset.select_related('user', 'equipment')
+
+@query_budget(post=14)
 class StartSessionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
+        """
+        기구에서 운동 세션을 시작합니다. (Request body: nfc_tag_id 또는 equipment_id)
+
+        1. 잠금 없이: 기구 조회, 빠른 거절(사용 중), 알림 받은 예약이 없으면 AI 추천 시간 계산
+        2. 트랜잭션 하나에서: 사용자 행을 잠가 같은 사용자의 시작 요청을 직렬화하고, 진행 중 세션을 조회한 뒤
+           관련 기구 행을 한 번에 잠그고(queue_service 잠금 규칙) 상태/대기열을 다시 확인하여
+           이전 세션 종료(기구 전환), 예약 완료, 기구 상태 변경, 세션 생성을 처리
+        AI 추론은 잠금 밖에서 하므로 같은 기구에 요청이 몰려도 잠금 보유 시간은 짧고 일정합니다.
+        """
         nfc_tag_id = request.data.get('nfc_tag_id')
         equipment_id = request.data.get('equipment_id')
         user = request.user
@@ -47,135 +82,102 @@ class StartSessionView(APIView):
         except Equipment.DoesNotExist:
             return Response({'error': '해당 기구를 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Use DB transaction and row-level lock to avoid races
-        from django.db import transaction
-        with transaction.atomic():
-            equipment = Equipment.objects.select_for_update().get(pk=equipment.pk)
+        if equipment.status != 'AVAILABLE':
+            return Response({'error': '현재 사용할 수 없는 기구입니다.'}, status=status.HTTP_409_CONFLICT)
+
+        # 알림 받은 예약자는 기본 시간, 그 외에는 AI 추천 시간 (잠금 전에 계산, 잠금 후 다시 확인)
+        notified = Reservation.objects.filter(equipment=equipment, user=user, status='NOTIFIED').exists()
+        recommended = None if notified else self._recommend_time(user, equipment)
 
+        service = get_queue_service()
+        with transaction.atomic():
+            # 같은 사용자가 동시에 두 기구에서 시작해도 진행 중 세션이 하나만 남도록, 잠금 안에서 조회합니다.
+            # (사용자 행은 기구 행보다 먼저 잠그며, 다른 경로는 사용자 행을 잠그지 않으므로 교착 상태가 없음)
+            list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+            existing_session = UsageSession.objects.filter(user=user, end_time__isnull=True).first()
+            # 새 기구와 (기구 전환이면) 이전 기구를 id 순서로 한 번에 잠급니다.
+            lock_ids = {equipment.id} | ({existing_session.equipment_id} if existing_session else set())
+            locked = {
+                e.id: e for e in Equipment.objects.select_for_update().filter(id__in=lock_ids).order_by('id')
+            }
+            equipment = locked[equipment.id]
             if equipment.status != 'AVAILABLE':
                 return Response({'error': '현재 사용할 수 없는 기구입니다.'}, status=status.HTTP_409_CONFLICT)
 
-            # If the user already has an active session, end it immediately (simulate switching machines)
-            existing_session = UsageSession.objects.filter(user=user, end_time__isnull=True).first()
-            if existing_session:
-                # end previous session
-                existing_session.end_time = timezone.now()
-                existing_session.save()
-
-                prev_equipment = existing_session.equipment
-                prev_equipment.status = 'AVAILABLE'
-                prev_equipment.save()
-
-                # notify next waiting on previous equipment
-                next_prev = Reservation.objects.filter(equipment=prev_equipment, status='WAITING').order_by('created_at').first()
-                if next_prev:
-                    next_prev.status = 'NOTIFIED'
-                    next_prev.notified_at = timezone.now()
-                    next_prev.save()
-
-            # Check queue: if other users in queue, only NOTIFIED user may start
-            other_in_queue = Reservation.objects.filter(equipment=equipment, status__in=['WAITING', 'NOTIFIED']).exclude(user=user).exists()
-            reservation = Reservation.objects.filter(equipment=equipment, user=user, status='NOTIFIED').first()
-            if other_in_queue and not reservation:
+            # 대기열이 있으면 알림 받은 사용자만 시작할 수 있습니다.
+            queue = Reservation.objects.filter(equipment=equipment, status__in=['WAITING', 'NOTIFIED'])
+            reservation = queue.filter(user=user, status='NOTIFIED').first()
+            if reservation is None and queue.exclude(user=user).exists():
                 return Response({'error': '대기열이 있습니다. 알림 받은 사용자만 시작할 수 있습니다.'}, status=status.HTTP_409_CONFLICT)
 
-        allocated_time = 0
-        session_type = ''
-
-        # If there are other users in queue (WAITING or NOTIFIED), only allow start
-        # for the user who has been NOTIFIED. If the equipment has any waiting/notified
-        # reservations for other users, deny start for users who are not the notified one.
-        other_in_queue = Reservation.objects.filter(equipment=equipment, status__in=['WAITING', 'NOTIFIED']).exclude(user=user).exists()
-        reservation = Reservation.objects.filter(
-            equipment=equipment,
-            user=user,
-            status='NOTIFIED'
-        ).first()
-
-        if other_in_queue and not reservation:
-            # There is someone else waiting or notified — user cannot bypass the queue
-            return Response({'error': '대기열이 있습니다. 알림 받은 사용자만 시작할 수 있습니다.'}, status=status.HTTP_409_CONFLICT)
-
-            if reservation:
-                # 예약자일 경우: 고정 시간 할당 (변경 없음)
-                allocated_time = equipment.base_session_time_minutes
-                session_type = 'BASE'
-                reservation.status = 'COMPLETED'
-                reservation.save()
-        else:
-            # --- AI 추천 로직 시작 ---
-            # 예약자가 아닐 경우 (비어있는 기구 사용)
-            try:
-                user_profile = UserProfile.objects.get(user=user)
-                
-                # 1. 최근 24시간 운동 기록을 DB에서 조회
-                now = timezone.now()
-                recent_sessions = UsageSession.objects.filter(
-                    user=user, 
-                    start_time__gte=now - datetime.timedelta(hours=24),
-                    end_time__isnull=False # 완료된 세션만
-                )
-
-                # 2. 상/하체 운동 비율 계산
-                total_duration_minutes = 0
-                upper_duration_minutes = 0
-                lower_duration_minutes = 0
-                
-                for session in recent_sessions:
-                    # 운동 시간을 분 단위로 계산
-                    duration = (session.end_time - session.start_time).total_seconds() / 60
-                    total_duration_minutes += duration
-                    
-                    # equipment/models.py에 추가한 body_part 필드 사용
-                    if session.equipment.body_part == 'UPPER':
-                        upper_duration_minutes += duration
-                    elif session.equipment.body_part == 'LOWER':
-                        lower_duration_minutes += duration
-                
-                # 3. 비율(ratio) 계산 (0으로 나누기 방지)
-                upper_ratio = (upper_duration_minutes / total_duration_minutes) if total_duration_minutes > 0 else 0
-                lower_ratio = (lower_duration_minutes / total_duration_minutes) if total_duration_minutes > 0 else 0
-                
-                ratios = {'upper_ratio': upper_ratio, 'lower_ratio': lower_ratio}
-                
-                print(f"DB 기반 비율 계산: 상체 {upper_ratio:.2f}, 하체 {lower_ratio:.2f}")
-
-                # 4. AI 모델 호출
-                allocated_time = get_ai_recommendation(
-                    user_profile,
-                    equipment.ai_model_id, # DB에 저장된 AI용 기구 ID 전달
-                    ratios
-                )
-                session_type = 'AI_RECOMMENDED'
-
-            except UserProfile.DoesNotExist:
-                # 유저 프로필이 없는 경우
-                allocated_time = equipment.base_session_time_minutes
-                session_type = 'BASE'
-            except Exception as e:
-                # 기타 AI 예측 오류 발생 시
-                print(f"!!! AI 추천 중 오류 발생: {e}")
-                allocated_time = equipment.base_session_time_minutes # 오류 시 기본 시간
-                session_type = 'BASE'
-            # --- AI 추천 로직 끝 ---
-
-        # 5. 새로운 운동 세션 생성
-        equipment.status = 'IN_USE'
-        equipment.save()
-
-        session = UsageSession.objects.create(
-            user=user,
-            equipment=equipment,
-            allocated_duration_minutes=allocated_time,
-            session_type=session_type
-        )
+            now = timezone.now()
+            # 다른 기구에서 운동 중이면 그 세션을 종료합니다. (기구 전환)
+            if existing_session and existing_session.equipment_id in locked:
+                ended = UsageSession.objects.filter(pk=existing_session.pk, end_time__isnull=True).update(end_time=now)
+                if ended:
+                    existing_session.end_time = now
+                    prev_equipment = locked[existing_session.equipment_id]
+                    prev_equipment.status = 'AVAILABLE'
+                    prev_equipment.save(update_fields=['status'])
+                    events.equipment_status_changed(prev_equipment)
+                    record_session_workload(existing_session, body_part=prev_equipment.body_part)
+                    # 이전 기구의 다음 대기자에게 알림 (기구 행은 이미 잠금)
+                    service.promote({prev_equipment.id: 1}, now=now)
+
+            if reservation is not None:
+                # 예약자일 경우: 고정 시간 할당
+                allocated_time, session_type = equipment.base_session_time_minutes, 'BASE'
+                service.complete(reservation)
+            elif recommended is not None:
+                allocated_time, session_type = recommended
+            else:
+                # 잠금 전에는 알림 상태였지만 그사이 만료된 경우
+                allocated_time, session_type = equipment.base_session_time_minutes, 'BASE'
+
+            equipment.status = 'IN_USE'
+            equipment.save(update_fields=['status'])
+            events.equipment_status_changed(equipment)
+            session = UsageSession.objects.create(
+                user=user,
+                equipment=equipment,
+                allocated_duration_minutes=allocated_time,
+                session_type=session_type
+            )
 
         # TODO: 아두이노에 소켓 통신으로 'UNLOCK' 신호 보내는 로직 추가
 
         serializer = UsageSessionSerializer(session)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def _recommend_time(user, equipment):
+        """ AI 추천 운동 시간(분)과 세션 종류를 반환합니다. 프로필이 없거나 오류가 나면 기본 시간 """
+        try:
+            user_profile = UserProfile.objects.get(user=user)
+
+            # 1~3. 최근 24시간 상/하체 운동 비율 (BodyPartWorkload 롤업에서 조회)
+            recent = get_recent_body_part_ratios(user, hours=24)
+            ratios = {'upper_ratio': recent['upper_ratio'], 'lower_ratio': recent['lower_ratio']}
+
+            print(f"DB 기반 비율 계산: 상체 {ratios['upper_ratio']:.2f}, 하체 {ratios['lower_ratio']:.2f}")
+
+            # 4. AI 모델 호출
+            return get_ai_recommendation(
+                user_profile,
+                equipment.ai_model_id, # DB에 저장된 AI용 기구 ID 전달
+                ratios
+            ), 'AI_RECOMMENDED'
+
+        except UserProfile.DoesNotExist:
+            # 유저 프로필이 없는 경우
+            return equipment.base_session_time_minutes, 'BASE'
+        except Exception as e:
+            # 기타 AI 예측 오류 발생 시
+            print(f"!!! AI 추천 중 오류 발생: {e}")
+            return equipment.base_session_time_minutes, 'BASE' # 오류 시 기본 시간
     
 
+@query_budget(post=18)
 class EndSessionView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -197,15 +199,13 @@ class EndSessionView(APIView):
                 equipment = Equipment.objects.select_for_update().get(pk=current_session.equipment.pk)
                 equipment.status = 'AVAILABLE'
                 equipment.save()
+                events.equipment_status_changed(equipment)
 
+                # 사용자별 부위 운동량 롤업 갱신 (AI 비율 계산용)
+                record_session_workload(current_session, body_part=equipment.body_part)
 
                 # 다음 대기자에게 알림 보내기 (해당 행도 트랜잭션 내에서 처리)
-                next_reservation = Reservation.objects.select_for_update(skip_locked=True).filter(equipment=equipment, status='WAITING').order_by('created_at').first()
-                if next_reservation:
-                    next_reservation.status = 'NOTIFIED'
-                    next_reservation.notified_at = timezone.now()
-                    next_reservation.save()
-                    # TODO: 다음 사용자에게 FCM 푸시 알림을 보내는 로직 추가
+                get_queue_service().advance(equipment.id)
 
         except UsageSession.DoesNotExist:
             return Response({'error': '현재 진행 중인 운동 세션이 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
@@ -213,6 +213,7 @@ class EndSessionView(APIView):
         return Response({'message': '운동이 성공적으로 종료되었습니다.'}, status=status.HTTP_200_OK)
 
 
+@query_budget(post=9)
 class JoinQueueView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -224,7 +225,9 @@ class JoinQueueView(APIView):
         { "equipment_id": 3 }
 
         응답:
-        { "reservation_id": 123, "equipment_id": 3, "position": 2, "waiting_count": 5 }
+        { "reservation_id": 123, "equipment_id": 3, "position": 2, "waiting_count": 5,
+          "estimated_wait_seconds": 840, "estimated_notify_at": "..." }
+        (estimated_*: 알림을 받을 때까지의 예상 시간, workouts.eta 참고)
         """
         user = request.user
         equipment_id = request.data.get('equipment_id')
@@ -237,6 +240,8 @@ class JoinQueueView(APIView):
         except Equipment.DoesNotExist:
             return Response({'error': '해당 기구가 존재하지 않습니다.'}, status=status.HTTP_404_NOT_FOUND)
 
+        queue = get_queue_engine()
+
         # 이미 대기열/알림 상태로 등록되어 있는지 확인
         existing = Reservation.objects.filter(user=user, equipment=equipment, status__in=['WAITING', 'NOTIFIED']).first()
         if existing:
@@ -245,21 +250,71 @@ class JoinQueueView(APIView):
                 position = 1
             else:
                 # 앞에 있는 WAITING 수 + 1
-                position = list(Reservation.objects.filter(equipment=equipment, status='WAITING').order_by('created_at')).index(existing) + 1
-            waiting_count = Reservation.objects.filter(equipment=equipment, status='WAITING').count()
-            return Response({'detail': '이미 대기열에 등록되어 있습니다.', 'reservation_id': existing.id, 'position': position, 'waiting_count': waiting_count}, status=status.HTTP_200_OK)
+                position = queue.rank(existing) + 1
+            waiting_count = queue.length(equipment.id)
+            eta = estimate_wait(equipment, 0 if existing.status == 'NOTIFIED' else position)
+            return Response({'detail': '이미 대기열에 등록되어 있습니다.', 'reservation_id': existing.id, 'position': position, 'waiting_count': waiting_count, **eta}, status=status.HTTP_200_OK)
 
         # 새 예약(대기) 생성
         reservation = Reservation.objects.create(user=user, equipment=equipment, status='WAITING')
+        queue.enqueue(reservation)
 
-        # 대기 중인 사람 수(생성 후 포함)
-        waiting_count = Reservation.objects.filter(equipment=equipment, status='WAITING').count()
-        # position은 대기열에서의 순번 (마지막에 추가되었으므로 waiting_count)
-        position = waiting_count
+        # position은 대기열에서의 순번 (앞에 있는 WAITING 수 + 1)
+        position = queue.rank(reservation) + 1
+        # 대기 중인 사람 수(생성 후 포함, 엔진 반영 전일 수 있으므로 position 이상으로 보정)
+        waiting_count = max(queue.length(equipment.id), position)
+        events.reservation_changed(reservation, 'joined', position=position)
+        events.queue_changed([equipment.id])
 
-        return Response({'reservation_id': reservation.id, 'equipment_id': equipment.id, 'position': position, 'waiting_count': waiting_count}, status=status.HTTP_201_CREATED)
+        eta = estimate_wait(equipment, position)
+        return Response({'reservation_id': reservation.id, 'equipment_id': equipment.id, 'position': position, 'waiting_count': waiting_count, **eta}, status=status.HTTP_201_CREATED)
 
 
+@query_budget(get=6)
+class QueuePositionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        현재 로그인한 사용자의 대기 순번을 조회합니다. (폴링용, 대기열 전체를 읽지 않음)
+
+        Query 예: ?equipment_id=3 또는 ?reservation_id=123
+
+        응답:
+        { "reservation_id": 123, "equipment_id": 3, "status": "WAITING", "position": 2, "waiting_count": 5,
+          "estimated_wait_seconds": 840, "estimated_notify_at": "..." }
+        """
+        user = request.user
+        reservation_id = request.query_params.get('reservation_id')
+        equipment_id = request.query_params.get('equipment_id')
+
+        active = Reservation.objects.filter(user=user, status__in=['WAITING', 'NOTIFIED']).select_related('equipment')
+        if reservation_id:
+            reservation = active.filter(id=reservation_id).first()
+        elif equipment_id:
+            reservation = active.filter(equipment_id=equipment_id).first()
+        else:
+            return Response({'error': 'reservation_id 또는 equipment_id를 제공해주세요.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not reservation:
+            return Response({'error': '대기/알림 중인 예약이 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+
+        queue = get_queue_engine()
+        # NOTIFIED는 1번, WAITING은 앞에 있는 WAITING 수 + 1 (COUNT 한 번, 인덱스 사용)
+        position = 1 if reservation.status == 'NOTIFIED' else queue.rank(reservation) + 1
+        waiting_count = queue.length(reservation.equipment_id)
+
+        return Response({
+            'reservation_id': reservation.id,
+            'equipment_id': reservation.equipment_id,
+            'status': reservation.status,
+            'position': position,
+            'waiting_count': waiting_count,
+            **estimate_wait(reservation.equipment, 0 if reservation.status == 'NOTIFIED' else position),
+        }, status=status.HTTP_200_OK)
+
+
+@query_budget(post=9)
 class LeaveQueueView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -287,18 +342,65 @@ class LeaveQueueView(APIView):
         else:
             return Response({'error': 'reservation_id 또는 equipment_id를 제공해주세요.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 예약을 만료시키거나 삭제 처리
-        reservation.status = 'EXPIRED'
-        reservation.save()
-
-        # 남아 있는 대기자 중 가장 앞사람을 알림 상태로 변경
-        equipment = reservation.equipment
-        next_reservation = Reservation.objects.filter(equipment=equipment, status='WAITING').order_by('created_at').first()
-        if next_reservation:
-            next_reservation.status = 'NOTIFIED'
-            next_reservation.notified_at = timezone.now()
-            next_reservation.save()
-            # TODO: FCM 푸시 알림 전송
-
-        waiting_count = Reservation.objects.filter(equipment=equipment, status='WAITING').count()
-        return Response({'message': '대기열에서 탈퇴 처리되었습니다.', 'waiting_count': waiting_count}, status=status.HTTP_200_OK)
\ No newline at end of file
+        # 예약을 만료 처리하고, 알림 받은 예약이었다면 남아 있는 대기자 중 가장 앞사람을 알림 상태로 변경
+        get_queue_service().cancel(reservation)
+
+        waiting_count = get_queue_engine().length(reservation.equipment_id)
+        return Response({'message': '대기열에서 탈퇴 처리되었습니다.', 'waiting_count': waiting_count}, status=status.HTTP_200_OK)
+
+@query_budget(get=4)
+class HistoryExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    # 오류 응답은 JSON, 내보내기 형식(CSV/NDJSON)은 검증 후 select_export_renderer로 고릅니다.
+    renderer_classes = [JSONRenderer]
+    content_negotiation_class = ExportContentNegotiation
+
+    def get(self, request, kind, *args, **kwargs):
+        """
+        운영자 전용: 관리하는 헬스장의 운동 세션/예약 기록을 CSV 또는 NDJSON으로 스트리밍합니다.
+
+        GET /api/workouts/export/sessions/?gym_id=1&from=2025-01-01&to=2025-03-31&format=csv
+        GET /api/workouts/export/reservations/?format=ndjson
+
+        - gym_id: 생략하면 관리하는 모든 헬스장
+        - from / to: 날짜(to 포함) 또는 ISO datetime(to 미포함). 세션은 start_time, 예약은 created_at 기준
+        - format: csv(기본) / ndjson. Accept 헤더(text/csv, application/x-ndjson)로도 선택할 수 있습니다.
+        검증 오류는 형식과 관계없이 JSON(400/403)으로 응답합니다.
+        """
+        if kind not in EXPORTS:
+            raise Http404
+
+        user = request.user
+        try:
+            profile = user.userprofile
+        except UserProfile.DoesNotExist:
+            return Response({"detail": "유효한 운영자 프로필이 필요합니다."}, status=status.HTTP_403_FORBIDDEN)
+
+        if profile.role != 'OPERATOR':
+            return Response({"detail": "운영자 권한이 필요합니다."}, status=status.HTTP_403_FORBIDDEN)
+
+        renderer = select_export_renderer(request)
+        if renderer is None:
+            formats = [renderer_class.format for renderer_class in EXPORT_RENDERERS]
+            return Response({"detail": f"format은 {', '.join(formats)} 중 하나여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start = parse_date_bound(request.query_params.get('from'))
+            end = parse_date_bound(request.query_params.get('to'), end=True)
+        except ValueError:
+            return Response({"detail": "from/to는 YYYY-MM-DD 또는 ISO 8601 형식이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        gym_ids = get_managed_gym_ids(user)
+        gym_id = request.query_params.get('gym_id')
+        if gym_id:
+            if not gym_id.isdigit():
+                return Response({"detail": "gym_id는 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+            if not gym_ids.filter(id=gym_id).exists():
+                return Response({"detail": "관리하는 헬스장이 아닙니다."}, status=status.HTTP_403_FORBIDDEN)
+            gym_ids = [int(gym_id)]
+
+        columns, rows = export_rows(kind, gym_ids, start, end)
+        response = StreamingHttpResponse(renderer.stream(columns, rows), content_type=f'{renderer.media_type}; charset=utf-8')
+        filename = f"{kind}-{gym_id or 'all'}-{timezone.localdate():%Y%m%d}.{renderer.format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response